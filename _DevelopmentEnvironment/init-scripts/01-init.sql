@@ -14,6 +14,9 @@ CREATE TABLE IF NOT EXISTS gdpr.fines (
     type_of_violation TEXT,
     source_url TEXT,
     summary TEXT,
+    sector VARCHAR(200),
+    fine_key VARCHAR(64),
+    row_hash BIGINT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -23,6 +26,9 @@ CREATE INDEX IF NOT EXISTS idx_fines_country ON gdpr.fines(country);
 CREATE INDEX IF NOT EXISTS idx_fines_date ON gdpr.fines(date);
 CREATE INDEX IF NOT EXISTS idx_fines_article ON gdpr.fines(article_violated);
 
+-- Natural key (enforcement tracker ID or content hash) used by incremental loads
+CREATE UNIQUE INDEX IF NOT EXISTS idx_fines_fine_key ON gdpr.fines(fine_key);
+
 -- Create table for countries
 CREATE TABLE IF NOT EXISTS gdpr.countries (
     id SERIAL PRIMARY KEY,
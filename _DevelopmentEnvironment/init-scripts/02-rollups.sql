@@ -0,0 +1,213 @@
+-- Aggregate rollups of gdpr.fines for dashboard queries
+--
+-- Statement-level triggers record the rollup keys touched by each write in
+-- gdpr.rollup_dirty (and gdpr.rollup_dirty_articles); gdpr.refresh_fines_rollups()
+-- then recomputes only those groups. The article rollup is built from the
+-- parsed citations in gdpr.fine_articles (05-fine-articles.sql), so a fine
+-- citing several articles counts once under each of them. This script is
+-- idempotent and is also run by src/db/rollups.py.
+
+ALTER TABLE gdpr.fines ADD COLUMN IF NOT EXISTS sector VARCHAR(200);
+
+-- Totals by country, year and month
+CREATE TABLE IF NOT EXISTS gdpr.fines_by_country_month (
+    country VARCHAR(100) NOT NULL,
+    year SMALLINT NOT NULL,
+    month SMALLINT NOT NULL,
+    fine_count INTEGER NOT NULL,
+    total_amount NUMERIC(24, 2) NOT NULL,
+    max_amount NUMERIC(20, 2) NOT NULL,
+    PRIMARY KEY (country, year, month)
+);
+
+-- The article rollup used to be keyed on the raw article_violated string
+DO
+$$
+BEGIN
+    IF EXISTS (SELECT FROM information_schema.columns
+               WHERE table_schema = 'gdpr' AND table_name = 'fines_by_article'
+                 AND column_name = 'article_violated') THEN
+        DROP TABLE gdpr.fines_by_article;
+    END IF;
+END
+$$;
+
+-- Totals by cited article
+CREATE TABLE IF NOT EXISTS gdpr.fines_by_article (
+    law VARCHAR(20) NOT NULL,
+    article SMALLINT NOT NULL,
+    fine_count INTEGER NOT NULL,
+    total_amount NUMERIC(24, 2) NOT NULL,
+    max_amount NUMERIC(20, 2) NOT NULL,
+    PRIMARY KEY (law, article)
+);
+
+-- Totals by sector
+CREATE TABLE IF NOT EXISTS gdpr.fines_by_sector (
+    sector VARCHAR(200) PRIMARY KEY,
+    fine_count INTEGER NOT NULL,
+    total_amount NUMERIC(24, 2) NOT NULL,
+    max_amount NUMERIC(20, 2) NOT NULL
+);
+
+-- Rollup keys changed since the last refresh. The dirty tables are logged:
+-- an unlogged table is emptied by crash recovery, which would silently leave
+-- the rollups stale for every key written since the last refresh
+CREATE TABLE IF NOT EXISTS gdpr.rollup_dirty (
+    country VARCHAR(100),
+    year SMALLINT,
+    month SMALLINT,
+    sector VARCHAR(200)
+);
+ALTER TABLE gdpr.rollup_dirty DROP COLUMN IF EXISTS article_violated;
+ALTER TABLE gdpr.rollup_dirty SET LOGGED;
+
+-- Articles whose totals changed since the last refresh (filled by the
+-- gdpr.fine_articles triggers in 05-fine-articles.sql and by fine updates)
+CREATE TABLE IF NOT EXISTS gdpr.rollup_dirty_articles (
+    law VARCHAR(20),
+    article SMALLINT
+);
+ALTER TABLE gdpr.rollup_dirty_articles SET LOGGED;
+
+-- A rebuilt article rollup starts from every linked article
+DO
+$$
+BEGIN
+    IF to_regclass('gdpr.fine_articles') IS NOT NULL
+       AND NOT EXISTS (SELECT FROM gdpr.fines_by_article) THEN
+        INSERT INTO gdpr.rollup_dirty_articles
+        SELECT DISTINCT law, article FROM gdpr.fine_articles;
+    END IF;
+END
+$$;
+
+-- Record the rollup keys of inserted, updated and deleted rows
+CREATE OR REPLACE FUNCTION gdpr.mark_rollups_dirty()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO gdpr.rollup_dirty (country, year, month, sector)
+        SELECT DISTINCT country, EXTRACT(YEAR FROM date), EXTRACT(MONTH FROM date),
+               COALESCE(sector, 'Unknown')
+        FROM new_rows;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO gdpr.rollup_dirty (country, year, month, sector)
+        SELECT DISTINCT country, EXTRACT(YEAR FROM date), EXTRACT(MONTH FROM date),
+               COALESCE(sector, 'Unknown')
+        FROM old_rows;
+    END IF;
+    -- Updated amounts change the totals of the articles the fines cite;
+    -- inserted and deleted fines are covered by their gdpr.fine_articles rows
+    IF TG_OP = 'UPDATE' AND to_regclass('gdpr.fine_articles') IS NOT NULL THEN
+        INSERT INTO gdpr.rollup_dirty_articles (law, article)
+        SELECT DISTINCT fa.law, fa.article
+        FROM gdpr.fine_articles fa
+        JOIN new_rows n ON n.id = fa.fine_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER fines_rollups_insert
+AFTER INSERT ON gdpr.fines
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION gdpr.mark_rollups_dirty();
+
+CREATE OR REPLACE TRIGGER fines_rollups_update
+AFTER UPDATE ON gdpr.fines
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION gdpr.mark_rollups_dirty();
+
+CREATE OR REPLACE TRIGGER fines_rollups_delete
+AFTER DELETE ON gdpr.fines
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION gdpr.mark_rollups_dirty();
+
+-- Recompute the dirty rollup groups (or everything with full_refresh)
+-- and return the number of groups written
+CREATE OR REPLACE FUNCTION gdpr.refresh_fines_rollups(full_refresh BOOLEAN DEFAULT FALSE)
+RETURNS INTEGER AS $$
+DECLARE
+    written INTEGER := 0;
+    batch INTEGER;
+BEGIN
+    -- Writers queue behind the refresh so no dirty key is lost
+    LOCK TABLE gdpr.rollup_dirty, gdpr.rollup_dirty_articles IN EXCLUSIVE MODE;
+
+    IF full_refresh THEN
+        TRUNCATE gdpr.fines_by_country_month, gdpr.fines_by_article, gdpr.fines_by_sector;
+        INSERT INTO gdpr.rollup_dirty (country, year, month, sector)
+        SELECT DISTINCT country, EXTRACT(YEAR FROM date), EXTRACT(MONTH FROM date),
+               COALESCE(sector, 'Unknown')
+        FROM gdpr.fines;
+        IF to_regclass('gdpr.fine_articles') IS NOT NULL THEN
+            INSERT INTO gdpr.rollup_dirty_articles
+            SELECT DISTINCT law, article FROM gdpr.fine_articles;
+        END IF;
+    END IF;
+
+    DELETE FROM gdpr.fines_by_country_month r
+    USING (SELECT DISTINCT country, year, month FROM gdpr.rollup_dirty) d
+    WHERE r.country = d.country AND r.year = d.year AND r.month = d.month;
+
+    INSERT INTO gdpr.fines_by_country_month
+    SELECT f.country, d.year, d.month, COUNT(*), SUM(f.amount), MAX(f.amount)
+    FROM (SELECT DISTINCT country, year, month FROM gdpr.rollup_dirty) d
+    JOIN gdpr.fines f
+      ON f.country = d.country
+     AND f.date >= make_date(d.year, d.month, 1)
+     AND f.date < make_date(d.year, d.month, 1) + INTERVAL '1 month'
+    GROUP BY f.country, d.year, d.month;
+    GET DIAGNOSTICS batch = ROW_COUNT;
+    written := written + batch;
+
+    DELETE FROM gdpr.fines_by_article r
+    USING (SELECT DISTINCT law, article FROM gdpr.rollup_dirty_articles) d
+    WHERE r.law = d.law AND r.article = d.article;
+
+    -- A fine citing several paragraphs of one article counts once for it
+    IF to_regclass('gdpr.fine_articles') IS NOT NULL THEN
+        INSERT INTO gdpr.fines_by_article
+        SELECT fa.law, fa.article, COUNT(*), SUM(f.amount), MAX(f.amount)
+        FROM (
+            SELECT DISTINCT a.fine_id, a.law, a.article
+            FROM gdpr.fine_articles a
+            JOIN (SELECT DISTINCT law, article FROM gdpr.rollup_dirty_articles) d
+              ON a.law = d.law AND a.article = d.article
+        ) fa
+        JOIN gdpr.fines f ON f.id = fa.fine_id
+        GROUP BY fa.law, fa.article;
+        GET DIAGNOSTICS batch = ROW_COUNT;
+        written := written + batch;
+    END IF;
+
+    DELETE FROM gdpr.fines_by_sector r
+    USING (SELECT DISTINCT sector FROM gdpr.rollup_dirty) d
+    WHERE r.sector = d.sector;
+
+    INSERT INTO gdpr.fines_by_sector
+    SELECT COALESCE(f.sector, 'Unknown') AS sector_name, COUNT(*), SUM(f.amount), MAX(f.amount)
+    FROM gdpr.fines f
+    WHERE COALESCE(f.sector, 'Unknown') IN (SELECT sector FROM gdpr.rollup_dirty)
+    GROUP BY sector_name;
+    GET DIAGNOSTICS batch = ROW_COUNT;
+    written := written + batch;
+
+    TRUNCATE gdpr.rollup_dirty, gdpr.rollup_dirty_articles;
+    RETURN written;
+END;
+$$ LANGUAGE plpgsql;
+
+DO
+$$
+BEGIN
+    IF EXISTS (SELECT FROM pg_catalog.pg_roles WHERE rolname = 'app_user') THEN
+        GRANT SELECT, INSERT, DELETE, TRUNCATE
+        ON gdpr.fines_by_country_month, gdpr.fines_by_article, gdpr.fines_by_sector, gdpr.rollup_dirty,
+           gdpr.rollup_dirty_articles
+        TO app_user;
+    END IF;
+END
+$$;
@@ -0,0 +1,37 @@
+-- Change notifications for query result caches
+--
+-- Every statement that writes to a cached table sends its qualified name on
+-- the gdpr_table_changed channel when the transaction commits. src/db/cache.py
+-- listens on the channel and invalidates cached results that read the table.
+-- Tables created by later scripts get their triggers there, or when this
+-- script runs again. This script is idempotent and is also run by
+-- src/db/cache.py.
+
+CREATE OR REPLACE FUNCTION gdpr.notify_table_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('gdpr_table_changed', TG_TABLE_SCHEMA || '.' || TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO
+$$
+DECLARE
+    cached_table TEXT;
+BEGIN
+    FOREACH cached_table IN ARRAY ARRAY[
+        'fines', 'countries', 'fines_by_country_month', 'fines_by_article', 'fines_by_sector',
+        'fine_articles', 'companies', 'company_aliases', 'company_keys'
+    ]
+    LOOP
+        IF to_regclass('gdpr.' || cached_table) IS NOT NULL THEN
+            EXECUTE format(
+                'CREATE OR REPLACE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON gdpr.%I '
+                'FOR EACH STATEMENT EXECUTE FUNCTION gdpr.notify_table_change()',
+                cached_table || '_notify_change', cached_table
+            );
+        END IF;
+    END LOOP;
+END
+$$;
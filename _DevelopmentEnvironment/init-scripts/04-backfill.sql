@@ -0,0 +1,41 @@
+-- Checkpoints for parallel historical backfills
+--
+-- A backfill splits the history into date or page ranges. Each range is
+-- loaded into the run's staging table and marked done in the same
+-- transaction, so a restarted backfill only reruns the unfinished ranges.
+-- When every range is done, the staging table is merged into gdpr.fines.
+-- This script is idempotent and is also run by src/etl/backfill.py.
+
+CREATE TABLE IF NOT EXISTS gdpr.backfill_runs (
+    run_id VARCHAR(64) PRIMARY KEY,
+    range_kind VARCHAR(10) NOT NULL,
+    page_size INTEGER,
+    pages_per_range INTEGER,
+    mode VARCHAR(10) NOT NULL,
+    staging_table VARCHAR(100) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',
+    started_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE TABLE IF NOT EXISTS gdpr.backfill_ranges (
+    run_id VARCHAR(64) NOT NULL REFERENCES gdpr.backfill_runs(run_id) ON DELETE CASCADE,
+    range_num INTEGER NOT NULL,
+    range_start VARCHAR(20) NOT NULL,
+    range_end VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    rows_fetched INTEGER,
+    rows_valid INTEGER,
+    rows_loaded INTEGER,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (run_id, range_num)
+);
+
+DO
+$$
+BEGIN
+    IF EXISTS (SELECT FROM pg_catalog.pg_roles WHERE rolname = 'app_user') THEN
+        GRANT SELECT, INSERT, UPDATE, DELETE ON gdpr.backfill_runs, gdpr.backfill_ranges TO app_user;
+    END IF;
+END
+$$;
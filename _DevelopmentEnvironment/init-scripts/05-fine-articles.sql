@@ -0,0 +1,71 @@
+-- Article citations of each fine
+--
+-- gdpr.fines.article_violated is free text ("Art. 5 (1) a), f) GDPR").
+-- gdpr.fine_articles holds one row per fine and cited provision, with
+-- article ranges and sub-clauses expanded by src/etl/articles.py, so
+-- per-article questions are answered by index lookups instead of pattern
+-- matching over every fine. This script is idempotent and is also run by
+-- src/db/fine_articles.py.
+
+CREATE TABLE IF NOT EXISTS gdpr.fine_articles (
+    fine_id INTEGER NOT NULL REFERENCES gdpr.fines(id) ON DELETE CASCADE,
+    law VARCHAR(20) NOT NULL,
+    article SMALLINT NOT NULL,
+    paragraph VARCHAR(10) NOT NULL DEFAULT '',
+    point VARCHAR(10) NOT NULL DEFAULT '',
+    PRIMARY KEY (fine_id, law, article, paragraph, point)
+);
+
+-- Fines citing an article, paragraph or point; fine_id is included so
+-- counts by article can be answered from the index alone
+CREATE INDEX IF NOT EXISTS idx_fine_articles_article
+    ON gdpr.fine_articles (law, article, paragraph, point, fine_id);
+
+-- Articles whose rollup totals need recomputing (logged, see 02-rollups.sql)
+CREATE TABLE IF NOT EXISTS gdpr.rollup_dirty_articles (
+    law VARCHAR(20),
+    article SMALLINT
+);
+ALTER TABLE gdpr.rollup_dirty_articles SET LOGGED;
+
+-- Record the articles of inserted and deleted links, including links
+-- removed by deleting their fine
+CREATE OR REPLACE FUNCTION gdpr.mark_article_rollups_dirty()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO gdpr.rollup_dirty_articles (law, article)
+        SELECT DISTINCT law, article FROM new_rows;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO gdpr.rollup_dirty_articles (law, article)
+        SELECT DISTINCT law, article FROM old_rows;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER fine_articles_rollups_insert
+AFTER INSERT ON gdpr.fine_articles
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION gdpr.mark_article_rollups_dirty();
+
+CREATE OR REPLACE TRIGGER fine_articles_rollups_update
+AFTER UPDATE ON gdpr.fine_articles
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION gdpr.mark_article_rollups_dirty();
+
+CREATE OR REPLACE TRIGGER fine_articles_rollups_delete
+AFTER DELETE ON gdpr.fine_articles
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION gdpr.mark_article_rollups_dirty();
+
+DO
+$$
+BEGIN
+    IF EXISTS (SELECT FROM pg_catalog.pg_roles WHERE rolname = 'app_user') THEN
+        GRANT SELECT, INSERT, UPDATE, DELETE ON gdpr.fine_articles TO app_user;
+        GRANT INSERT ON gdpr.rollup_dirty_articles TO app_user;
+    END IF;
+END
+$$;
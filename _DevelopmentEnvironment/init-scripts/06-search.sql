@@ -0,0 +1,33 @@
+-- Full-text and fuzzy search over GDPR fines
+--
+-- search_vector is a generated column, so every insert or update made by
+-- the loaders keeps it current without extra work in Python. Violation
+-- types weigh more than summaries when ranking. Fuzzy company-name search
+-- uses a trigram index when the pg_trgm extension is available. This
+-- script is idempotent and is also run by src/db/search.py.
+
+ALTER TABLE gdpr.fines ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', COALESCE(type_of_violation, '')), 'A') ||
+        setweight(to_tsvector('english', COALESCE(summary, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_fines_search ON gdpr.fines USING GIN (search_vector);
+
+-- Keyset pagination by date, on the key search_fines() orders by (fines
+-- without a date last)
+DROP INDEX IF EXISTS gdpr.idx_fines_date_id;
+CREATE INDEX IF NOT EXISTS idx_fines_date_key_id
+    ON gdpr.fines ((COALESCE(date, '-infinity'::DATE)) DESC, id DESC);
+
+DO
+$$
+BEGIN
+    IF EXISTS (SELECT FROM pg_catalog.pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS idx_fines_company_trgm ON gdpr.fines USING GIN (company gin_trgm_ops);
+    ELSE
+        RAISE NOTICE 'pg_trgm is not available, company search falls back to ILIKE';
+    END IF;
+END
+$$;
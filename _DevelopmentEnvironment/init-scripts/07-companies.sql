@@ -0,0 +1,77 @@
+-- Resolved company entities
+--
+-- The same controller appears under many spellings ("Google LLC",
+-- "Google Ireland Limited"). src/etl/entities.py resolves each spelling to
+-- one row of gdpr.companies through its normalised name key. Each key's
+-- MinHash signature is kept in gdpr.company_keys, and its band buckets
+-- in gdpr.company_blocks. A new key is then compared only with the known
+-- keys in its buckets, never with every company. This script is
+-- idempotent and is also run by src/db/companies.py.
+
+CREATE TABLE IF NOT EXISTS gdpr.companies (
+    company_id SERIAL PRIMARY KEY,
+    canonical_name VARCHAR(200) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Normalised name keys ("google" for "Google Ireland Limited")
+CREATE TABLE IF NOT EXISTS gdpr.company_keys (
+    key_id SERIAL PRIMARY KEY,
+    name_key VARCHAR(200) NOT NULL UNIQUE,
+    company_id INTEGER NOT NULL REFERENCES gdpr.companies(company_id) ON DELETE CASCADE,
+    signature BYTEA NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_company_keys_company ON gdpr.company_keys (company_id);
+
+-- Spellings seen in the data
+CREATE TABLE IF NOT EXISTS gdpr.company_aliases (
+    alias VARCHAR(200) PRIMARY KEY,
+    name_key VARCHAR(200) NOT NULL,
+    company_id INTEGER NOT NULL REFERENCES gdpr.companies(company_id) ON DELETE CASCADE,
+    similarity REAL NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_company_aliases_company ON gdpr.company_aliases (company_id);
+
+-- Locality-sensitive hashing index: one row per name key and signature band
+CREATE TABLE IF NOT EXISTS gdpr.company_blocks (
+    band SMALLINT NOT NULL,
+    bucket BIGINT NOT NULL,
+    key_id INTEGER NOT NULL REFERENCES gdpr.company_keys(key_id) ON DELETE CASCADE,
+    PRIMARY KEY (band, bucket, key_id)
+);
+
+ALTER TABLE gdpr.fines ADD COLUMN IF NOT EXISTS company_id INTEGER;
+CREATE INDEX IF NOT EXISTS idx_fines_company_id ON gdpr.fines (company_id);
+
+-- Query cache change notifications (see 03-change-notify.sql)
+DO
+$$
+DECLARE
+    cached_table TEXT;
+BEGIN
+    IF to_regprocedure('gdpr.notify_table_change()') IS NOT NULL THEN
+        FOREACH cached_table IN ARRAY ARRAY['companies', 'company_aliases', 'company_keys']
+        LOOP
+            EXECUTE format(
+                'CREATE OR REPLACE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON gdpr.%I '
+                'FOR EACH STATEMENT EXECUTE FUNCTION gdpr.notify_table_change()',
+                cached_table || '_notify_change', cached_table
+            );
+        END LOOP;
+    END IF;
+END
+$$;
+
+DO
+$$
+BEGIN
+    IF EXISTS (SELECT FROM pg_catalog.pg_roles WHERE rolname = 'app_user') THEN
+        GRANT SELECT, INSERT, UPDATE, DELETE
+            ON gdpr.companies, gdpr.company_keys, gdpr.company_aliases, gdpr.company_blocks TO app_user;
+        GRANT USAGE, SELECT ON SEQUENCE gdpr.companies_company_id_seq, gdpr.company_keys_key_id_seq TO app_user;
+    END IF;
+END
+$$;
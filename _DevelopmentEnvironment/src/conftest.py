@@ -0,0 +1,113 @@
+"""
+Shared pytest fixtures.
+
+Tests live next to the modules they cover (db/test_*.py, etl/test_*.py).
+Database tests run against a scratch database, TEST_DB_NAME (default
+gdpr_fines_test), created with the init scripts on the server configured
+by the DB_* variables, and are skipped when that server can't be reached.
+"""
+
+import glob
+import os
+
+import pytest
+
+INIT_SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'init-scripts')
+
+# Scratch database created for the test session
+TEST_DATABASE = os.getenv('TEST_DB_NAME', 'gdpr_fines_test')
+
+# Reference tables kept between tests
+KEEP_TABLES = ('countries',)
+
+
+def _connect(**overrides):
+    import psycopg2
+    from db import config
+
+    params = dict(config.DB_CONFIG, connect_timeout=3)
+    params.update(overrides)
+    return psycopg2.connect(**params)
+
+
+def _reset_connections():
+    """Forget the settings, pool and query cache so the next use reads DB_NAME again."""
+    from db import cache, config, pool
+
+    cache.stop_listener()
+    cache._cache = None
+    cache._view_tables = None
+    pool.dispose_engine()
+    config.reset()
+
+
+@pytest.fixture(scope='session')
+def database():
+    """Create the scratch database, point db.config at it and drop it after the session."""
+    import psycopg2
+
+    try:
+        admin = _connect(database='postgres')
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL unavailable: {e}")
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f"DROP DATABASE IF EXISTS {TEST_DATABASE} WITH (FORCE)")
+        cur.execute(f"CREATE DATABASE {TEST_DATABASE}")
+
+    conn = _connect(database=TEST_DATABASE)
+    with conn, conn.cursor() as cur:
+        for path in sorted(glob.glob(os.path.join(INIT_SCRIPTS_DIR, '*.sql'))):
+            with open(path, 'r', encoding='utf-8') as f:
+                cur.execute(f.read())
+    conn.close()
+
+    previous = os.environ.get('DB_NAME')
+    os.environ['DB_NAME'] = TEST_DATABASE
+    _reset_connections()
+    try:
+        yield TEST_DATABASE
+    finally:
+        _reset_connections()
+        if previous is None:
+            os.environ.pop('DB_NAME', None)
+        else:
+            os.environ['DB_NAME'] = previous
+        with admin.cursor() as cur:
+            cur.execute(f"DROP DATABASE IF EXISTS {TEST_DATABASE} WITH (FORCE)")
+        admin.close()
+
+
+@pytest.fixture
+def db_conn(database):
+    """Empty every gdpr table except the reference tables and yield a direct connection."""
+    conn = _connect()
+    with conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT quote_ident(schemaname) || '.' || quote_ident(tablename) FROM pg_tables "
+            "WHERE schemaname = 'gdpr' AND NOT tablename = ANY(%s)",
+            (list(KEEP_TABLES),)
+        )
+        tables = [row[0] for row in cur.fetchall()]
+        if tables:
+            cur.execute(f"TRUNCATE {', '.join(tables)} RESTART IDENTITY CASCADE")
+    from db import cache
+    if cache._cache is not None:
+        cache._cache.clear()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def load_fines(db_conn):
+    """Return a function running records through a collector's validate, transform, resolve and load stages."""
+    from etl.gdpr_fines_collector import GDPRFinesCollector
+
+    def load(records, **kwargs):
+        collector = GDPRFinesCollector(**kwargs)
+        df = collector.transform_data(collector.validate_data(records))
+        return collector.load_data(collector.resolve_companies(df))
+
+    return load
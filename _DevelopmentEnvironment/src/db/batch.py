@@ -0,0 +1,183 @@
+"""
+Batched statement execution.
+
+A list of {'query', 'params'} statements is split into runs of consecutive
+statements with the same SQL text. Each run is sent in pages: single-row
+INSERT ... VALUES statements are folded into multi-row inserts with
+execute_values, and everything else is joined into multi-statement
+round trips with execute_batch. Every run executes under a savepoint, so
+a failed run can be retried, or replayed one statement at a time to find
+and skip the bad statements, without losing the rest of the transaction.
+"""
+
+import logging
+import re
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Sequence
+
+from psycopg2.extras import execute_batch, execute_values
+
+from db import config
+from db.pool import connection
+
+logger = logging.getLogger(__name__)
+
+# What to do with a statement that fails
+ON_ERROR = ('abort', 'skip')
+
+# Single-row INSERT ... VALUES (...) [ON CONFLICT ...], without RETURNING
+_INSERT_VALUES = re.compile(
+    r'^(?P<head>\s*INSERT\s+INTO\s+.+?\bVALUES\s*)(?P<row>\((?:[^()]|\([^()]*\))*\))(?P<tail>(?:(?!\bRETURNING\b).)*)$',
+    re.IGNORECASE | re.DOTALL
+)
+
+
+class StatementResult:
+    """Outcome of one statement in a batched transaction."""
+
+    __slots__ = ('index', 'status', 'rowcount', 'rows', 'error')
+
+    def __init__(self, index: int):
+        self.index = index
+        self.status = 'pending'
+        self.rowcount: Optional[int] = None
+        self.rows: Optional[List[tuple]] = None
+        self.error: Optional[str] = None
+
+    def __repr__(self) -> str:
+        detail = self.error if self.error else f"rowcount={self.rowcount}"
+        return f"StatementResult({self.index}, {self.status}, {detail})"
+
+
+class TransactionResult:
+    """Outcome of a batched transaction; truthy when it committed."""
+
+    def __init__(self, statements: List[StatementResult], committed: bool):
+        self.statements = statements
+        self.committed = committed
+
+    def __bool__(self) -> bool:
+        return self.committed
+
+    @property
+    def errors(self) -> List[StatementResult]:
+        return [result for result in self.statements if result.error]
+
+    def __repr__(self) -> str:
+        return f"TransactionResult(committed={self.committed}, statements={len(self.statements)}, errors={len(self.errors)})"
+
+
+def _run(cur, query: str, params_list: Sequence[Any], page_size: int):
+    """Send a run of statements sharing one SQL text, page_size statements per round trip."""
+    match = _INSERT_VALUES.match(query)
+    if match and all(params is not None for params in params_list):
+        sql = f"{match.group('head')}%s{match.group('tail')}"
+        execute_values(cur, sql, params_list, template=match.group('row'), page_size=page_size)
+    else:
+        execute_batch(cur, query, params_list, page_size=page_size)
+
+
+def _execute_one(cur, query: str, params: Any, result: StatementResult):
+    cur.execute(query, params)
+    result.rowcount = cur.rowcount
+    if cur.description:
+        result.rows = cur.fetchall()
+    result.status = 'ok'
+
+
+def run_batched(queries: List[Dict[str, Any]], page_size: Optional[int] = None,
+                on_error: str = 'abort', retries: int = 0) -> TransactionResult:
+    """
+    Execute statements in one transaction, batching runs that share SQL text.
+
+    Runs of one statement are executed directly so their rowcount and any
+    returned rows are reported. Longer runs are batched, and their
+    statements are reported as 'ok' without individual rowcounts.
+
+    Args:
+        queries: List of dictionaries with 'query' and 'params' keys, in order
+        page_size: Statements (or rows) sent per round trip (defaults to DB_BATCH_PAGE_SIZE)
+        on_error: 'abort' rolls back everything at the first failing statement;
+            'skip' rolls back only the failing statements and commits the rest
+        retries: Times to retry a failed run from its savepoint before
+            handling it as an error (e.g. for deadlocks or lock timeouts)
+
+    Returns:
+        TransactionResult with a StatementResult per statement, in order
+    """
+    if on_error not in ON_ERROR:
+        raise ValueError(f"Unknown on_error '{on_error}', expected one of {ON_ERROR}")
+    page_size = page_size or config.BATCH_CONFIG['page_size']
+    results = [StatementResult(index) for index in range(len(queries))]
+
+    indexed = list(enumerate(queries))
+    runs = [list(run) for _, run in groupby(indexed, key=lambda item: item[1]['query'])]
+
+    with connection() as conn:
+        try:
+            with conn.cursor() as cur:
+                for run_num, run in enumerate(runs):
+                    query = run[0][1]['query']
+                    savepoint = f"batch_{run_num}"
+                    cur.execute(f"SAVEPOINT {savepoint}")
+
+                    for attempt in range(retries + 1):
+                        try:
+                            if len(run) == 1:
+                                index, item = run[0]
+                                _execute_one(cur, query, item.get('params'), results[index])
+                            else:
+                                _run(cur, query, [item.get('params') for _, item in run], page_size)
+                                for index, _ in run:
+                                    results[index].status = 'ok'
+                            error = None
+                            break
+                        except Exception as e:
+                            error = e
+                            cur.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                            if attempt < retries:
+                                logger.warning(f"Batch {run_num} failed ({e}), retrying")
+
+                    if error is None:
+                        cur.execute(f"RELEASE SAVEPOINT {savepoint}")
+                        continue
+
+                    # Replay the run one statement at a time to find the failing statements
+                    if len(run) == 1:
+                        index = run[0][0]
+                        results[index].status = 'failed'
+                        results[index].error = str(error).strip()
+                        logger.error(f"Statement {index} failed: {results[index].error}")
+                        if on_error == 'abort':
+                            raise error
+                        cur.execute(f"RELEASE SAVEPOINT {savepoint}")
+                        continue
+                    for index, item in run:
+                        cur.execute(f"SAVEPOINT {savepoint}_row")
+                        try:
+                            _execute_one(cur, query, item.get('params'), results[index])
+                            cur.execute(f"RELEASE SAVEPOINT {savepoint}_row")
+                        except Exception as e:
+                            cur.execute(f"ROLLBACK TO SAVEPOINT {savepoint}_row")
+                            results[index].status = 'failed'
+                            results[index].error = str(e).strip()
+                            logger.error(f"Statement {index} failed: {results[index].error}")
+                            if on_error == 'abort':
+                                raise
+                    cur.execute(f"RELEASE SAVEPOINT {savepoint}")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            for result in results:
+                if result.status == 'ok':
+                    result.status = 'rolled_back'
+                elif result.status == 'pending':
+                    result.status = 'not_run'
+            if not any(result.error for result in results):
+                logger.error(f"Error executing transaction: {e}")
+            return TransactionResult(results, committed=False)
+
+    for result in results:
+        if result.status == 'failed':
+            result.status = 'skipped'
+    return TransactionResult(results, committed=True)
@@ -0,0 +1,480 @@
+"""
+Query result cache.
+
+Results of read queries are cached in memory, keyed on whitespace-
+normalised SQL plus parameters and the requested result format, within a
+byte budget with least-recently-used eviction. Each entry remembers the
+version of every table its query reads. Writers bump a table's version,
+either in-process through bump_table_version() or from any process via
+the gdpr_table_changed NOTIFY channel (init-scripts/03-change-notify.sql),
+so stale entries are never served. The relations a query reads are
+resolved against the catalog, views to the tables they read, and queries
+reading anything that isn't a known table or view (a set-returning
+function, a system catalog, a name the parser misread) are not cached.
+"""
+
+import logging
+import os
+import re
+import select
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+import psycopg2
+
+from db import config
+from db.pool import transaction
+
+logger = logging.getLogger(__name__)
+
+# Channel written by gdpr.notify_table_change()
+NOTIFY_CHANNEL = 'gdpr_table_changed'
+
+# DDL for the change notification triggers
+NOTIFY_SQL_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'init-scripts', '03-change-notify.sql'
+)
+
+# Default for settings that are read from CACHE_CONFIG when not given
+_FROM_CONFIG = object()
+
+# A possibly schema-qualified, possibly quoted relation name
+_RELATION = r'(?:"?\w+"?\.)?"?\w+"?'
+
+# Relations referenced after FROM or JOIN, and after the commas of a FROM list
+_TABLE_PATTERN = re.compile(rf'\b(?:from|join)\s+(?:only\s+)?({_RELATION})', re.IGNORECASE)
+_LIST_PATTERN = re.compile(rf'(?:\s+(?:as\s+)?"?\w+"?)?\s*,\s*({_RELATION})', re.IGNORECASE)
+
+# FROM keywords that don't introduce a relation
+_NOT_A_RELATION = re.compile(r'\bextract\s*\(\s*\w+\s+from\b|\bis\s+(?:not\s+)?distinct\s+from\b', re.IGNORECASE)
+
+# Names of common table expressions, which are not relations
+_CTE_PATTERN = re.compile(
+    r'(?:\bwith(?:\s+recursive)?|,)\s*"?(\w+)"?\s+as\s+(?:not\s+)?(?:materialized\s+)?\(', re.IGNORECASE
+)
+
+# User tables and views, which writes and change notifications cover
+_RELATIONS_SQL = """
+    SELECT n.nspname || '.' || c.relname, c.relkind
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.relkind IN ('r', 'p', 'v')
+      AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+      AND n.nspname NOT LIKE 'pg\\_%'
+"""
+
+# Relations each view reads directly, from the rewrite rules' dependencies
+_VIEW_DEPENDENCIES_SQL = """
+    SELECT DISTINCT vn.nspname || '.' || v.relname, tn.nspname || '.' || t.relname
+    FROM pg_depend d
+    JOIN pg_rewrite r ON r.oid = d.objid
+    JOIN pg_class v ON v.oid = r.ev_class
+    JOIN pg_namespace vn ON vn.oid = v.relnamespace
+    JOIN pg_class t ON t.oid = d.refobjid
+    JOIN pg_namespace tn ON tn.oid = t.relnamespace
+    WHERE d.classid = 'pg_rewrite'::regclass
+      AND d.refclassid = 'pg_class'::regclass
+      AND v.relkind = 'v'
+      AND t.oid <> v.oid
+"""
+
+_versions: Dict[str, int] = {}
+_versions_lock = threading.Lock()
+
+# Base tables of each known relation (a table maps to itself), loaded from
+# the catalog on first use
+_view_tables: Optional[Dict[str, Tuple[str, ...]]] = None
+
+
+def _table_name(name: str) -> str:
+    """Qualify a table name with the default gdpr schema."""
+    name = name.replace('"', '').lower()
+    return name if '.' in name else f'gdpr.{name}'
+
+
+def bump_table_version(table: str):
+    """
+    Mark a table as changed, invalidating cached results that read it.
+
+    Args:
+        table: Table name, optionally schema-qualified (defaults to gdpr)
+    """
+    table = _table_name(table)
+    with _versions_lock:
+        _versions[table] = _versions.get(table, 0) + 1
+
+
+def table_versions(tables) -> Tuple[Tuple[str, int], ...]:
+    """Current versions of the given tables."""
+    with _versions_lock:
+        return tuple((table, _versions.get(table, 0)) for table in tables)
+
+
+def normalize_sql(query: str) -> str:
+    """Collapse whitespace so formatting differences share a cache key."""
+    return ' '.join(query.split()).rstrip(';')
+
+
+def referenced_tables(query: str) -> Tuple[str, ...]:
+    """
+    Relations a query reads, from its FROM lists and JOIN clauses.
+
+    The scan is textual: names it returns may be functions or columns
+    (e.g. the operand of SUBSTRING(... FROM ...)), so check them with
+    base_tables() before relying on them.
+
+    Args:
+        query: SQL query
+
+    Returns:
+        Sorted qualified names, excluding the query's own CTEs
+    """
+    query = _NOT_A_RELATION.sub(' ', query)
+    ctes = {name.lower() for name in _CTE_PATTERN.findall(query)}
+    names = set()
+    for match in _TABLE_PATTERN.finditer(query):
+        names.add(match.group(1))
+        end = match.end()
+        while True:
+            item = _LIST_PATTERN.match(query, end)
+            if not item:
+                break
+            names.add(item.group(1))
+            end = item.end()
+    return tuple(sorted({_table_name(name) for name in names if name.replace('"', '').lower() not in ctes}))
+
+
+def load_view_dependencies() -> Dict[str, Tuple[str, ...]]:
+    """
+    Read the user tables and views, and the base tables of every view, from the catalog.
+
+    Views of views are followed down to tables. The result is kept for
+    base_tables(); call again after creating tables or views.
+
+    Returns:
+        Mapping of qualified relation name to the qualified tables it
+        reads; a table maps to itself
+    """
+    global _view_tables
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute(_RELATIONS_SQL)
+            relations = cur.fetchall()
+            cur.execute(_VIEW_DEPENDENCIES_SQL)
+            rows = cur.fetchall()
+
+    tables = {name for name, kind in relations if kind != 'v'}
+    direct: Dict[str, set] = {name: set() for name, kind in relations if kind == 'v'}
+    for view, relation in rows:
+        if view in direct:
+            direct[view].add(relation)
+
+    def expand(view, seen):
+        found = set()
+        for relation in direct[view]:
+            if relation in direct and relation not in seen:
+                found |= expand(relation, seen | {relation})
+            elif relation not in direct:
+                found.add(relation)
+        return found
+
+    resolved = {table: (table,) for table in tables}
+    for view in direct:
+        found = expand(view, {view})
+        # A view over a materialized view, sequence or system catalog can't be versioned
+        if found <= tables:
+            resolved[view] = tuple(sorted(found))
+    _view_tables = resolved
+    return _view_tables
+
+
+def base_tables(tables: Iterable[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Resolve relation names to the tables they read, checked against the catalog.
+
+    Writes only fire change notifications on tables, so a cached view
+    query has to be versioned on the view's base tables. A name that is
+    not a known table or view can't be versioned at all.
+
+    Args:
+        tables: Qualified relation names, e.g. from referenced_tables()
+
+    Returns:
+        Sorted qualified table names, or None when a name is not a known
+        table or view or the catalog can't be read
+    """
+    relations = _view_tables
+    if relations is None:
+        try:
+            relations = load_view_dependencies()
+        except Exception as e:
+            logger.warning(f"Could not read the catalog, not caching: {e}")
+            return None
+    resolved = set()
+    for table in tables:
+        if table not in relations:
+            logger.debug(f"Not caching a query reading {table}, which is not a known table or view")
+            return None
+        resolved.update(relations[table])
+    return tuple(sorted(resolved))
+
+
+def _freeze(value: Any) -> Hashable:
+    """Turn query parameters into a hashable cache key component."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def result_size(result: Any) -> int:
+    """
+    Estimate the memory held by a query result.
+
+    Args:
+        result: List of dicts, DataFrame or Arrow table
+
+    Returns:
+        Approximate size in bytes
+    """
+    nbytes = getattr(result, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if hasattr(result, 'memory_usage'):
+        return int(result.memory_usage(deep=True).sum())
+    size = sys.getsizeof(result)
+    for row in result:
+        size += sys.getsizeof(row)
+        for value in row.values():
+            size += sys.getsizeof(value)
+    return size
+
+
+class CacheEntry:
+    """A cached result with the table versions it was computed from."""
+
+    __slots__ = ('result', 'versions', 'size', 'created_at')
+
+    def __init__(self, result: Any, versions: Tuple[Tuple[str, int], ...], size: int):
+        self.result = result
+        self.versions = versions
+        self.size = size
+        self.created_at = time.monotonic()
+
+
+class QueryCache:
+    """Thread-safe LRU cache of query results with a memory budget."""
+
+    def __init__(self, max_bytes: Optional[int] = None, ttl: Any = _FROM_CONFIG):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Memory budget for cached results (QUERY_CACHE_MAX_BYTES
+                by default)
+            ttl: Seconds an entry may be served (None for no limit), a
+                backstop when change notifications are unavailable
+                (QUERY_CACHE_TTL by default)
+        """
+        self.max_bytes = config.CACHE_CONFIG['max_bytes'] if max_bytes is None else max_bytes
+        self.ttl = config.CACHE_CONFIG['ttl'] if ttl is _FROM_CONFIG else ttl
+        self._entries: 'OrderedDict[Hashable, CacheEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(query: str, params: Any = None, result_format: str = 'dicts') -> Hashable:
+        """Cache key for a query, its parameters and the result format."""
+        return normalize_sql(query), _freeze(params), result_format
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return a cached result if it is still current.
+
+        Args:
+            key: Key from QueryCache.key()
+
+        Returns:
+            The cached result, or None on a miss or stale entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expired = self.ttl is not None and time.monotonic() - entry.created_at > self.ttl
+                tables = [table for table, _ in entry.versions]
+                if expired or table_versions(tables) != entry.versions:
+                    self._remove(key)
+                    self.invalidations += 1
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.result
+
+    def put(self, key: Hashable, result: Any, versions: Tuple[Tuple[str, int], ...]):
+        """
+        Store a result computed against the given table versions.
+
+        Results larger than the whole budget are not cached.
+
+        Args:
+            key: Key from QueryCache.key()
+            result: Query result
+            versions: Table versions read before the query ran
+        """
+        size = result_size(result)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(result, versions, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+
+    def clear(self):
+        """Drop every cached result."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit, miss, eviction and size counters."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+class ChangeListener(threading.Thread):
+    """Background LISTEN on the change channel that bumps table versions."""
+
+    def __init__(self, poll_interval: float = 1.0):
+        super().__init__(name='query-cache-listener', daemon=True)
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+        self.ready = threading.Event()
+        self.error: Optional[Exception] = None
+
+    def run(self):
+        # LISTEN holds its connection for the life of the thread, so it gets
+        # a dedicated one instead of a pooled connection
+        try:
+            conn = psycopg2.connect(**config.DB_CONFIG)
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        except Exception as e:
+            self.error = e
+            self.ready.set()
+            logger.warning(f"Query cache change listener unavailable, relying on TTL: {e}")
+            return
+        self.ready.set()
+
+        try:
+            while not self._stop_event.is_set():
+                if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                    continue
+                conn.poll()
+                changed = {notify.payload for notify in conn.notifies}
+                conn.notifies.clear()
+                for table in changed:
+                    bump_table_version(table)
+                if changed:
+                    logger.debug(f"Tables changed: {sorted(changed)}")
+        except Exception as e:
+            self.error = e
+            logger.warning(f"Query cache change listener stopped: {e}")
+        finally:
+            conn.close()
+
+    def stop(self):
+        """Stop listening and close the connection."""
+        self._stop_event.set()
+
+
+_cache: Optional[QueryCache] = None
+_listener: Optional[ChangeListener] = None
+_setup_lock = threading.Lock()
+
+
+def ensure_change_notifications():
+    """Create the change notification triggers if missing (idempotent)."""
+    with open(NOTIFY_SQL_FILE, 'r', encoding='utf-8') as f:
+        ddl = f.read()
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute(ddl)
+
+
+def get_cache() -> QueryCache:
+    """
+    Return the shared query cache, creating it on first use.
+
+    When QUERY_CACHE_LISTEN is enabled, the first call also starts the
+    change listener so writes from other processes invalidate entries.
+    The first call also reads the tables and views, and which tables each
+    view depends on, from the catalog.
+
+    Returns:
+        The shared cache
+    """
+    global _cache, _listener
+    if _cache is None:
+        with _setup_lock:
+            if _cache is None:
+                if config.CACHE_CONFIG['listen']:
+                    _listener = ChangeListener()
+                    _listener.start()
+                    _listener.ready.wait(timeout=5)
+                try:
+                    load_view_dependencies()
+                except Exception as e:
+                    logger.warning(f"Could not read the catalog, not caching queries yet: {e}")
+                _cache = QueryCache()
+    return _cache
+
+
+def stop_listener():
+    """Stop the change listener, if running."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener.join(timeout=5)
+            _listener = None
+
+
+def cache_stats() -> Dict[str, Any]:
+    """
+    Return statistics for the shared query cache.
+
+    Returns:
+        Dictionary of cache counters, plus whether the change listener is running
+    """
+    stats = get_cache().stats() if _cache is not None else {}
+    stats['listening'] = _listener is not None and _listener.is_alive()
+    return stats
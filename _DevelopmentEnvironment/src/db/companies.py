@@ -0,0 +1,90 @@
+"""
+Resolved company entities.
+
+gdpr.companies, created by init-scripts/07-companies.sql and filled by
+etl.entities, groups the spellings of each controller under one
+company_id, which gdpr.fines carries. company_totals() answers
+per-controller questions for any spelling through the alias and
+company_id indexes.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from db.init_db import execute_query
+from db.pool import transaction
+
+logger = logging.getLogger(__name__)
+
+# DDL for the company, alias and blocking tables
+COMPANIES_SQL_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'init-scripts', '07-companies.sql'
+)
+
+_companies_ready = False
+_companies_lock = threading.Lock()
+
+
+def ensure_companies(force: bool = False) -> bool:
+    """
+    Create the company tables and the fines company_id column if missing.
+
+    Runs 07-companies.sql once per process; the script is idempotent.
+
+    Args:
+        force: Run the script even if it already ran in this process
+
+    Returns:
+        True if the tables did not exist before, so stored fines still
+        need resolving (see etl.entities.resolve_unassigned)
+    """
+    global _companies_ready
+    with _companies_lock:
+        if _companies_ready and not force:
+            return False
+        with open(COMPANIES_SQL_FILE, 'r', encoding='utf-8') as f:
+            ddl = f.read()
+        with transaction() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass('gdpr.companies') IS NULL")
+                created = cur.fetchone()[0]
+                cur.execute(ddl)
+        _companies_ready = True
+        logger.info("Company entities are in place")
+        return created
+
+
+def company_totals(name: Optional[str] = None, limit: Optional[int] = 20,
+                   cache: bool = False) -> List[Dict[str, Any]]:
+    """
+    Total the fines of resolved companies.
+
+    Args:
+        name: Any known spelling of a company; all companies when None
+        limit: Maximum number of companies to return, largest totals first
+        cache: Serve repeated requests from the query result cache
+
+    Returns:
+        List of dictionaries with company_id, canonical_name, alias_count,
+        fine_count, total_amount and max_amount
+    """
+    params: Dict[str, Any] = {'name': name, 'limit': limit}
+    companies = "SELECT company_id FROM gdpr.companies"
+    if name is not None:
+        companies = "SELECT company_id FROM gdpr.company_aliases WHERE alias = %(name)s"
+
+    query = (
+        "SELECT c.company_id, c.canonical_name, "
+        "(SELECT COUNT(*) FROM gdpr.company_aliases a WHERE a.company_id = c.company_id) AS alias_count, "
+        "COUNT(f.id) AS fine_count, SUM(f.amount) AS total_amount, MAX(f.amount) AS max_amount "
+        f"FROM gdpr.companies c JOIN gdpr.fines f ON f.company_id = c.company_id "
+        f"WHERE c.company_id IN ({companies}) "
+        "GROUP BY c.company_id, c.canonical_name ORDER BY total_amount DESC NULLS LAST"
+    )
+    if limit is not None:
+        query += " LIMIT %(limit)s"
+
+    return execute_query(query, params, cache=cache)
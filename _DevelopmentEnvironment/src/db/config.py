@@ -0,0 +1,122 @@
+"""
+Database configuration.
+
+This module reads the database connection, pool, batching, streaming and
+query cache settings from the environment so they can be shared by the
+database helpers and the ETL. Nothing happens at import time: the .env
+file is loaded and the settings are resolved on first access, so entry
+points that never reach the database don't pay for it.
+
+The settings are read as module attributes (config.DB_CONFIG,
+config.POOL_CONFIG, config.DB_URL, ...).
+"""
+
+import os
+import threading
+from typing import Any, Dict, Optional
+
+_settings: Optional[Dict[str, Any]] = None
+_db_url = None
+_settings_lock = threading.Lock()
+_env_loaded = False
+
+
+def load_environment():
+    """Load the .env file into os.environ, once per process; existing variables win."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def _read_settings() -> Dict[str, Any]:
+    """Read every setting from the environment."""
+    load_environment()
+    return {
+        # Database connection parameters
+        'DB_CONFIG': {
+            'host': os.getenv('DB_HOST', 'localhost'),
+            'port': os.getenv('DB_PORT', '5432'),
+            'database': os.getenv('DB_NAME', 'gdpr_fines'),
+            'user': os.getenv('DB_USER', 'andi_user'),
+            'password': os.getenv('DB_PASSWORD', 'andi_password')
+        },
+        # Connection pool parameters
+        'POOL_CONFIG': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+            'recycle': int(os.getenv('DB_POOL_RECYCLE', '1800'))
+        },
+        # Server-side cursor and export parameters
+        'STREAM_CONFIG': {
+            'itersize': int(os.getenv('DB_STREAM_ITERSIZE', '2000')),
+            'block_size': int(os.getenv('DB_STREAM_BLOCK_SIZE', str(8 * 1024 * 1024)))
+        },
+        # Batched transaction parameters
+        'BATCH_CONFIG': {
+            'page_size': int(os.getenv('DB_BATCH_PAGE_SIZE', '100'))
+        },
+        # Query result cache parameters
+        'CACHE_CONFIG': {
+            'max_bytes': int(os.getenv('QUERY_CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+            'ttl': float(os.getenv('QUERY_CACHE_TTL', '300')),
+            'listen': os.getenv('QUERY_CACHE_LISTEN', 'true').lower() in ('1', 'true', 'yes')
+        },
+    }
+
+
+def settings() -> Dict[str, Any]:
+    """
+    Return the settings, reading them on first use.
+
+    Returns:
+        Dictionary of DB_CONFIG, POOL_CONFIG, STREAM_CONFIG, BATCH_CONFIG
+        and CACHE_CONFIG
+    """
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = _read_settings()
+    return _settings
+
+
+def db_url():
+    """
+    Return the SQLAlchemy URL for the psycopg2 driver.
+
+    Returns:
+        sqlalchemy.engine.URL built from DB_CONFIG
+    """
+    global _db_url
+    if _db_url is None:
+        from sqlalchemy.engine import URL
+        db_config = settings()['DB_CONFIG']
+        _db_url = URL.create(
+            'postgresql+psycopg2',
+            username=db_config['user'],
+            password=db_config['password'],
+            host=db_config['host'],
+            port=int(db_config['port']),
+            database=db_config['database']
+        )
+    return _db_url
+
+
+def reset():
+    """Forget the resolved settings so the next access reads the environment again."""
+    global _settings, _db_url
+    with _settings_lock:
+        _settings = None
+        _db_url = None
+
+
+def __getattr__(name: str) -> Any:
+    if name == 'DB_URL':
+        return db_url()
+    values = settings()
+    if name in values:
+        return values[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,156 @@
+"""
+Per-article fine statistics.
+
+gdpr.fine_articles, created by init-scripts/05-fine-articles.sql and filled
+by etl.articles, links each fine to every law, article, paragraph and
+point it cites. article_stats() and fines_citing() answer per-article
+questions through the (law, article, paragraph, point, fine_id) index
+instead of matching the free-text article_violated column.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from db.init_db import execute_query
+from db.pool import transaction
+
+logger = logging.getLogger(__name__)
+
+# DDL for the article link table
+FINE_ARTICLES_SQL_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'init-scripts', '05-fine-articles.sql'
+)
+
+# Sort keys accepted by article_stats
+ORDER_KEYS = ('fine_count', 'total_amount', 'max_amount', 'avg_amount', 'article')
+
+_fine_articles_ready = False
+_fine_articles_lock = threading.Lock()
+
+
+def ensure_fine_articles(force: bool = False) -> bool:
+    """
+    Create the article link table if missing.
+
+    Runs 05-fine-articles.sql once per process; the script is idempotent.
+
+    Args:
+        force: Run the script even if it already ran in this process
+
+    Returns:
+        True if the table did not exist before, so existing fines still
+        need to be linked (see etl.articles.rebuild_fine_articles)
+    """
+    global _fine_articles_ready
+    with _fine_articles_lock:
+        if _fine_articles_ready and not force:
+            return False
+        with open(FINE_ARTICLES_SQL_FILE, 'r', encoding='utf-8') as f:
+            ddl = f.read()
+        with transaction() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass('gdpr.fine_articles') IS NULL")
+                created = cur.fetchone()[0]
+                cur.execute(ddl)
+        _fine_articles_ready = True
+        logger.info("Fine article links are in place")
+        return created
+
+
+def article_stats(articles: Optional[Iterable[int]] = None, law: str = 'GDPR', by_paragraph: bool = False,
+                  years: Optional[Iterable[int]] = None, countries: Optional[Iterable[str]] = None,
+                  order_by: str = 'fine_count', descending: bool = True, limit: Optional[int] = None,
+                  cache: bool = False) -> List[Dict[str, Any]]:
+    """
+    Count and sum the fines citing each article.
+
+    A fine citing several points of one article is counted once for it;
+    a fine citing several articles is counted once for each.
+
+    Args:
+        articles: Only include these article numbers
+        law: Law the articles belong to (GDPR, BDSG, ...)
+        by_paragraph: Group by article and paragraph instead of article
+        years: Only include fines decided in these years
+        countries: Only include fines from these countries
+        order_by: One of ORDER_KEYS
+        descending: Sort in descending order
+        limit: Maximum number of rows to return
+        cache: Serve repeated requests from the query result cache
+
+    Returns:
+        List of dictionaries with law, article (and paragraph), fine_count,
+        total_amount, max_amount and avg_amount
+    """
+    if order_by not in ORDER_KEYS:
+        raise ValueError(f"Unknown sort key '{order_by}', expected one of {ORDER_KEYS}")
+
+    keys = "a.law, a.article" + (", a.paragraph" if by_paragraph else "")
+    params: Dict[str, Any] = {'law': law, 'limit': limit}
+    links = f"SELECT DISTINCT {keys}, a.fine_id FROM gdpr.fine_articles a WHERE a.law = %(law)s"
+    if articles is not None:
+        params['articles'] = [int(article) for article in articles]
+        links += " AND a.article = ANY(%(articles)s)"
+
+    conditions = []
+    if years is not None:
+        params['years'] = [int(year) for year in years]
+        conditions.append("EXTRACT(YEAR FROM f.date)::INTEGER = ANY(%(years)s)")
+    if countries is not None:
+        params['countries'] = list(countries)
+        conditions.append("f.country = ANY(%(countries)s)")
+
+    group = keys.replace('a.', 'l.')
+    query = (
+        f"SELECT {group}, COUNT(*) AS fine_count, SUM(f.amount) AS total_amount, "
+        f"MAX(f.amount) AS max_amount, AVG(f.amount) AS avg_amount "
+        f"FROM ({links}) l JOIN gdpr.fines f ON f.id = l.fine_id"
+    )
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" GROUP BY {group} ORDER BY {order_by} {'DESC' if descending else 'ASC'} NULLS LAST"
+    if limit is not None:
+        query += " LIMIT %(limit)s"
+
+    return execute_query(query, params, cache=cache)
+
+
+def fines_citing(article: int, paragraph: Optional[str] = None, point: Optional[str] = None,
+                 law: str = 'GDPR', limit: Optional[int] = 100, cache: bool = False) -> List[Dict[str, Any]]:
+    """
+    List the fines citing an article, paragraph or point, largest first.
+
+    Args:
+        article: Article number
+        paragraph: Only fines citing this paragraph of the article
+        point: Only fines citing this point (requires paragraph)
+        law: Law the article belongs to
+        limit: Maximum number of fines to return
+        cache: Serve repeated requests from the query result cache
+
+    Returns:
+        List of fine dictionaries
+    """
+    if point is not None and paragraph is None:
+        raise ValueError("A point can only be given together with its paragraph")
+
+    params: Dict[str, Any] = {'law': law, 'article': int(article), 'limit': limit}
+    links = "SELECT DISTINCT a.fine_id FROM gdpr.fine_articles a WHERE a.law = %(law)s AND a.article = %(article)s"
+    if paragraph is not None:
+        params['paragraph'] = str(paragraph)
+        links += " AND a.paragraph = %(paragraph)s"
+    if point is not None:
+        params['point'] = str(point)
+        links += " AND a.point = %(point)s"
+
+    query = (
+        "SELECT f.id, f.date, f.country, f.authority, f.company, f.amount, f.article_violated, f.summary "
+        f"FROM ({links}) l JOIN gdpr.fines f ON f.id = l.fine_id ORDER BY f.amount DESC NULLS LAST"
+    )
+    if limit is not None:
+        query += " LIMIT %(limit)s"
+
+    return execute_query(query, params, cache=cache)
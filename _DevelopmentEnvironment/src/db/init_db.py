@@ -6,122 +6,212 @@ This script initializes the database connection and provides utility functions
 for working with the database.
 """
 
-import os
+import argparse
 import sys
 import logging
 from typing import Dict, List, Optional, Any
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from dotenv import load_dotenv
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
-logger = logging.getLogger(__name__)
+from db import config
+from db.pool import checkout, connection, pool_metrics
+from db.batch import TransactionResult, run_batched
+from db.cache import base_tables, get_cache, referenced_tables, table_versions
 
-# Load environment variables
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-# Database connection parameters
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'port': os.getenv('DB_PORT', '5432'),
-    'database': os.getenv('DB_NAME', 'gdpr_fines'),
-    'user': os.getenv('DB_USER', 'andi_user'),
-    'password': os.getenv('DB_PASSWORD', 'andi_password')
-}
+# Result formats supported by execute_query
+RESULT_FORMATS = ('dicts', 'dataframe', 'arrow')
 
 def get_connection():
     """
-    Create a connection to the PostgreSQL database.
+    Check a connection to the PostgreSQL database out of the shared pool.
+    
+    Closing the connection returns it to the pool.
     
     Returns:
-        psycopg2.connection: A database connection object
+        psycopg2.connection: A pooled database connection object
     """
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        logger.info(f"Successfully connected to database {DB_CONFIG['database']} on {DB_CONFIG['host']}")
+        conn = checkout()
+        logger.debug(f"Checked out connection to database {config.DB_CONFIG['database']} on {config.DB_CONFIG['host']}")
         return conn
     except Exception as e:
         logger.error(f"Error connecting to the database: {e}")
         raise
 
-def execute_query(query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+def execute_query(query: str, params: Optional[Dict[str, Any]] = None, cache: bool = False,
+                  result_format: str = 'dicts') -> Any:
     """
-    Execute a query and return the results as a list of dictionaries.
+    Execute a query and return the results.
+    
+    The whole result is held in memory; use db.streaming to iterate over
+    or export large result sets.
     
     Args:
         query: SQL query to execute
         params: Parameters for the query
+        cache: Serve repeated read queries from the shared result cache;
+            entries are invalidated when the tables they read, or the
+            tables behind the views they read, change.
+            Cached results are shared, so treat them as read-only
+        result_format: 'dicts' for a list of dictionaries, or 'dataframe' /
+            'arrow' for a column-oriented pandas DataFrame / Arrow table
+            built without a per-row dict
         
     Returns:
-        List of dictionaries representing the query results
+        Query results in the requested format
     """
-    conn = None
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(f"Unknown result format '{result_format}', expected one of {RESULT_FORMATS}")
+    
+    if cache:
+        query_cache = get_cache()
+        tables = base_tables(referenced_tables(query))
+        # Without the views' base tables a cached result could never be invalidated
+        cache = tables is not None
+    if cache:
+        key = query_cache.key(query, params, result_format)
+        result = query_cache.get(key)
+        if result is not None:
+            return result
+        # Read versions before running the query so a concurrent write invalidates the entry
+        versions = table_versions(tables)
+    
     try:
-        conn = get_connection()
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(query, params)
-            if cur.description:
-                results = cur.fetchall()
-                return [dict(row) for row in results]
-            return []
+        with connection() as conn:
+            if result_format == 'dicts':
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    cur.execute(query, params)
+                    result = [dict(row) for row in cur.fetchall()] if cur.description else []
+            else:
+                with conn.cursor() as cur:
+                    cur.execute(query, params)
+                    columns = [col.name for col in cur.description] if cur.description else []
+                    rows = cur.fetchall() if cur.description else []
+                result = _to_columnar(columns, rows, result_format)
     except Exception as e:
         logger.error(f"Error executing query: {e}")
         raise
-    finally:
-        if conn:
-            conn.close()
+    
+    if cache:
+        query_cache.put(key, result, versions)
+    return result
+
+def _to_columnar(columns: List[str], rows: List[tuple], result_format: str) -> Any:
+    """
+    Build a DataFrame or Arrow table from cursor rows, column by column.
+    
+    Args:
+        columns: Column names
+        rows: Result tuples
+        result_format: 'dataframe' or 'arrow'
+        
+    Returns:
+        pandas DataFrame or pyarrow Table
+    """
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    if result_format == 'arrow':
+        import pyarrow as pa
+        return pa.table({name: pa.array(col) for name, col in zip(columns, values)})
+    import pandas as pd
+    return pd.DataFrame({name: list(col) for name, col in zip(columns, values)}, columns=columns)
 
-def execute_transaction(queries: List[Dict[str, Any]]) -> bool:
+def execute_transaction(queries: List[Dict[str, Any]], page_size: Optional[int] = None,
+                        on_error: str = 'abort', retries: int = 0) -> TransactionResult:
     """
     Execute multiple queries in a transaction.
     
+    Consecutive queries with the same SQL text are sent together
+    (execute_values for single-row inserts, execute_batch otherwise), and
+    each group runs under a savepoint.
+    
     Args:
         queries: List of dictionaries with 'query' and 'params' keys
+        page_size: Statements sent per round trip (defaults to DB_BATCH_PAGE_SIZE)
+        on_error: 'abort' to roll back everything on the first error, or
+            'skip' to roll back only the failing statements
+        retries: Times to retry a failed group before handling the error
         
     Returns:
-        True if successful, False otherwise
+        TransactionResult, truthy if the transaction committed, with
+        per-statement status, rowcounts and errors in order
     """
-    conn = None
+    return run_batched(queries, page_size=page_size, on_error=on_error, retries=retries)
+
+def check_connection():
+    """Check if the database connection is working."""
     try:
-        conn = get_connection()
-        with conn:  # Transaction block
+        with connection() as conn:
             with conn.cursor() as cur:
-                for item in queries:
-                    cur.execute(item['query'], item.get('params', None))
+                cur.execute("SELECT 1")
+                result = cur.fetchone()
+                assert result[0] == 1
+                logger.info("Database connection check successful")
         return True
     except Exception as e:
-        logger.error(f"Error executing transaction: {e}")
+        logger.error(f"Database connection check failed: {e}")
         return False
-    finally:
-        if conn:
-            conn.close()
 
-def check_connection():
-    """Check if the database connection is working."""
+def ping(timeout: int = 5) -> bool:
+    """
+    Check that the database answers, over a direct connection.
+
+    Unlike check_connection() this does not create the shared pool (and
+    so never imports SQLAlchemy), which keeps one-shot health checks
+    fast.
+
+    Args:
+        timeout: Seconds to wait for the server to accept the connection
+
+    Returns:
+        True if the server answered SELECT 1
+    """
     try:
-        conn = get_connection()
-        with conn.cursor() as cur:
-            cur.execute("SELECT 1")
-            result = cur.fetchone()
-            assert result[0] == 1
-            logger.info("Database connection check successful")
-        conn.close()
+        conn = psycopg2.connect(**config.DB_CONFIG, connect_timeout=timeout)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                assert cur.fetchone()[0] == 1
+        finally:
+            conn.close()
         return True
     except Exception as e:
         logger.error(f"Database connection check failed: {e}")
         return False
 
-def main():
-    """Main function to test the database connection."""
-    if check_connection():
+def main(argv: Optional[List[str]] = None, prog: Optional[str] = None):
+    """
+    Main function to test the database connection.
+    
+    Exits with status 1 if the database does not answer.
+    
+    Args:
+        argv: Command line arguments (sys.argv[1:] by default)
+        prog: Program name shown in the usage message
+    """
+    parser = argparse.ArgumentParser(prog=prog, description='Check that the GDPR fines database answers')
+    parser.add_argument('--timeout', type=int, default=5, help='Seconds to wait for a connection')
+    parser.add_argument('--pool', action='store_true',
+                        help='Check through the shared connection pool and print its metrics')
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    if args.pool:
+        ok = check_connection()
+    else:
+        ok = ping(args.timeout)
+    if ok:
         print("✅ Database connection successful")
+        if args.pool:
+            print(f"Pool: {pool_metrics()}")
     else:
         print("❌ Database connection failed")
+        sys.exit(1)
         
 if __name__ == "__main__":
     main() 
\ No newline at end of file
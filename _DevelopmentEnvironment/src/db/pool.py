@@ -0,0 +1,269 @@
+"""
+Shared database connection pool.
+
+This module owns the single SQLAlchemy engine used by both the database
+helpers in init_db and the ETL collector. Connections are health-checked
+on checkout and pool usage, including the number of statements sent to
+the server, is exposed through pool_metrics().
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional
+
+import psycopg2.extensions
+
+from db import config
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_engine: Optional["Engine"] = None
+_engine_lock = threading.Lock()
+
+
+class PoolMetrics:
+    """Thread-safe counters describing connection pool usage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Reset all counters to zero."""
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+            self.waits = 0
+            self.wait_time = 0.0
+            self.timed_checkouts = 0
+            self.checkout_time = 0.0
+            self.max_checkout_time = 0.0
+            self.round_trips = 0
+
+    def record_checkout(self, latency: float, waited: bool):
+        """Record the latency of a checkout made through checkout()."""
+        with self._lock:
+            self.timed_checkouts += 1
+            self.checkout_time += latency
+            self.max_checkout_time = max(self.max_checkout_time, latency)
+            if waited:
+                self.waits += 1
+                self.wait_time += latency
+
+    def increment(self, name: str, value: int = 1):
+        """Increment a pool event counter."""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self, engine: Optional["Engine"] = None) -> Dict[str, Any]:
+        """
+        Return the current counters as a dictionary.
+
+        Args:
+            engine: Engine whose pool state should be included
+
+        Returns:
+            Dictionary of pool metrics
+        """
+        with self._lock:
+            timed = self.timed_checkouts
+            result = {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'invalidations': self.invalidations,
+                'waits': self.waits,
+                'wait_time': self.wait_time,
+                'avg_checkout_latency': self.checkout_time / timed if timed else 0.0,
+                'max_checkout_latency': self.max_checkout_time,
+                'round_trips': self.round_trips,
+            }
+        if engine is not None:
+            result['in_use'] = engine.pool.checkedout()
+            result['idle'] = engine.pool.checkedin()
+            result['min_size'] = config.POOL_CONFIG['min_size']
+            result['max_size'] = config.POOL_CONFIG['max_size']
+        return result
+
+
+metrics = PoolMetrics()
+
+_counting_cursors: Dict[type, type] = {}
+
+
+def _counting_cursor(base: type) -> type:
+    """Return a subclass of a psycopg2 cursor class that counts its statements."""
+    cursor_class = _counting_cursors.get(base)
+    if cursor_class is None:
+        class CountingCursor(base):
+            def execute(self, query, vars=None):
+                metrics.increment('round_trips')
+                return super().execute(query, vars)
+
+            def executemany(self, query, vars_list):
+                # psycopg2 sends one statement per parameter set
+                vars_list = list(vars_list)
+                metrics.increment('round_trips', len(vars_list))
+                return super().executemany(query, vars_list)
+
+            def callproc(self, procname, parameters=None):
+                metrics.increment('round_trips')
+                return super().callproc(procname, parameters)
+
+            def copy_expert(self, sql, file, size=8192):
+                metrics.increment('round_trips')
+                return super().copy_expert(sql, file, size)
+
+        CountingCursor.__name__ = f"Counting{base.__name__}"
+        cursor_class = _counting_cursors.setdefault(base, CountingCursor)
+    return cursor_class
+
+
+class _CountingConnection(psycopg2.extensions.connection):
+    """psycopg2 connection whose cursors, of any cursor_factory, count round trips."""
+
+    def cursor(self, name=None, cursor_factory=None, *args, **kwargs):
+        base = cursor_factory or self.cursor_factory or psycopg2.extensions.cursor
+        return super().cursor(name, _counting_cursor(base), *args, **kwargs)
+
+
+def _register_events(engine: "Engine"):
+    """Attach metric listeners to the engine's pool."""
+    from sqlalchemy import event
+    event.listen(engine, 'connect', lambda *args: metrics.increment('connects'))
+    event.listen(engine, 'checkout', lambda *args: metrics.increment('checkouts'))
+    event.listen(engine, 'checkin', lambda *args: metrics.increment('checkins'))
+    event.listen(engine, 'invalidate', lambda *args: metrics.increment('invalidations'))
+
+
+def _warm(engine: "Engine", size: int):
+    """Open size connections and return them to the pool, so it starts with size idle connections."""
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(engine.raw_connection())
+    except Exception as e:
+        logger.warning(f"Could only open {len(connections)} of {size} pool connections: {e}")
+    finally:
+        for conn in connections:
+            conn.close()
+
+
+def get_engine() -> "Engine":
+    """
+    Return the shared SQLAlchemy engine, creating it on first use.
+
+    The pool opens DB_POOL_MIN_SIZE connections when it is created, keeps
+    up to that many idle connections and allows up to DB_POOL_MAX_SIZE in
+    total. If the database can't be reached yet, the pool starts with
+    fewer connections and opens the rest on demand. Each checkout is pinged
+    before use so stale connections are replaced transparently. SQLAlchemy
+    is only imported here, so importing this module stays cheap.
+
+    Returns:
+        The shared engine
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from sqlalchemy import create_engine
+                pool_config = config.POOL_CONFIG
+                min_size = pool_config['min_size']
+                max_size = pool_config['max_size']
+                if max_size < min_size:
+                    raise ValueError(f"DB_POOL_MAX_SIZE ({max_size}) must be >= DB_POOL_MIN_SIZE ({min_size})")
+                engine = create_engine(
+                    config.DB_URL,
+                    pool_size=min_size,
+                    max_overflow=max_size - min_size,
+                    pool_timeout=pool_config['timeout'],
+                    pool_recycle=pool_config['recycle'],
+                    pool_pre_ping=True,
+                    connect_args={'connection_factory': _CountingConnection}
+                )
+                _register_events(engine)
+                _warm(engine, min_size)
+                logger.info(f"Created connection pool (min={min_size}, max={max_size})")
+                _engine = engine
+    return _engine
+
+
+def dispose_engine():
+    """Close all pooled connections and drop the shared engine."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+def checkout():
+    """
+    Check a DBAPI connection out of the shared pool.
+
+    Closing the returned connection gives it back to the pool.
+
+    Returns:
+        A pooled psycopg2 connection
+    """
+    engine = get_engine()
+    waited = engine.pool.checkedout() >= config.POOL_CONFIG['max_size']
+    start = time.perf_counter()
+    conn = engine.raw_connection()
+    metrics.record_checkout(time.perf_counter() - start, waited)
+    return conn
+
+
+@contextmanager
+def connection() -> Iterator[Any]:
+    """
+    Context manager yielding a pooled DBAPI connection.
+
+    Yields:
+        A pooled psycopg2 connection, returned to the pool on exit
+    """
+    conn = checkout()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+@contextmanager
+def transaction() -> Iterator[Any]:
+    """
+    Context manager yielding a pooled DBAPI connection inside a transaction.
+
+    The transaction is committed on exit and rolled back on error. Use this
+    rather than ``with conn:``, which on a pooled connection returns it to
+    the pool (rolling back) instead of committing.
+
+    Yields:
+        A pooled psycopg2 connection
+    """
+    with connection() as conn:
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def pool_metrics() -> Dict[str, Any]:
+    """
+    Return metrics for the shared connection pool.
+
+    Returns:
+        Dictionary with event counters, waits, checkout latency, statements
+        sent to the server and the number of connections currently in use
+    """
+    return metrics.snapshot(_engine)
@@ -0,0 +1,201 @@
+"""
+Aggregate rollups of GDPR fines.
+
+The rollup tables created by init-scripts/02-rollups.sql hold fine counts
+and amounts by country/year/month, by cited article (from the parsed
+citations in gdpr.fine_articles) and by sector. Triggers on
+gdpr.fines record which groups each load touches, and refresh_rollups()
+recomputes only those. aggregate_fines() answers grouped totals from the
+smallest rollup that covers the request, and only scans gdpr.fines when
+no rollup can.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from db.cache import bump_table_version
+from db.init_db import execute_query
+from db.pool import transaction
+
+logger = logging.getLogger(__name__)
+
+# DDL for the rollup tables, triggers and refresh function
+ROLLUP_SQL_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'init-scripts', '02-rollups.sql'
+)
+
+# Rollup tables and the dimensions (and filters) each can answer
+ROLLUPS = {
+    'fines_by_country_month': ('country', 'region', 'year', 'month'),
+    'fines_by_article': ('law', 'article'),
+    'fines_by_sector': ('sector',),
+}
+
+# Dimensions accepted by aggregate_fines; law and article are the parsed
+# citations, article_violated the raw citation string
+DIMENSIONS = ('country', 'region', 'year', 'month', 'law', 'article', 'article_violated', 'sector')
+
+# Sort keys accepted by aggregate_fines
+ORDER_KEYS = ('fine_count', 'total_amount', 'max_amount', 'avg_amount') + DIMENSIONS
+
+# Expressions for each dimension over gdpr.fines (alias f), gdpr.countries (alias c)
+# and the fines' distinct cited articles (alias fa)
+_BASE_EXPRESSIONS = {
+    'law': 'fa.law',
+    'article': 'fa.article',
+    'country': 'f.country',
+    'region': 'c.region',
+    'year': 'EXTRACT(YEAR FROM f.date)::SMALLINT',
+    'month': 'EXTRACT(MONTH FROM f.date)::SMALLINT',
+    'article_violated': "COALESCE(f.article_violated, 'Unknown')",
+    'sector': "COALESCE(f.sector, 'Unknown')",
+}
+
+_rollups_ready = False
+_rollups_lock = threading.Lock()
+
+
+def ensure_rollups(force: bool = False):
+    """
+    Create the rollup tables, triggers and refresh function if missing.
+
+    Runs 02-rollups.sql once per process; the script is idempotent.
+
+    Args:
+        force: Run the script even if it already ran in this process
+    """
+    global _rollups_ready
+    with _rollups_lock:
+        if _rollups_ready and not force:
+            return
+        with open(ROLLUP_SQL_FILE, 'r', encoding='utf-8') as f:
+            ddl = f.read()
+        with transaction() as conn:
+            with conn.cursor() as cur:
+                cur.execute(ddl)
+        _rollups_ready = True
+        logger.info("Fines rollups are in place")
+
+
+def refresh_rollups(full: bool = False) -> int:
+    """
+    Recompute rollup groups touched since the last refresh.
+
+    Args:
+        full: Rebuild every rollup from gdpr.fines instead
+
+    Returns:
+        Number of rollup rows written
+    """
+    ensure_rollups()
+    with transaction() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT gdpr.refresh_fines_rollups(%s)", (full,))
+            written = cur.fetchone()[0]
+    for table in ROLLUPS:
+        bump_table_version(f'gdpr.{table}')
+    logger.info(f"Refreshed fines rollups ({'full' if full else 'incremental'}): {written} groups written")
+    return written
+
+
+def choose_rollup(group_by: Sequence[str], filters: Iterable[str] = ()) -> Optional[str]:
+    """
+    Pick the rollup table that can answer a grouped query.
+
+    Args:
+        group_by: Dimensions to group by
+        filters: Dimensions that are filtered on
+
+    Returns:
+        Rollup table name, or None if only gdpr.fines can answer it
+    """
+    needed = set(group_by) | set(filters)
+    for table, dimensions in ROLLUPS.items():
+        if needed <= set(dimensions):
+            return table
+    return None
+
+
+def _validate(group_by: Sequence[str], order_by: str):
+    unknown = [dim for dim in group_by if dim not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown dimensions {unknown}, expected some of {DIMENSIONS}")
+    if order_by not in ORDER_KEYS or (order_by in DIMENSIONS and order_by not in group_by):
+        raise ValueError(f"Cannot order by '{order_by}' when grouping by {list(group_by)}")
+
+
+def aggregate_fines(group_by: Sequence[str] = ('country',), years: Optional[Iterable[int]] = None,
+                    countries: Optional[Iterable[str]] = None, order_by: str = 'total_amount',
+                    descending: bool = True, limit: Optional[int] = None,
+                    use_rollups: bool = True, cache: bool = False) -> List[Dict[str, Any]]:
+    """
+    Aggregate fine counts and amounts by the given dimensions.
+
+    The query is served from a rollup table when one covers every
+    grouping and filter dimension, and from gdpr.fines otherwise.
+
+    Args:
+        group_by: Dimensions to group by (country, region, year, month,
+            law, article, article_violated, sector); empty for grand
+            totals. A fine citing several articles counts once under
+            each of them
+        years: Only include these decision years
+        countries: Only include these countries
+        order_by: Measure or dimension to sort by
+        descending: Sort in descending order
+        limit: Maximum number of groups to return
+        use_rollups: Set to False to always scan gdpr.fines
+        cache: Serve repeated requests from the query result cache
+
+    Returns:
+        List of dictionaries with the dimensions plus fine_count,
+        total_amount, max_amount and avg_amount
+    """
+    group_by = list(group_by)
+    _validate(group_by, order_by)
+
+    filters = {}
+    if years is not None:
+        filters['year'] = [int(year) for year in years]
+    if countries is not None:
+        filters['country'] = list(countries)
+
+    table = choose_rollup(group_by, filters) if use_rollups else None
+    if table:
+        source = f"gdpr.{table} f"
+        expressions = {dim: f"f.{dim}" for dim in ROLLUPS[table]}
+        expressions['region'] = 'c.region'
+        measures = (
+            "SUM(f.fine_count)::BIGINT AS fine_count, SUM(f.total_amount) AS total_amount, "
+            "MAX(f.max_amount) AS max_amount, SUM(f.total_amount) / NULLIF(SUM(f.fine_count), 0) AS avg_amount"
+        )
+    else:
+        logger.debug(f"No rollup covers {group_by} with filters {list(filters)}, scanning gdpr.fines")
+        source = "gdpr.fines f"
+        expressions = _BASE_EXPRESSIONS
+        measures = (
+            "COUNT(*) AS fine_count, SUM(f.amount) AS total_amount, "
+            "MAX(f.amount) AS max_amount, AVG(f.amount) AS avg_amount"
+        )
+
+    if 'region' in group_by:
+        source += " LEFT JOIN gdpr.countries c ON f.country = c.name"
+    if not table and {'law', 'article'} & set(group_by):
+        source += " JOIN (SELECT DISTINCT fine_id, law, article FROM gdpr.fine_articles) fa ON fa.fine_id = f.id"
+
+    select = [f"{expressions[dim]} AS {dim}" for dim in group_by] + [measures]
+    query = f"SELECT {', '.join(select)} FROM {source}"
+
+    conditions = [f"{expressions[dim]} = ANY(%({dim})s)" for dim in filters]
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if group_by:
+        query += " GROUP BY " + ", ".join(expressions[dim] for dim in group_by)
+    query += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'} NULLS LAST"
+    if limit is not None:
+        query += " LIMIT %(limit)s"
+
+    return execute_query(query, {**filters, 'limit': limit}, cache=cache)
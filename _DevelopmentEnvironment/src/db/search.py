@@ -0,0 +1,228 @@
+"""
+Full-text and fuzzy search over GDPR fines.
+
+search_fines() matches web-search style queries ("cookie consent -banner",
+"\"video surveillance\"") against the generated search_vector column
+created by init-scripts/06-search.sql, through its GIN index. Results are
+ranked (or ordered by date) and paginated with a keyset cursor, so later
+pages cost the same as the first, and come with highlighted snippets that
+are only built for the rows on the page. search_companies() finds company
+names by trigram similarity when pg_trgm is installed.
+"""
+
+import logging
+import os
+import threading
+from datetime import date
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from db.init_db import execute_query
+from db.pool import transaction
+
+logger = logging.getLogger(__name__)
+
+# DDL for the search column and indexes
+SEARCH_SQL_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'init-scripts', '06-search.sql'
+)
+
+# Text search configuration used by search_vector
+TS_CONFIG = 'english'
+
+# Orderings accepted by search_fines
+SEARCH_ORDERS = ('rank', 'date')
+
+# ts_headline options for snippets
+HEADLINE_OPTIONS = 'StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=" … "'
+
+# Sort key when ordering by date: fines without a date sort after every
+# dated fine, and the key is never NULL, which a keyset comparison needs
+_DATE_KEY = "COALESCE(f.date, '-infinity'::DATE)"
+
+# Cursor value of that key for a fine without a date
+_NO_DATE = '-infinity'
+
+# Columns returned for each matching fine
+_RESULT_COLUMNS = (
+    'f.id', 'f.date', 'f.country', 'f.authority', 'f.company', 'f.amount',
+    'f.article_violated', 'f.type_of_violation', 'f.summary'
+)
+
+_search_ready = False
+_has_trigram = False
+_search_lock = threading.Lock()
+
+
+class SearchPage(NamedTuple):
+    """One page of search results and the cursor for the next page (None on the last page)."""
+
+    results: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+
+
+def ensure_search(force: bool = False) -> bool:
+    """
+    Create the search column and indexes if missing.
+
+    Runs 06-search.sql once per process; the script is idempotent. Adding
+    the column to an existing table computes it for every fine once.
+
+    Args:
+        force: Run the script even if it already ran in this process
+
+    Returns:
+        True if fuzzy company search can use pg_trgm
+    """
+    global _search_ready, _has_trigram
+    with _search_lock:
+        if _search_ready and not force:
+            return _has_trigram
+        with open(SEARCH_SQL_FILE, 'r', encoding='utf-8') as f:
+            ddl = f.read()
+        with transaction() as conn:
+            with conn.cursor() as cur:
+                cur.execute(ddl)
+                cur.execute("SELECT EXISTS (SELECT FROM pg_catalog.pg_extension WHERE extname = 'pg_trgm')")
+                _has_trigram = cur.fetchone()[0]
+        _search_ready = True
+        logger.info(f"Fines search is in place (trigram company search: {'on' if _has_trigram else 'off'})")
+        return _has_trigram
+
+
+def _encode_cursor(key: Any, fine_id: int) -> str:
+    """Encode the sort key and id of the last row on a page."""
+    if key is None:
+        value = _NO_DATE
+    else:
+        value = key.isoformat() if isinstance(key, date) else repr(float(key))
+    return f"{value}|{fine_id}"
+
+
+def _decode_cursor(cursor: str, order_by: str) -> Dict[str, Any]:
+    """Decode a cursor from _encode_cursor into query parameters."""
+    try:
+        value, fine_id = cursor.rsplit('|', 1)
+        if order_by == 'date':
+            key = value if value == _NO_DATE else date.fromisoformat(value)
+        else:
+            key = float(value)
+        return {'after_key': key, 'after_id': int(fine_id)}
+    except ValueError:
+        raise ValueError(f"Invalid search cursor '{cursor}' for ordering by {order_by}") from None
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards in a literal substring."""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search_fines(query: str, countries: Optional[Iterable[str]] = None, years: Optional[Iterable[int]] = None,
+                 company: Optional[str] = None, order_by: str = 'rank', limit: int = 20,
+                 cursor: Optional[str] = None, cache: bool = False) -> SearchPage:
+    """
+    Search fine summaries and violation types.
+
+    Matches come from the GIN index either way. Ordering by rank scores
+    every match before taking a page, so its cost grows with the number
+    of matches; ordering by date walks the (date, id) index and stops as
+    soon as the page is full, which keeps very broad terms fast. Fines
+    without a date come last when ordering by date.
+
+    Args:
+        query: Web-search style query: words, "quoted phrases", OR and
+            -excluded words
+        countries: Only include fines from these countries
+        years: Only include fines decided in these years
+        company: Only include fines whose company name contains this text
+        order_by: 'rank' for best matches first (violation type matches
+            weigh more than summary matches), or 'date' for newest first
+        limit: Page size
+        cursor: next_cursor of the previous page
+        cache: Serve repeated requests from the query result cache
+
+    Returns:
+        SearchPage whose results hold the fine columns plus rank and a
+        snippet with the matches wrapped in <mark> tags
+    """
+    if order_by not in SEARCH_ORDERS:
+        raise ValueError(f"Unknown search order '{order_by}', expected one of {SEARCH_ORDERS}")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    ensure_search()
+
+    rank = "ts_rank(f.search_vector, q.query)"
+    key = rank if order_by == 'rank' else _DATE_KEY
+    params: Dict[str, Any] = {
+        'config': TS_CONFIG, 'query': query, 'headline': HEADLINE_OPTIONS, 'limit': limit + 1
+    }
+    conditions = ["f.search_vector @@ q.query"]
+    if countries is not None:
+        params['countries'] = list(countries)
+        conditions.append("f.country = ANY(%(countries)s)")
+    if years is not None:
+        params['years'] = [int(year) for year in years]
+        conditions.append("EXTRACT(YEAR FROM f.date)::INTEGER = ANY(%(years)s)")
+    if company:
+        params['company'] = f"%{_escape_like(company)}%"
+        conditions.append("f.company ILIKE %(company)s")
+    if cursor:
+        params.update(_decode_cursor(cursor, order_by))
+        cast = 'REAL' if order_by == 'rank' else 'DATE'
+        conditions.append(f"({key}, f.id) < (%(after_key)s::{cast}, %(after_id)s)")
+
+    sql = (
+        "WITH q AS (SELECT websearch_to_tsquery(%(config)s::regconfig, %(query)s) AS query) "
+        "SELECT page.*, ts_headline(%(config)s::regconfig, "
+        "COALESCE(NULLIF(page.summary, ''), page.type_of_violation, ''), q.query, %(headline)s) AS snippet "
+        f"FROM (SELECT {', '.join(_RESULT_COLUMNS)}, {rank} AS rank "
+        f"FROM gdpr.fines f, q WHERE {' AND '.join(conditions)} "
+        f"ORDER BY {key} DESC, f.id DESC LIMIT %(limit)s) page, q "
+        f"ORDER BY {'page.rank DESC' if order_by == 'rank' else 'page.date DESC NULLS LAST'}, page.id DESC"
+    )
+    rows = execute_query(sql, params, cache=cache)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(last['rank'] if order_by == 'rank' else last['date'], last['id'])
+    return SearchPage(rows, next_cursor)
+
+
+def search_companies(name: str, limit: int = 10, min_similarity: float = 0.3,
+                     cache: bool = False) -> List[Dict[str, Any]]:
+    """
+    Find company names similar to a name, with their fine totals.
+
+    Uses the trigram index when pg_trgm is installed, so misspellings and
+    word order differences still match. Without it, names containing the
+    text are returned and similarity is None.
+
+    Args:
+        name: Company name to look for
+        limit: Maximum number of companies to return
+        min_similarity: Minimum trigram similarity (0-1); the index only
+            returns names above pg_trgm.similarity_threshold (0.3 by default)
+        cache: Serve repeated requests from the query result cache
+
+    Returns:
+        List of dictionaries with company, similarity, fine_count and total_amount
+    """
+    params = {'name': name, 'limit': limit, 'min_similarity': min_similarity}
+    if ensure_search():
+        sql = (
+            "SELECT f.company, similarity(f.company, %(name)s) AS similarity, "
+            "COUNT(*) AS fine_count, SUM(f.amount) AS total_amount "
+            "FROM gdpr.fines f WHERE f.company %% %(name)s AND similarity(f.company, %(name)s) >= %(min_similarity)s "
+            "GROUP BY f.company ORDER BY similarity DESC, fine_count DESC LIMIT %(limit)s"
+        )
+    else:
+        logger.debug("pg_trgm is not installed, matching company names with ILIKE")
+        params['pattern'] = f"%{_escape_like(name)}%"
+        sql = (
+            "SELECT f.company, NULL::REAL AS similarity, COUNT(*) AS fine_count, SUM(f.amount) AS total_amount "
+            "FROM gdpr.fines f WHERE f.company ILIKE %(pattern)s "
+            "GROUP BY f.company ORDER BY fine_count DESC LIMIT %(limit)s"
+        )
+    return execute_query(sql, params, cache=cache)
@@ -0,0 +1,325 @@
+"""
+Streaming reads and bulk exports.
+
+Large result sets are read through named (server-side) cursors, so only
+one batch of rows is held in memory at a time, and can be consumed as
+rows, row batches or DataFrame chunks. Bulk exports use COPY ... TO
+STDOUT, written straight to a CSV file or converted to Parquet in
+fixed-size Arrow blocks as the data arrives. Memory use stays flat
+whatever the table size.
+"""
+
+import logging
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union
+
+from psycopg2.extras import RealDictCursor
+
+from db import config
+from db.pool import connection
+
+logger = logging.getLogger(__name__)
+
+# Arrow types for PostgreSQL type OIDs (anything else is exported as text)
+_ARROW_TYPES = {
+    16: 'bool',
+    20: 'int64',
+    21: 'int16',
+    23: 'int32',
+    700: 'float32',
+    701: 'float64',
+    1082: 'date32',
+    1114: 'timestamp',
+    1184: 'timestamptz',
+}
+
+# OID of the numeric type, exported as a decimal when its scale is known
+_NUMERIC_OID = 1700
+
+
+def _params(params: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    return params if params else None
+
+
+@contextmanager
+def server_cursor(query: str, params: Optional[Dict[str, Any]] = None,
+                  itersize: Optional[int] = None, as_dicts: bool = False) -> Iterator[Any]:
+    """
+    Context manager yielding a named cursor over a query.
+
+    The cursor fetches itersize rows per round trip. The pooled connection
+    is held until the block exits, then rolled back and returned.
+
+    Args:
+        query: SQL query to execute
+        params: Parameters for the query
+        itersize: Rows fetched per round trip (defaults to DB_STREAM_ITERSIZE)
+        as_dicts: Return rows as dictionaries instead of tuples
+
+    Yields:
+        An executed psycopg2 named cursor
+    """
+    with connection() as conn:
+        cursor_factory = RealDictCursor if as_dicts else None
+        cur = conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=cursor_factory)
+        cur.itersize = itersize or config.STREAM_CONFIG['itersize']
+        try:
+            cur.execute(query, _params(params))
+            yield cur
+        finally:
+            try:
+                cur.close()
+            finally:
+                conn.rollback()
+
+
+def iter_rows(query: str, params: Optional[Dict[str, Any]] = None,
+              itersize: Optional[int] = None, as_dicts: bool = False) -> Iterator[Any]:
+    """
+    Stream the rows of a query.
+
+    Args:
+        query: SQL query to execute
+        params: Parameters for the query
+        itersize: Rows fetched per round trip
+        as_dicts: Yield dictionaries instead of tuples
+
+    Yields:
+        One row at a time
+    """
+    with server_cursor(query, params, itersize, as_dicts) as cur:
+        yield from cur
+
+
+def iter_batches(query: str, params: Optional[Dict[str, Any]] = None,
+                 batch_size: Optional[int] = None, as_dicts: bool = False) -> Iterator[List[Any]]:
+    """
+    Stream the rows of a query in batches.
+
+    Args:
+        query: SQL query to execute
+        params: Parameters for the query
+        batch_size: Rows per batch (defaults to DB_STREAM_ITERSIZE)
+        as_dicts: Return rows as dictionaries instead of tuples
+
+    Yields:
+        Lists of up to batch_size rows
+    """
+    batch_size = batch_size or config.STREAM_CONFIG['itersize']
+    with server_cursor(query, params, batch_size, as_dicts) as cur:
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+
+
+def iter_frames(query: str, params: Optional[Dict[str, Any]] = None,
+                chunk_size: Optional[int] = None) -> Iterator[Any]:
+    """
+    Stream the result of a query as DataFrame chunks.
+
+    Args:
+        query: SQL query to execute
+        params: Parameters for the query
+        chunk_size: Rows per DataFrame (defaults to DB_STREAM_ITERSIZE)
+
+    Yields:
+        pandas DataFrames of up to chunk_size rows
+    """
+    import pandas as pd
+
+    chunk_size = chunk_size or config.STREAM_CONFIG['itersize']
+    with server_cursor(query, params, chunk_size) as cur:
+        columns = None
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if columns is None:
+                # A named cursor only has a description after the first fetch
+                columns = [col.name for col in cur.description]
+            if not rows:
+                return
+            yield pd.DataFrame.from_records(rows, columns=columns)
+
+
+def _copy_sql(cur, query: str, params: Optional[Dict[str, Any]], header: bool) -> str:
+    """Build a COPY ... TO STDOUT statement for a query with its parameters inlined."""
+    # COPY does not accept bind parameters, so let psycopg2 quote them into the query
+    bound = cur.mogrify(query, _params(params)).decode(cur.connection.encoding or 'utf-8')
+    return f"COPY ({bound}) TO STDOUT WITH (FORMAT csv{', HEADER' if header else ''})"
+
+
+def copy_to_csv(query: str, destination: Union[str, BinaryIO], params: Optional[Dict[str, Any]] = None,
+                header: bool = True) -> int:
+    """
+    Export a query to CSV with COPY ... TO STDOUT.
+
+    The server streams CSV text straight into the destination without
+    building rows in Python.
+
+    Args:
+        query: SQL query to export
+        destination: File path or binary file object
+        params: Parameters for the query
+        header: Write a header row
+
+    Returns:
+        Number of rows exported
+    """
+    with connection() as conn:
+        with conn.cursor() as cur:
+            sql = _copy_sql(cur, query, params, header)
+            if isinstance(destination, (str, os.PathLike)):
+                with open(destination, 'wb') as f:
+                    cur.copy_expert(sql, f)
+            else:
+                cur.copy_expert(sql, destination)
+            rows = cur.rowcount
+        conn.rollback()
+    logger.info(f"Exported {rows} rows to CSV")
+    return rows
+
+
+def arrow_schema(query: str, params: Optional[Dict[str, Any]] = None):
+    """
+    Arrow schema of a query's result, from the PostgreSQL column types.
+
+    Numeric columns with a declared scale become decimals and unmapped
+    types become strings.
+
+    Args:
+        query: SQL query
+        params: Parameters for the query
+
+    Returns:
+        pyarrow.Schema
+    """
+    import pyarrow as pa
+
+    types = {
+        'bool': pa.bool_(), 'int16': pa.int16(), 'int32': pa.int32(), 'int64': pa.int64(),
+        'float32': pa.float32(), 'float64': pa.float64(), 'date32': pa.date32(),
+        'timestamp': pa.timestamp('us'), 'timestamptz': pa.timestamp('us', tz='UTC'),
+    }
+    with connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT * FROM ({query}) AS q LIMIT 0", _params(params))
+            description = cur.description
+        conn.rollback()
+
+    fields = []
+    for col in description:
+        if col.type_code == _NUMERIC_OID:
+            if col.scale is not None and col.precision:
+                arrow_type = pa.decimal128(min(col.precision, 38), col.scale)
+            else:
+                arrow_type = pa.float64()
+        else:
+            arrow_type = types.get(_ARROW_TYPES.get(col.type_code), pa.string())
+        fields.append(pa.field(col.name, arrow_type))
+    return pa.schema(fields)
+
+
+def copy_to_parquet(query: str, path: str, params: Optional[Dict[str, Any]] = None,
+                    block_size: Optional[int] = None, compression: str = 'snappy') -> int:
+    """
+    Export a query to a Parquet file with COPY ... TO STDOUT.
+
+    COPY output is piped into Arrow's streaming CSV reader on another
+    thread and written one block (one row group) at a time, so only one
+    block is in memory however large the result. An empty result still
+    writes a file with the result's schema.
+
+    Args:
+        query: SQL query to export
+        path: Parquet file to write
+        params: Parameters for the query
+        block_size: Bytes of CSV parsed per block (defaults to DB_STREAM_BLOCK_SIZE)
+        compression: Parquet compression codec
+
+    Returns:
+        Number of rows exported
+    """
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(query, params)
+    read_fd, write_fd = os.pipe()
+    errors: List[BaseException] = []
+
+    def produce():
+        try:
+            with os.fdopen(write_fd, 'wb') as pipe:
+                with connection() as conn:
+                    with conn.cursor() as cur:
+                        cur.copy_expert(_copy_sql(cur, query, params, header=False), pipe)
+                    conn.rollback()
+        except BaseException as e:
+            errors.append(e)
+
+    producer = threading.Thread(target=produce, name='copy-to-parquet', daemon=True)
+    producer.start()
+
+    rows = 0
+    read_error = None
+    try:
+        with os.fdopen(read_fd, 'rb') as pipe:
+            with pq.ParquetWriter(path, schema, compression=compression) as writer:
+                # Arrow rejects an empty CSV stream; no rows leaves a file with just the schema
+                if pipe.peek(1):
+                    reader = pa_csv.open_csv(
+                        pipe,
+                        read_options=pa_csv.ReadOptions(
+                            column_names=schema.names,
+                            block_size=block_size or config.STREAM_CONFIG['block_size']
+                        ),
+                        # Quoted text columns (summaries, notes) may contain line breaks
+                        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+                        convert_options=pa_csv.ConvertOptions(
+                            column_types=schema,
+                            true_values=['t'],
+                            false_values=['f'],
+                            strings_can_be_null=True,
+                            quoted_strings_can_be_null=False
+                        )
+                    )
+                    for batch in reader:
+                        writer.write_batch(batch)
+                        rows += batch.num_rows
+    except Exception as e:
+        read_error = e
+    finally:
+        producer.join()
+
+    # A failed COPY truncates the stream, so its error explains any reader
+    # error; a broken pipe only means the reader stopped first
+    if errors and not (read_error and isinstance(errors[0], BrokenPipeError)):
+        raise errors[0]
+    if read_error:
+        raise read_error
+
+    logger.info(f"Exported {rows} rows to {path}")
+    return rows
+
+
+def export_query(query: str, path: str, params: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Export a query to a CSV or Parquet file, chosen by the file extension.
+
+    Args:
+        query: SQL query to export
+        path: Destination ending in .csv or .parquet
+        params: Parameters for the query
+
+    Returns:
+        Number of rows exported
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return copy_to_csv(query, path, params)
+    if extension in ('.parquet', '.pq'):
+        return copy_to_parquet(query, path, params)
+    raise ValueError(f"Unsupported export format '{extension}', expected .csv or .parquet")
@@ -0,0 +1,76 @@
+import pytest
+
+from db.init_db import execute_transaction
+
+INSERT = "INSERT INTO gdpr.batch_test (id, label) VALUES (%s, %s)"
+UPDATE = "UPDATE gdpr.batch_test SET label = %s WHERE id = %s"
+
+
+@pytest.fixture
+def table(db_conn):
+    with db_conn, db_conn.cursor() as cur:
+        cur.execute("CREATE TABLE gdpr.batch_test (id INTEGER PRIMARY KEY, label TEXT NOT NULL)")
+    yield db_conn
+    with db_conn, db_conn.cursor() as cur:
+        cur.execute("DROP TABLE gdpr.batch_test")
+
+
+def rows(conn):
+    with conn, conn.cursor() as cur:
+        cur.execute("SELECT id, label FROM gdpr.batch_test ORDER BY id")
+        return cur.fetchall()
+
+
+def inserts(ids):
+    return [{'query': INSERT, 'params': (i, f'row {i}')} for i in ids]
+
+
+def test_batched_runs_commit_every_statement(table):
+    statements = inserts(range(250)) + [{'query': UPDATE, 'params': ('updated', i)} for i in range(0, 250, 50)]
+    result = execute_transaction(statements, page_size=40)
+    assert result and not result.errors
+    assert {r.status for r in result.statements} == {'ok'}
+    stored = dict(rows(table))
+    assert len(stored) == 250
+    assert [stored[i] for i in range(0, 250, 50)] == ['updated'] * 5
+
+
+def test_skip_rolls_back_only_the_failing_statements(table):
+    statements = inserts([1, 2, 3]) + inserts([2]) + [{'query': UPDATE, 'params': (None, 3)}] + inserts([4, 4, 5])
+    result = execute_transaction(statements, on_error='skip')
+    assert result.committed
+    assert [r.status for r in result.statements] == ['ok', 'ok', 'ok', 'skipped', 'skipped', 'ok', 'skipped', 'ok']
+    assert [r.index for r in result.errors] == [3, 4, 6]
+    assert 'duplicate key' in result.errors[0].error
+    assert rows(table) == [(1, 'row 1'), (2, 'row 2'), (3, 'row 3'), (4, 'row 4'), (5, 'row 5')]
+
+
+def test_abort_rolls_back_the_whole_transaction(table):
+    statements = inserts([1, 2]) + inserts([2]) + inserts([3, 4])
+    result = execute_transaction(statements, on_error='abort')
+    assert not result
+    assert [r.status for r in result.statements] == ['rolled_back', 'rolled_back', 'failed', 'not_run', 'not_run']
+    assert [r.index for r in result.errors] == [2]
+    assert rows(table) == []
+
+
+def test_abort_inside_a_batched_run_reports_the_failing_statement(table):
+    result = execute_transaction(inserts([1, 2, 2, 3]), on_error='abort')
+    assert not result
+    assert [r.status for r in result.statements] == ['rolled_back', 'rolled_back', 'failed', 'not_run']
+    assert rows(table) == []
+
+
+def test_single_statements_report_rowcount_and_rows(table):
+    execute_transaction(inserts([1, 2, 3]))
+    result = execute_transaction([
+        {'query': "UPDATE gdpr.batch_test SET label = 'x' WHERE id > %s", 'params': (1,)},
+        {'query': "SELECT id FROM gdpr.batch_test WHERE label = %s ORDER BY id", 'params': ('x',)},
+    ])
+    assert result.statements[0].rowcount == 2
+    assert result.statements[1].rows == [(2,), (3,)]
+
+
+def test_unknown_on_error_is_rejected(table):
+    with pytest.raises(ValueError):
+        execute_transaction(inserts([1]), on_error='ignore')
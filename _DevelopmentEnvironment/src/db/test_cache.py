@@ -0,0 +1,130 @@
+import time
+
+import pytest
+
+from db import cache
+from db.cache import QueryCache, base_tables, bump_table_version, referenced_tables, table_versions
+from db.init_db import execute_query
+
+VIEW_QUERY = "SELECT COUNT(*) AS n FROM gdpr.fines_analysis"
+
+
+def insert_fine(conn, company='Acme'):
+    with conn, conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO gdpr.fines (country, company, amount, date) VALUES ('Spain', %s, 1000, '2022-01-01')",
+            (company,)
+        )
+
+
+def wait_for_bump(table, before, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if table_versions([table]) != before:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_referenced_tables_default_to_the_gdpr_schema():
+    query = 'SELECT * FROM fines f JOIN "gdpr"."countries" c ON c.name = f.country LEFT JOIN public.x ON true'
+    assert referenced_tables(query) == ('gdpr.countries', 'gdpr.fines', 'public.x')
+
+
+@pytest.mark.parametrize('query, expected', [
+    ("SELECT EXTRACT(YEAR FROM f.date) AS year, COUNT(*) FROM gdpr.fines f GROUP BY 1", ('gdpr.fines',)),
+    ("SELECT * FROM gdpr.fines f WHERE f.sector IS NOT DISTINCT FROM NULL", ('gdpr.fines',)),
+    ("SELECT * FROM gdpr.fines f, gdpr.countries AS c, q WHERE c.name = f.country", ('gdpr.countries', 'gdpr.fines', 'gdpr.q')),
+    ("WITH q AS (SELECT 1 AS one), r AS MATERIALIZED (SELECT * FROM fines) SELECT * FROM r, q", ('gdpr.fines',)),
+    ("SELECT * FROM gdpr.top_fines(10) t", ('gdpr.top_fines',)),
+])
+def test_referenced_tables_follow_from_lists_and_skip_non_relations(query, expected):
+    assert referenced_tables(query) == expected
+
+
+def test_names_that_are_not_tables_or_views_are_not_resolved(database):
+    assert base_tables(['gdpr.fines']) == ('gdpr.fines',)
+    for query in ("SELECT * FROM gdpr.top_fines(10) t",
+                  "SELECT g FROM generate_series(1, 3) g JOIN gdpr.fines f ON f.id = g",
+                  "SELECT * FROM pg_catalog.pg_class",
+                  "SELECT SUBSTRING(company FROM 1 FOR 3) FROM gdpr.fines"):
+        assert base_tables(referenced_tables(query)) is None, query
+
+
+def test_bumped_tables_invalidate_entries():
+    query_cache = QueryCache(max_bytes=1 << 20, ttl=None)
+    key = query_cache.key('SELECT 1 FROM gdpr.cache_test_a')
+    query_cache.put(key, [{'a': 1}], table_versions(['gdpr.cache_test_a']))
+    assert query_cache.get(key) == [{'a': 1}]
+    bump_table_version('cache_test_a')
+    assert query_cache.get(key) is None
+    assert query_cache.stats()['invalidations'] == 1
+
+
+def test_entries_are_evicted_least_recently_used_first():
+    result = [{'value': 'x' * 500}]
+    query_cache = QueryCache(max_bytes=2 * cache.result_size(result), ttl=None)
+    keys = [query_cache.key(f'SELECT {i}') for i in range(3)]
+    for key in keys[:2]:
+        query_cache.put(key, result, ())
+    query_cache.get(keys[0])
+    query_cache.put(keys[2], result, ())
+    assert query_cache.get(keys[1]) is None
+    assert query_cache.get(keys[0]) is not None
+    assert query_cache.stats()['evictions'] == 1
+
+
+def test_views_resolve_to_their_base_tables(database):
+    assert base_tables(['gdpr.fines_analysis', 'gdpr.fines']) == ('gdpr.countries', 'gdpr.fines')
+
+
+def test_view_query_is_invalidated_by_base_table_writes(db_conn):
+    assert execute_query(VIEW_QUERY, cache=True) == [{'n': 0}]
+    insert_fine(db_conn)
+    bump_table_version('gdpr.fines')
+    assert execute_query(VIEW_QUERY, cache=True) == [{'n': 1}]
+
+
+def test_view_query_is_invalidated_by_writes_from_other_connections(db_conn):
+    assert execute_query(VIEW_QUERY, cache=True) == [{'n': 0}]
+    if not cache.cache_stats()['listening']:
+        pytest.skip("change listener not running")
+    before = table_versions(['gdpr.fines'])
+    insert_fine(db_conn)
+    assert wait_for_bump('gdpr.fines', before)
+    assert execute_query(VIEW_QUERY, cache=True) == [{'n': 1}]
+
+
+@pytest.mark.parametrize('table, statement', [
+    ('gdpr.companies', "INSERT INTO gdpr.companies (canonical_name) VALUES ('Acme')"),
+    ('gdpr.company_aliases', "DELETE FROM gdpr.company_aliases"),
+    ('gdpr.company_keys', "DELETE FROM gdpr.company_keys"),
+])
+def test_company_tables_send_change_notifications(db_conn, table, statement):
+    cache.get_cache()
+    if not cache.cache_stats()['listening']:
+        pytest.skip("change listener not running")
+    before = table_versions([table])
+    with db_conn, db_conn.cursor() as cur:
+        cur.execute(statement)
+    assert wait_for_bump(table, before)
+
+
+def test_queries_reading_functions_are_not_cached(db_conn):
+    query = "SELECT COUNT(*) AS n FROM generate_series(1, 3) g CROSS JOIN gdpr.fines f"
+    assert execute_query(query, cache=True) == [{'n': 0}]
+    insert_fine(db_conn)
+    assert execute_query(query, cache=True) == [{'n': 3}]
+    assert cache.get_cache().stats()['entries'] == 0
+
+
+def test_queries_are_not_cached_when_views_cannot_be_resolved(db_conn, monkeypatch):
+    def unavailable():
+        raise RuntimeError("catalog unavailable")
+
+    monkeypatch.setattr(cache, '_view_tables', None)
+    monkeypatch.setattr(cache, 'load_view_dependencies', unavailable)
+    execute_query(VIEW_QUERY, cache=True)
+    insert_fine(db_conn)
+    assert execute_query(VIEW_QUERY, cache=True) == [{'n': 1}]
+    assert cache.get_cache().stats()['entries'] == 0
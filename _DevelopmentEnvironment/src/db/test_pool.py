@@ -0,0 +1,27 @@
+from db import pool
+
+
+def test_pool_opens_min_size_connections(database, monkeypatch):
+    monkeypatch.setenv('DB_POOL_MIN_SIZE', '3')
+    monkeypatch.setenv('DB_POOL_MAX_SIZE', '5')
+    pool.dispose_engine()
+    pool.config.reset()
+    try:
+        engine = pool.get_engine()
+        assert engine.pool.checkedin() == 3
+        assert engine.pool.checkedout() == 0
+    finally:
+        pool.dispose_engine()
+        pool.config.reset()
+
+
+def test_transaction_rolls_back_on_error(db_conn):
+    try:
+        with pool.transaction() as conn, conn.cursor() as cur:
+            cur.execute("INSERT INTO gdpr.fines (country, company, amount, date) VALUES ('Spain', 'X', 1, '2024-01-01')")
+            raise RuntimeError('abort')
+    except RuntimeError:
+        pass
+    with db_conn.cursor() as cur:
+        cur.execute("SELECT count(*) FROM gdpr.fines")
+        assert cur.fetchone()[0] == 0
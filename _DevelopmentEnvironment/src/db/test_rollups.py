@@ -0,0 +1,86 @@
+import pytest
+
+from db.rollups import aggregate_fines, ensure_rollups, refresh_rollups
+from etl.synthetic import generate_fines
+
+GROUPINGS = [
+    (['country'], {}),
+    (['year', 'month'], {}),
+    (['country', 'year'], {'years': [2021, 2022], 'countries': ['Germany', 'France']}),
+    (['region'], {}),
+    (['sector'], {}),
+    (['law', 'article'], {}),
+    (['article'], {}),
+    ([], {}),
+]
+
+
+def rows_by_key(rows, group_by):
+    return {tuple(row[dim] for dim in group_by): (row['fine_count'], float(row['total_amount']), float(row['max_amount']))
+            for row in rows}
+
+
+def assert_rollups_match_base(group_by, filters):
+    from_rollups = aggregate_fines(group_by, **filters)
+    from_base = aggregate_fines(group_by, use_rollups=False, **filters)
+    assert rows_by_key(from_rollups, group_by) == rows_by_key(from_base, group_by)
+    assert from_base
+
+
+@pytest.fixture
+def loaded(load_fines):
+    load_fines(generate_fines(1500, seed=3, dirty_fraction=0), resolve_entities=False)
+    refresh_rollups()
+
+
+@pytest.mark.parametrize('group_by, filters', GROUPINGS)
+def test_rollups_match_base_scan(loaded, group_by, filters):
+    assert_rollups_match_base(group_by, filters)
+
+
+def test_fines_count_once_per_cited_article(load_fines):
+    load_fines([
+        {'country': 'Spain', 'company': 'A', 'amount': 100, 'date': '2022-01-01',
+         'article_violated': 'Art. 5 (1) a), f) GDPR, Art. 6 GDPR'},
+        {'country': 'Spain', 'company': 'B', 'amount': 50, 'date': '2022-02-01', 'article_violated': 'Art. 5 GDPR'},
+    ], resolve_entities=False)
+    refresh_rollups()
+    totals = rows_by_key(aggregate_fines(['law', 'article']), ['law', 'article'])
+    assert totals == {('GDPR', 5): (2, 150.0, 100.0), ('GDPR', 6): (1, 100.0, 100.0)}
+
+
+def test_incremental_refresh_follows_updates_and_deletes(loaded, db_conn):
+    with db_conn, db_conn.cursor() as cur:
+        cur.execute("UPDATE gdpr.fines SET amount = amount * 10 WHERE id % 7 = 0")
+        cur.execute("DELETE FROM gdpr.fines WHERE id % 11 = 0")
+        cur.execute("UPDATE gdpr.fines SET article_violated = 'Art. 83 GDPR' WHERE id % 13 = 0")
+    from etl.articles import rebuild_fine_articles
+    from db.pool import get_engine
+    rebuild_fine_articles(get_engine())
+    refresh_rollups()
+    for group_by, filters in GROUPINGS:
+        assert_rollups_match_base(group_by, filters)
+
+
+def test_string_keyed_article_rollup_is_rebuilt(loaded, db_conn):
+    with db_conn, db_conn.cursor() as cur:
+        cur.execute("DROP TABLE gdpr.fines_by_article")
+        cur.execute(
+            "CREATE TABLE gdpr.fines_by_article (article_violated VARCHAR(100) PRIMARY KEY, fine_count INTEGER, "
+            "total_amount NUMERIC(24, 2), max_amount NUMERIC(20, 2))"
+        )
+    ensure_rollups(force=True)
+    refresh_rollups()
+    assert_rollups_match_base(['law', 'article'], {})
+
+
+def test_dirty_tables_are_logged(db_conn):
+    with db_conn, db_conn.cursor() as cur:
+        cur.execute("ALTER TABLE gdpr.rollup_dirty SET UNLOGGED")
+    ensure_rollups(force=True)
+    with db_conn, db_conn.cursor() as cur:
+        cur.execute(
+            "SELECT relname, relpersistence FROM pg_class "
+            "WHERE relname IN ('rollup_dirty', 'rollup_dirty_articles') ORDER BY relname"
+        )
+        assert cur.fetchall() == [('rollup_dirty', 'p'), ('rollup_dirty_articles', 'p')]
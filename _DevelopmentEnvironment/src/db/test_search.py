@@ -0,0 +1,62 @@
+from datetime import date
+
+import pytest
+
+from db.search import search_fines
+
+
+@pytest.fixture
+def fines(db_conn):
+    """Fines mentioning cookies, some sharing a date and some without one."""
+    dates = [date(2021, 3, 1), None, date(2022, 5, 1), date(2021, 3, 1), None, date(2020, 1, 1),
+             date(2022, 5, 1), None, date(2023, 7, 1), date(2021, 3, 1)]
+    with db_conn, db_conn.cursor() as cur:
+        cur.execute("ALTER TABLE gdpr.fines ALTER COLUMN date DROP NOT NULL")
+        for i, day in enumerate(dates):
+            cur.execute(
+                "INSERT INTO gdpr.fines (country, company, amount, date, summary, type_of_violation) "
+                "VALUES ('Spain', %s, %s, %s, %s, 'Insufficient legal basis') RETURNING id",
+                (f'Company {i}', 1000 + i, day, 'Cookies set without consent ' + 'cookie banner ' * (i % 4))
+            )
+        cur.execute("INSERT INTO gdpr.fines (country, company, amount, date, summary) "
+                    "VALUES ('Spain', 'Other', 5, NULL, 'Video surveillance of employees')")
+        cur.execute("SELECT id, date FROM gdpr.fines WHERE summary LIKE 'Cookies%' ORDER BY id")
+        rows = cur.fetchall()
+    yield rows
+    with db_conn, db_conn.cursor() as cur:
+        cur.execute("DELETE FROM gdpr.fines WHERE date IS NULL")
+        cur.execute("ALTER TABLE gdpr.fines ALTER COLUMN date SET NOT NULL")
+
+
+def page_through(limit, **kwargs):
+    results, cursor, pages = [], None, 0
+    while True:
+        page = search_fines('cookies', limit=limit, cursor=cursor, **kwargs)
+        results.extend(page.results)
+        pages += 1
+        assert pages <= 20, "paging did not terminate"
+        if page.next_cursor is None:
+            return results
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize('limit', [1, 3, 4, 20])
+def test_date_order_pages_through_fines_without_a_date(fines, limit):
+    results = page_through(limit, order_by='date')
+    expected = sorted(fines, key=lambda row: (row[1] or date.min, row[0]), reverse=True)
+    assert [row['id'] for row in results] == [fine_id for fine_id, _ in expected]
+    assert [row['date'] for row in results][-3:] == [None, None, None]
+
+
+@pytest.mark.parametrize('limit', [1, 3, 20])
+def test_rank_order_pages_through_every_match(fines, limit):
+    results = page_through(limit, order_by='rank')
+    assert sorted(row['id'] for row in results) == [fine_id for fine_id, _ in fines]
+    ranks = [row['rank'] for row in results]
+    assert ranks == sorted(ranks, reverse=True)
+
+
+def test_cursors_are_tied_to_their_ordering(fines):
+    cursor = search_fines('cookies', order_by='date', limit=2).next_cursor
+    with pytest.raises(ValueError):
+        search_fines('cookies', order_by='rank', cursor=cursor)
@@ -0,0 +1,82 @@
+import csv
+from datetime import date
+from decimal import Decimal
+
+import psycopg2
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from db.streaming import copy_to_csv, copy_to_parquet, export_query, iter_batches, iter_frames, iter_rows
+
+SERIES = """
+    SELECT g AS id, 'fine ' || g AS label, (g * 1.25)::numeric(12, 2) AS amount,
+           DATE '2021-01-01' + g AS day, mod(g, 2) = 0 AS even,
+           CASE WHEN mod(g, 3) = 0 THEN NULL ELSE 'x,"y"' || chr(10) || 'é' END AS note
+    FROM generate_series(1, %(n)s) AS g
+"""
+
+
+@pytest.mark.parametrize('itersize', [1, 7, 1000])
+def test_iter_rows_streams_every_row(db_conn, itersize):
+    rows = list(iter_rows(SERIES, {'n': 25}, itersize=itersize))
+    assert [row[0] for row in rows] == list(range(1, 26))
+    assert list(iter_rows(SERIES, {'n': 2}, as_dicts=True))[1]['label'] == 'fine 2'
+
+
+def test_iter_batches_and_frames_split_the_result(db_conn):
+    batches = list(iter_batches(SERIES, {'n': 25}, batch_size=10))
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+
+    frames = list(iter_frames(SERIES, {'n': 25}, chunk_size=10))
+    assert [len(frame) for frame in frames] == [10, 10, 5]
+    assert list(frames[0].columns) == ['id', 'label', 'amount', 'day', 'even', 'note']
+    assert list(iter_frames(SERIES, {'n': 0})) == []
+
+
+def test_copy_to_csv_writes_a_header_and_every_row(db_conn, tmp_path):
+    path = tmp_path / 'series.csv'
+    assert copy_to_csv(SERIES, str(path), {'n': 5}) == 5
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['id', 'label', 'amount', 'day', 'even', 'note']
+    assert rows[1] == ['1', 'fine 1', '1.25', '2021-01-02', 'f', 'x,"y"\né']
+    assert rows[3][5] == ''
+
+
+def test_copy_to_parquet_keeps_types_and_nulls(db_conn, tmp_path):
+    path = str(tmp_path / 'series.parquet')
+    assert copy_to_parquet(SERIES, path, {'n': 500}, block_size=4096) == 500
+    table = pq.read_table(path)
+    assert table.schema.field('id').type == pa.int32()
+    assert table.schema.field('amount').type == pa.decimal128(12, 2)
+    assert pq.ParquetFile(path).num_row_groups > 1
+
+    rows = table.to_pylist()
+    assert rows[0] == {'id': 1, 'label': 'fine 1', 'amount': Decimal('1.25'), 'day': date(2021, 1, 2),
+                       'even': False, 'note': 'x,"y"\né'}
+    assert rows[2]['note'] is None
+    assert [row['id'] for row in rows] == list(range(1, 501))
+
+
+def test_empty_result_writes_a_parquet_file_with_the_schema(db_conn, tmp_path):
+    path = str(tmp_path / 'empty.parquet')
+    assert copy_to_parquet(SERIES, path, {'n': 0}) == 0
+    table = pq.read_table(path)
+    assert table.num_rows == 0
+    assert table.schema.names == ['id', 'label', 'amount', 'day', 'even', 'note']
+    assert table.schema.field('day').type == pa.date32()
+
+
+def test_copy_errors_are_raised_before_reader_errors(db_conn, tmp_path):
+    failing = "SELECT g, 100 / (g - 300) AS ratio FROM generate_series(1, 1000) AS g"
+    with pytest.raises(psycopg2.errors.DivisionByZero):
+        copy_to_parquet(failing, str(tmp_path / 'failing.parquet'), block_size=1024)
+
+
+def test_export_query_picks_the_format_from_the_extension(db_conn, tmp_path):
+    assert export_query(SERIES, str(tmp_path / 'series.csv'), {'n': 3}) == 3
+    assert export_query(SERIES, str(tmp_path / 'series.parquet'), {'n': 3}) == 3
+    assert pq.read_table(str(tmp_path / 'series.parquet')).num_rows == 3
+    with pytest.raises(ValueError):
+        export_query(SERIES, str(tmp_path / 'series.json'))
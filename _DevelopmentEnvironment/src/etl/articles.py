@@ -0,0 +1,212 @@
+"""
+Article citation parsing and linking.
+
+The tracker's article_violated field is free text such as
+"Art. 6, 12-14 GDPR" or "Art. 5 (1) a) GDPR, Art. 6 (1) GDPR". This module
+parses it into one (law, article, paragraph, point) citation per cited
+provision, expanding article ranges and listed sub-clauses, and links
+loaded fines to their citations in gdpr.fine_articles. Only the distinct
+citation strings are parsed; fines are matched to them in the database.
+"""
+
+import logging
+import re
+from typing import Iterable, List, NamedTuple, Optional, Sequence
+
+import pandas as pd
+from sqlalchemy import text
+
+from etl.loaders import KEY_COLUMN, write_frame
+
+logger = logging.getLogger(__name__)
+
+# Law assumed when a citation does not name one
+DEFAULT_LAW = 'GDPR'
+
+# National names of the GDPR
+LAW_ALIASES = {'DSGVO': 'GDPR', 'RGPD': 'GDPR', 'AVG': 'GDPR', 'RODO': 'GDPR', 'GDPR': 'GDPR'}
+
+# Widest article range expanded into individual articles (e.g. "Art. 12-14")
+MAX_RANGE = 30
+
+# Numbers above this are not article numbers (years, case numbers)
+MAX_ARTICLE = 999
+
+# Each "Art."/"Article"/"§" starts a new group of provisions
+_GROUP_START = re.compile(r'\b(?:Articles?|Arts?)\b\.?|§+')
+
+# Law named in a group: an upper-case acronym such as GDPR, BDSG or LOPDGDD
+_LAW = re.compile(r'\b([A-Z][A-Z0-9]{2,})\b')
+
+# One provision: an article or article range followed by any paragraphs and points,
+# e.g. "5 (1) a), f)", "5(1)(a)", "9 (2) and (3)" or "6 (1) lit. f"
+_PARAGRAPH = r'\(\s*\d{1,3}[a-z]?\s*\)'
+_POINTS = r'lit\.?\s*[a-z]\b|\(\s*[a-z]\s*\)|\b[a-z]\)'
+_PROVISION = re.compile(
+    r'(?P<article>\d+)'
+    r'(?:\s*(?:-|–|to)\s*(?P<end>\d+)\b)?'
+    rf'(?P<tail>(?:\s*(?:,|and|&)?\s*(?:{_PARAGRAPH}|{_POINTS}))*)'
+)
+
+# Paragraphs and points within a provision's tail, in order
+_PART = re.compile(r'\(\s*(?P<paragraph>\d{1,3}[a-z]?)\s*\)|lit\.?\s*(?P<lit>[a-z])\b|\(?\s*(?P<point>[a-z])\s*\)')
+
+
+def _sub_clauses(tail: str) -> List[tuple]:
+    """Split a provision's tail into (paragraph, point) pairs; points belong to the paragraph before them."""
+    clauses = []
+    paragraph = ''
+    pointed = True
+    for match in _PART.finditer(tail):
+        if match.group('paragraph'):
+            if not pointed:
+                clauses.append((paragraph, ''))
+            paragraph, pointed = match.group('paragraph'), False
+        else:
+            clauses.append((paragraph, match.group('lit') or match.group('point')))
+            pointed = True
+    if not pointed:
+        clauses.append((paragraph, ''))
+    return clauses or [('', '')]
+
+
+class Citation(NamedTuple):
+    """One cited provision; paragraph and point are '' when not given."""
+
+    law: str
+    article: int
+    paragraph: str = ''
+    point: str = ''
+
+
+def parse_citations(value: Optional[str]) -> List[Citation]:
+    """
+    Parse an article_violated string into individual citations.
+
+    Args:
+        value: Free-text citation, e.g. "Art. 5 (1) a), f) GDPR, Art. 12-14 GDPR"
+
+    Returns:
+        Sorted, de-duplicated citations (empty when nothing can be parsed)
+    """
+    if not isinstance(value, str) or not value.strip():
+        return []
+
+    starts = [match.end() for match in _GROUP_START.finditer(value)]
+    if not starts:
+        starts = [0]
+    ends = [match.start() for match in _GROUP_START.finditer(value)][1:] + [len(value)]
+    groups = [value[start:end] for start, end in zip(starts, ends)]
+
+    # A provision belongs to the first law named after it in its group ("Art. 12-14 GDPR,
+    # Section 4 BDSG"), else to the group's last law, else to the law of the next group that
+    # names one ("Art. 5, Art. 6 GDPR")
+    citations = set()
+    next_law = DEFAULT_LAW
+    for group in reversed(groups):
+        named = [(match.start(), LAW_ALIASES.get(match.group(1), match.group(1))) for match in _LAW.finditer(group)]
+        if named:
+            next_law = named[-1][1]
+        # Blank out the law names in place so provision offsets still line up with them
+        body = _LAW.sub(lambda match: ' ' * len(match.group()), group)
+        for match in _PROVISION.finditer(body):
+            law = next((name for start, name in named if start >= match.end()), next_law)
+            first = int(match.group('article'))
+            last = int(match.group('end') or first)
+            if not 0 <= last - first <= MAX_RANGE:
+                last = first
+            if last > MAX_ARTICLE:
+                continue
+            clauses = _sub_clauses(match.group('tail'))
+            for article in range(first, last + 1):
+                for paragraph, point in clauses:
+                    citations.add(Citation(law, article, paragraph, point))
+    return sorted(citations)
+
+
+def citation_frame(values: Iterable[Optional[str]]) -> pd.DataFrame:
+    """
+    Parse distinct citation strings into one row per (string, citation).
+
+    Args:
+        values: article_violated values; duplicates and nulls are skipped
+
+    Returns:
+        DataFrame with citation, law, article, paragraph and point columns
+    """
+    rows = [
+        (value, *citation)
+        for value in pd.unique(pd.Series(list(values), dtype=object).dropna())
+        for citation in parse_citations(value)
+    ]
+    return pd.DataFrame(rows, columns=['citation', *Citation._fields])
+
+
+def link_fine_articles(conn, citations: Iterable[Optional[str]], keys: Optional[Sequence[str]] = None,
+                       key_table: Optional[str] = None) -> int:
+    """
+    Replace the gdpr.fine_articles rows of a set of fines.
+
+    The distinct citation strings are parsed and copied into a temporary
+    table, and the fines are joined to it on article_violated, so the work
+    in Python is proportional to the number of distinct strings rather
+    than the number of fines. The caller owns the transaction.
+
+    Args:
+        conn: SQLAlchemy connection
+        citations: article_violated values of the fines being linked
+        keys: Natural keys of the fines to link
+        key_table: Qualified table whose fine_key column lists the fines to
+            link, instead of keys; with neither, every fine is relinked
+
+    Returns:
+        Number of links written
+    """
+    if keys is not None:
+        condition, params = f"f.{KEY_COLUMN} = ANY(:keys)", {'keys': list(keys)}
+    elif key_table is not None:
+        condition, params = f"f.{KEY_COLUMN} IN (SELECT {KEY_COLUMN} FROM {key_table})", {}
+    else:
+        condition, params = "TRUE", {}
+
+    parsed = citation_frame(citations)
+    conn.execute(text("DROP TABLE IF EXISTS fine_article_citations"))
+    conn.execute(text(
+        "CREATE TEMP TABLE fine_article_citations ("
+        "citation TEXT, law VARCHAR(20), article SMALLINT, paragraph VARCHAR(10), point VARCHAR(10)"
+        ") ON COMMIT DROP"
+    ))
+    if not parsed.empty:
+        write_frame(conn, parsed, 'fine_article_citations')
+
+    conn.execute(
+        text(f"DELETE FROM gdpr.fine_articles a USING gdpr.fines f WHERE a.fine_id = f.id AND {condition}"),
+        params
+    )
+    result = conn.execute(
+        text(
+            "INSERT INTO gdpr.fine_articles (fine_id, law, article, paragraph, point) "
+            "SELECT DISTINCT f.id, c.law, c.article, c.paragraph, c.point "
+            "FROM gdpr.fines f JOIN fine_article_citations c ON c.citation = f.article_violated "
+            f"WHERE {condition}"
+        ),
+        params
+    )
+    return result.rowcount
+
+
+def rebuild_fine_articles(engine) -> int:
+    """
+    Relink every fine in gdpr.fines to its article citations.
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        Number of links written
+    """
+    with engine.begin() as conn:
+        citations = [row[0] for row in conn.execute(text("SELECT DISTINCT article_violated FROM gdpr.fines"))]
+        linked = link_fine_articles(conn, citations)
+    logger.info(f"Linked fines to {linked} article citations")
+    return linked
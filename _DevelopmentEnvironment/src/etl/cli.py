@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Command line entry point.
+
+``gdpr-fines <command> [options]`` runs one of:
+
+    collect    load new fines from the API into the database
+    scrape     scrape the enforcement tracker into the columnar store
+    check-db   check that the database answers
+    backfill   reload the fines history in parallel
+
+A command's module is only imported once the command has been chosen, and
+configuration is only read when the command first needs it, so pandas,
+SQLAlchemy, requests and Playwright are loaded by the commands that use
+them and a check-db from cron or a health probe starts in tens of
+milliseconds. Importing this module has no side effects.
+"""
+
+import argparse
+import importlib
+import os
+import sys
+from typing import Callable, List, NamedTuple, Optional
+
+# Directory holding the db and etl packages
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The tracker scraper lives next to its data in a checkout, outside the packages;
+# GDPR_SCRAPER_DIR points an installed command at that directory
+DEFAULT_SCRAPER_DIR = os.path.join(os.path.dirname(os.path.dirname(SRC_DIR)), 'data')
+
+
+class CommandUnavailable(Exception):
+    """Raised when a command's code can't be found in this installation."""
+
+
+class Command(NamedTuple):
+    """A subcommand: the main(argv, prog) function implementing it, as 'module:function', and its help."""
+
+    target: str
+    help: str
+
+
+COMMANDS = {
+    'collect': Command('etl.gdpr_fines_collector:main', 'Load new fines from the API into the database'),
+    'scrape': Command('gdpr_scraper:main', 'Scrape the enforcement tracker into the columnar store'),
+    'check-db': Command('db.init_db:main', 'Check that the database answers'),
+    'backfill': Command('etl.backfill:main', 'Reload the fines history in parallel'),
+}
+
+
+def scraper_dir() -> str:
+    """
+    Find the directory holding the tracker scraper.
+
+    Returns:
+        GDPR_SCRAPER_DIR (from the environment or .env), or the checkout's
+        data directory
+
+    Raises:
+        CommandUnavailable: If gdpr_scraper.py is not in that directory
+    """
+    from db.config import load_environment
+
+    load_environment()
+    directory = os.getenv('GDPR_SCRAPER_DIR') or DEFAULT_SCRAPER_DIR
+    if not os.path.isfile(os.path.join(directory, 'gdpr_scraper.py')):
+        raise CommandUnavailable(
+            f"the tracker scraper (gdpr_scraper.py) is not in {directory}; "
+            f"set GDPR_SCRAPER_DIR to the data directory of a repository checkout"
+        )
+    return directory
+
+
+def load_command(name: str) -> Callable[..., None]:
+    """
+    Import the module of a command and return its main function.
+
+    Args:
+        name: Command name, one of COMMANDS
+
+    Returns:
+        Function taking (argv, prog)
+
+    Raises:
+        CommandUnavailable: If the command's module can't be found
+    """
+    module_name, function = COMMANDS[name].target.split(':')
+    if module_name == 'gdpr_scraper':
+        directory = scraper_dir()
+        if directory not in sys.path:
+            sys.path.insert(0, directory)
+    return getattr(importlib.import_module(module_name), function)
+
+
+def main(argv: Optional[List[str]] = None):
+    """
+    Run the command named on the command line.
+
+    Args:
+        argv: Command line arguments (sys.argv[1:] by default)
+    """
+    parser = argparse.ArgumentParser(
+        prog='gdpr-fines',
+        description='GDPR fines collection and maintenance',
+        epilog='Commands:\n' + '\n'.join(f"  {name:<10} {command.help}" for name, command in COMMANDS.items())
+               + '\n\nRun gdpr-fines <command> --help for the options of a command.',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('command', choices=COMMANDS, metavar='command', help='One of the commands below')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    try:
+        command = load_command(args.command)
+    except CommandUnavailable as e:
+        parser.exit(2, f"{parser.prog} {args.command}: error: {e}\n")
+    command(args.args, prog=f"{parser.prog} {args.command}")
+
+
+if __name__ == "__main__":
+    # Running the file directly: make the db and etl packages importable
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    main()
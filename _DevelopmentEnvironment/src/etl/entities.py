@@ -0,0 +1,478 @@
+"""
+Company entity resolution.
+
+The same controller shows up under many spellings ("Google LLC",
+"Google Ireland Limited", "GOOGLE LLC."). Each spelling is reduced to a
+name key of normalised tokens, with legal forms and geographic qualifiers
+dropped, and then resolved in three steps, cheapest first:
+
+1. a spelling seen before is looked up in gdpr.company_aliases,
+2. a new spelling whose key is already known takes that key's company
+   from gdpr.company_keys,
+3. a new key is compared, by the MinHash of its character trigrams and
+   of those of its leading word, only with the known keys that share one
+   of its locality-sensitive hashing band buckets in gdpr.company_blocks
+   and with the other new keys in its buckets.
+
+Similarities are estimated for every candidate pair at once with numpy,
+and only the pairs close to the threshold are rescored exactly. Matching
+keys are clustered with union-find, and each cluster
+without a known company becomes a new one. A load therefore touches only
+its own spellings and their bucket neighbours. It never re-clusters the
+companies already resolved.
+"""
+
+import logging
+import re
+import unicodedata
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from etl.normalize import COUNTRY_ALIASES
+
+logger = logging.getLogger(__name__)
+
+# Legal-form tokens dropped from name keys (after dots are removed, so "S.p.A." is "spa")
+LEGAL_FORMS = frozenset({
+    'ab', 'ag', 'aps', 'as', 'asa', 'bv', 'co', 'company', 'corp', 'corporation', 'cv', 'dd', 'doo',
+    'ehf', 'eurl', 'gmbh', 'hf', 'inc', 'incorporated', 'kft', 'kg', 'kgaa', 'lda', 'limited', 'llc',
+    'llp', 'lp', 'ltd', 'ltda', 'mbh', 'nv', 'nyrt', 'ohg', 'oo', 'ou', 'oy', 'oyj', 'plc', 'pty',
+    'rl', 'sa', 'sarl', 'sas', 'sau', 'se', 'sia', 'sl', 'slu', 'sp', 'spa', 'sro', 'srl', 'uab', 'ug', 'vof',
+    'z', 'zoo', 'zrt',
+})
+
+# Qualifiers naming a branch rather than a different controller ("Google Ireland")
+QUALIFIERS = frozenset(
+    {'the', 'and', 'group', 'holding', 'holdings', 'international', 'global', 'europe', 'eu', 'emea'}
+    | {country for country in COUNTRY_ALIASES if ' ' not in country}
+)
+
+# MinHash signature length of a whole key, split into LSH bands of BAND_ROWS rows
+NUM_PERM = 96
+BAND_ROWS = 3
+NUM_BANDS = NUM_PERM // BAND_ROWS
+
+# MinHash signature length of a key's leading word, appended to the key's signature
+HEAD_PERM = 32
+
+# Minimum trigram Jaccard similarity for two name keys to match; with 32 bands of 3 rows,
+# keys at this similarity share a bucket 99.7% of the time
+DEFAULT_THRESHOLD = 0.55
+
+# MinHash estimates within this margin below the threshold are rescored exactly
+VERIFY_MARGIN = 0.15
+
+# Names hashed per block when building signatures, to bound memory
+SIGNATURE_BLOCK = 5000
+
+_PRIME = np.uint64((1 << 31) - 1)
+_perm_rng = np.random.default_rng(20180525)
+_PERM_A = _perm_rng.integers(1, (1 << 31) - 1, NUM_PERM, dtype=np.uint64)
+_PERM_B = _perm_rng.integers(0, (1 << 31) - 1, NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _perm_rng.integers(1, 1 << 62, BAND_ROWS, dtype=np.uint64) | np.uint64(1)
+
+# Name keys standing in for an undisclosed controller; such fines are left without a company
+PLACEHOLDER_KEYS = frozenset({
+    'unknown', 'not known', 'not disclosed', 'undisclosed', 'not available', 'n a', 'na', 'none',
+    'anonymous', 'anonymised', 'anonymized', 'redacted', 'private individual', 'private person',
+    'individual', 'natural person', 'unknown individual', 'unknown person',
+})
+
+_NON_WORD = re.compile(r'[^\w]+')
+
+
+def name_key(name: Optional[str]) -> str:
+    """
+    Reduce a company name to its normalised key.
+
+    Args:
+        name: Company name as found in the data
+
+    Returns:
+        Lower-case, accent-free tokens without legal forms or geographic
+        qualifiers ("" for a missing or placeholder name such as
+        "Unknown" or "Private individual")
+    """
+    if not isinstance(name, str):
+        return ''
+    folded = unicodedata.normalize('NFKD', name.casefold())
+    folded = ''.join(ch for ch in folded if not unicodedata.combining(ch)).replace('.', '').replace("'", '')
+    tokens = [token for token in _NON_WORD.split(folded.replace('_', ' ')) if token]
+    kept = [token for token in tokens if token not in LEGAL_FORMS and token not in QUALIFIERS]
+    # A name made only of qualifiers ("Holding AG") keeps its words
+    key = ' '.join(kept or [token for token in tokens if token not in LEGAL_FORMS] or tokens)
+    return '' if key in PLACEHOLDER_KEYS else key
+
+
+def _trigrams(key: str) -> set:
+    """Character trigrams of a key padded with spaces."""
+    padded = f" {key} "
+    return {padded[i:i + 3] for i in range(max(len(padded) - 2, 1))}
+
+
+def _shingles(key: str) -> np.ndarray:
+    """CRC32 hashes of a key's character trigrams."""
+    grams = _trigrams(key)
+    return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def _head(key: str) -> str:
+    """The leading word of a key, skipping initials ("h m hennes mauritz" -> "hennes")."""
+    tokens = key.split()
+    return next((token for token in tokens if len(token) > 2), tokens[0] if tokens else '')
+
+
+def _minhash(texts: List[str], num_perm: int) -> np.ndarray:
+    """MinHash signatures of the character trigrams of texts, with the first num_perm hash functions."""
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    perm_a, perm_b = _PERM_A[:num_perm, None], _PERM_B[:num_perm, None]
+    for start in range(0, len(texts), SIGNATURE_BLOCK):
+        block = [_shingles(value) for value in texts[start:start + SIGNATURE_BLOCK]]
+        lengths = np.fromiter((len(hashes) for hashes in block), dtype=np.int64, count=len(block))
+        hashes = np.concatenate(block) % _PRIME
+        # One universal hash (a * x + b) mod p per row; the minimum over each text's segment of columns
+        permuted = (perm_a * hashes[None, :] + perm_b) % _PRIME
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        signatures[start:start + len(block)] = np.minimum.reduceat(permuted, offsets, axis=1).T
+    return signatures
+
+
+def minhash_signatures(keys: List[str]) -> np.ndarray:
+    """
+    Compute MinHash signatures of name keys.
+
+    Args:
+        keys: Name keys
+
+    Returns:
+        uint32 array of shape (len(keys), NUM_PERM + HEAD_PERM): the
+        signature of the whole key followed by that of its leading word
+    """
+    return np.hstack([_minhash(keys, NUM_PERM), _minhash([_head(key) for key in keys], HEAD_PERM)])
+
+
+def band_buckets(signatures: np.ndarray) -> np.ndarray:
+    """
+    Hash each LSH band of the signatures to a bucket.
+
+    Args:
+        signatures: Array from minhash_signatures
+
+    Returns:
+        int64 array of shape (len(signatures), NUM_BANDS)
+    """
+    bands = signatures[:, :NUM_PERM].reshape(len(signatures), NUM_BANDS, BAND_ROWS).astype(np.uint64)
+    with np.errstate(over='ignore'):
+        mixed = (bands * _BAND_MIX).sum(axis=2, dtype=np.uint64)
+    return (mixed >> np.uint64(1)).astype(np.int64)
+
+
+def pair_similarity(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """
+    Estimate the similarity of signature pairs.
+
+    The score is the lower of the trigram Jaccard similarities of the
+    whole keys and of their leading words, so names that only share a
+    generic word ("Euro Telecom", "Nova Telecom") score low.
+
+    Args:
+        left: Signatures from minhash_signatures, one row per pair
+        right: Signatures of the same shape
+
+    Returns:
+        float32 array of estimated similarities
+    """
+    equal = left == right
+    return np.minimum(equal[:, :NUM_PERM].mean(axis=1, dtype=np.float32),
+                      equal[:, NUM_PERM:].mean(axis=1, dtype=np.float32))
+
+
+def trigram_similarity(left: str, right: str) -> float:
+    """
+    Exact counterpart of pair_similarity for two name keys.
+
+    Args:
+        left: Name key
+        right: Name key
+
+    Returns:
+        Lower of the trigram Jaccard similarities of the keys and of their leading words
+    """
+    def jaccard(a: str, b: str) -> float:
+        grams_a, grams_b = _trigrams(a), _trigrams(b)
+        return len(grams_a & grams_b) / len(grams_a | grams_b)
+    return min(jaccard(left, right), jaccard(_head(left), _head(right)))
+
+
+def _find(parent: np.ndarray, node: int) -> int:
+    root = node
+    while parent[root] != root:
+        root = parent[root]
+    while parent[node] != root:
+        parent[node], node = root, parent[node]
+    return root
+
+
+class CompanyResolver:
+    """Resolves company spellings to gdpr.companies entities, incrementally."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        """
+        Initialize the resolver.
+
+        Args:
+            threshold: Minimum estimated trigram Jaccard similarity between
+                two name keys for them to be the same company
+        """
+        self.threshold = threshold
+
+    def resolve(self, conn, names: Iterable[Optional[str]]) -> Dict[str, int]:
+        """
+        Resolve company spellings, creating companies for new entities.
+
+        Resolution holds a transaction-level advisory lock, so concurrent
+        loads cannot create the same company twice. The caller owns the
+        transaction.
+
+        Args:
+            conn: SQLAlchemy connection
+            names: Company names; duplicates, nulls and names without a key
+                (empty or placeholder names) are skipped and stay unresolved
+
+        Returns:
+            Dictionary mapping each resolved name to its company_id
+        """
+        names = [name for name in pd.unique(pd.Series(list(names), dtype=object).dropna()) if name_key(name)]
+        if not names:
+            return {}
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('gdpr.companies'))"))
+
+        resolved = dict(conn.execute(
+            text("SELECT alias, company_id FROM gdpr.company_aliases WHERE alias = ANY(:names)"),
+            {'names': names}
+        ).fetchall())
+        new_names = [name for name in names if name not in resolved]
+        if not new_names:
+            return resolved
+
+        keys = {name: name_key(name) for name in new_names}
+        by_key = dict(conn.execute(
+            text("SELECT name_key, company_id FROM gdpr.company_keys WHERE name_key = ANY(:keys)"),
+            {'keys': list(set(keys.values()))}
+        ).fetchall())
+
+        aliases = []
+        unmatched: Dict[str, List[str]] = {}
+        for name in new_names:
+            if keys[name] in by_key:
+                resolved[name] = by_key[keys[name]]
+                aliases.append((name, keys[name], by_key[keys[name]], 1.0))
+            else:
+                unmatched.setdefault(keys[name], []).append(name)
+
+        if unmatched:
+            for key, company_id, similarity in self._resolve_keys(conn, unmatched):
+                for name in unmatched[key]:
+                    resolved[name] = company_id
+                    aliases.append((name, key, company_id, similarity))
+
+        conn.execute(
+            text(
+                "INSERT INTO gdpr.company_aliases (alias, name_key, company_id, similarity) "
+                "SELECT * FROM unnest(CAST(:aliases AS VARCHAR[]), CAST(:keys AS VARCHAR[]), "
+                "CAST(:ids AS INTEGER[]), CAST(:similarities AS REAL[])) ON CONFLICT (alias) DO NOTHING"
+            ),
+            {
+                'aliases': [alias[0] for alias in aliases],
+                'keys': [alias[1] for alias in aliases],
+                'ids': [alias[2] for alias in aliases],
+                'similarities': [float(alias[3]) for alias in aliases],
+            }
+        )
+        logger.debug(f"Resolved {len(names)} company names: {len(new_names)} new spellings, {len(unmatched)} new keys")
+        return resolved
+
+    def _resolve_keys(self, conn, spellings: Dict[str, List[str]]) -> List[Tuple[str, int, float]]:
+        """
+        Match new name keys to known keys, or to each other, through the LSH index.
+
+        Every new key is stored in gdpr.company_keys and gdpr.company_blocks,
+        so later spellings can match it directly.
+
+        Args:
+            conn: SQLAlchemy connection
+            spellings: Spellings of each distinct name key not seen before
+
+        Returns:
+            List of (key, company_id, similarity) tuples
+        """
+        keys = list(spellings)
+        signatures = minhash_signatures(keys)
+        buckets = band_buckets(signatures)
+        bands = np.broadcast_to(np.arange(NUM_BANDS, dtype=np.int64), buckets.shape)
+
+        # Known keys sharing a bucket with any new key
+        known = conn.execute(
+            text(
+                "SELECT b.band, b.bucket, k.key_id, k.company_id, k.signature, k.name_key "
+                "FROM unnest(CAST(:bands AS SMALLINT[]), CAST(:buckets AS BIGINT[])) AS q(band, bucket) "
+                "JOIN gdpr.company_blocks b ON b.band = q.band AND b.bucket = q.bucket "
+                "JOIN gdpr.company_keys k ON k.key_id = b.key_id"
+            ),
+            {'bands': bands.ravel().tolist(), 'buckets': buckets.ravel().tolist()}
+        ).fetchall()
+        known_index = {key_id: i for i, key_id in enumerate(sorted({row[2] for row in known}))}
+        known_companies = np.zeros(len(known_index), dtype=np.int64)
+        known_signatures = np.zeros((len(known_index), NUM_PERM + HEAD_PERM), dtype=np.uint32)
+        known_keys = [''] * len(known_index)
+        for row in known:
+            known_companies[known_index[row[2]]] = row[3]
+            known_keys[known_index[row[2]]] = row[5]
+            known_signatures[known_index[row[2]]] = np.frombuffer(bytes(row[4]), dtype=np.uint32)
+
+        # Candidate pairs: new keys sharing a bucket with a known key or with another new key
+        frame = pd.DataFrame({
+            'key': np.repeat(np.arange(len(keys)), NUM_BANDS), 'band': bands.ravel(), 'bucket': buckets.ravel()
+        })
+        hits = pd.DataFrame(
+            [(row[0], row[1], known_index[row[2]]) for row in known], columns=['band', 'bucket', 'known']
+        )
+        known_pairs = frame.merge(hits, on=['band', 'bucket'])[['key', 'known']].drop_duplicates()
+        new_pairs = frame.merge(frame, on=['band', 'bucket'], suffixes=('', '_other'))
+        new_pairs = new_pairs.loc[new_pairs['key'] < new_pairs['key_other'], ['key', 'key_other']].drop_duplicates()
+
+        # Score every candidate pair at once, rescore the likely matches exactly and keep
+        # each new key's best known match
+        best_company = np.full(len(keys), -1, dtype=np.int64)
+        best_score = np.zeros(len(keys), dtype=np.float32)
+        if len(known_pairs):
+            left, right = known_pairs['key'].to_numpy(), known_pairs['known'].to_numpy()
+            likely = pair_similarity(signatures[left], known_signatures[right]) >= self.threshold - VERIFY_MARGIN
+            left, right = left[likely], right[likely]
+            scores = np.array([trigram_similarity(keys[a], known_keys[b]) for a, b in zip(left, right)],
+                              dtype=np.float32)
+            order = np.lexsort((-scores, left))
+            left, right, scores = left[order], right[order], scores[order]
+            matched = np.r_[True, left[1:] != left[:-1]] & (scores >= self.threshold)
+            best_company[left[matched]] = known_companies[right[matched]]
+            best_score[left[matched]] = scores[matched]
+
+        # Cluster new keys that match each other; a cluster joins the company of its best-matched member
+        parent = np.arange(len(keys))
+        if len(new_pairs):
+            left, right = new_pairs['key'].to_numpy(), new_pairs['key_other'].to_numpy()
+            likely = pair_similarity(signatures[left], signatures[right]) >= self.threshold - VERIFY_MARGIN
+            for a, b in zip(left[likely], right[likely]):
+                if trigram_similarity(keys[a], keys[b]) < self.threshold:
+                    continue
+                root_a, root_b = _find(parent, a), _find(parent, b)
+                if root_a != root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+        clusters: Dict[int, List[int]] = {}
+        for i in range(len(keys)):
+            clusters.setdefault(_find(parent, i), []).append(i)
+
+        company_of = np.full(len(keys), -1, dtype=np.int64)
+        similarity = np.ones(len(keys), dtype=np.float32)
+        new_clusters = []
+        for members in clusters.values():
+            anchor = max(members, key=lambda i: best_score[i])
+            if best_company[anchor] >= 0:
+                company_of[members] = best_company[anchor]
+                similarity[members] = best_score[anchor]
+            else:
+                new_clusters.append(members)
+
+        if new_clusters:
+            # Each new company is named after the shortest spelling in its cluster
+            company_ids = [row[0] for row in conn.execute(
+                text("SELECT nextval('gdpr.companies_company_id_seq') FROM generate_series(1, :n)"),
+                {'n': len(new_clusters)}
+            )]
+            conn.execute(
+                text(
+                    "INSERT INTO gdpr.companies (company_id, canonical_name) "
+                    "SELECT * FROM unnest(CAST(:ids AS INTEGER[]), CAST(:names AS VARCHAR[]))"
+                ),
+                {
+                    'ids': company_ids,
+                    'names': [min((name for i in members for name in spellings[keys[i]]), key=len)
+                              for members in new_clusters],
+                }
+            )
+            for members, company_id in zip(new_clusters, company_ids):
+                company_of[members] = company_id
+                rep = min(members, key=lambda i: len(keys[i]))
+                similarity[members] = [trigram_similarity(keys[i], keys[rep]) for i in members]
+
+        key_ids = dict(conn.execute(
+            text(
+                "INSERT INTO gdpr.company_keys (name_key, company_id, signature) "
+                "SELECT * FROM unnest(CAST(:keys AS VARCHAR[]), CAST(:ids AS INTEGER[]), CAST(:signatures AS BYTEA[])) "
+                "RETURNING name_key, key_id"
+            ),
+            {
+                'keys': keys,
+                'ids': company_of.tolist(),
+                'signatures': [signature.tobytes() for signature in signatures],
+            }
+        ).fetchall())
+        conn.execute(
+            text(
+                "INSERT INTO gdpr.company_blocks (band, bucket, key_id) "
+                "SELECT * FROM unnest(CAST(:bands AS SMALLINT[]), CAST(:buckets AS BIGINT[]), CAST(:ids AS INTEGER[]))"
+            ),
+            {
+                'bands': bands.ravel().tolist(),
+                'buckets': buckets.ravel().tolist(),
+                'ids': np.repeat([key_ids[key] for key in keys], NUM_BANDS).tolist(),
+            }
+        )
+        return [(key, int(company_of[i]), float(similarity[i])) for i, key in enumerate(keys)]
+
+
+def resolve_companies(conn, df: pd.DataFrame, resolver: Optional[CompanyResolver] = None) -> pd.DataFrame:
+    """
+    Add a company_id column resolving each fine's company.
+
+    Args:
+        conn: SQLAlchemy connection; the caller owns the transaction
+        df: DataFrame with a company column
+        resolver: Resolver to use; defaults to CompanyResolver()
+
+    Returns:
+        DataFrame with a nullable integer company_id column
+    """
+    mapping = (resolver or CompanyResolver()).resolve(conn, df['company'])
+    df['company_id'] = df['company'].map(mapping).astype('Int64')
+    return df
+
+
+def resolve_unassigned(conn, resolver: Optional[CompanyResolver] = None) -> int:
+    """
+    Resolve the companies of stored fines that have no company_id yet.
+
+    Used after backfill merges and when the companies table is first
+    created. The caller owns the transaction.
+
+    Args:
+        conn: SQLAlchemy connection
+        resolver: Resolver to use; defaults to CompanyResolver()
+
+    Returns:
+        Number of fines assigned a company
+    """
+    names = [row[0] for row in conn.execute(
+        text("SELECT DISTINCT company FROM gdpr.fines WHERE company_id IS NULL")
+    )]
+    if not names:
+        return 0
+    (resolver or CompanyResolver()).resolve(conn, names)
+    return conn.execute(text(
+        "UPDATE gdpr.fines f SET company_id = a.company_id FROM gdpr.company_aliases a "
+        "WHERE f.company_id IS NULL AND a.alias = f.company"
+    )).rowcount
@@ -0,0 +1,246 @@
+"""
+GDPR fines API extraction.
+
+This module provides a paginated API client for the GDPR fines endpoint.
+Pages are fetched over keep-alive sessions, several at a time, with
+exponential backoff and jitter on transient failures, and optional
+since=/until= bounds so only new fines, or one date range, are pulled.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ChunkedEncodingError, ConnectionError, RequestException, Timeout
+
+from etl.instrumentation import count
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Placeholder base URL used when API_BASE_URL is not set
+PLACEHOLDER_API_URL = 'https://api.example.com'
+
+
+class APINotConfigured(RequestException):
+    """Raised instead of requesting the placeholder API URL."""
+
+
+class FinesAPIClient:
+    """Paginated client for the GDPR fines API."""
+
+    def __init__(self, base_url: str, api_key: str = '', page_size: int = 500, max_workers: int = 4,
+                 max_retries: int = 5, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 timeout: float = 10.0):
+        """
+        Initialize the API client.
+
+        Args:
+            base_url: Base URL of the GDPR fines API
+            api_key: API key for authentication
+            page_size: Number of records requested per page
+            max_workers: Maximum number of pages fetched concurrently
+            max_retries: Retries per page on transient errors
+            backoff_base: Initial backoff delay in seconds
+            backoff_max: Maximum backoff delay in seconds
+            timeout: Request timeout in seconds
+        """
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.page_size = page_size
+        self.max_workers = max(max_workers, 1)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """Keep-alive session for the calling thread."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            if self.api_key:
+                session.headers['Authorization'] = f'Bearer {self.api_key}'
+            self._local.session = session
+        return session
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Compute the delay before the next retry.
+
+        Args:
+            attempt: Zero-based retry attempt
+            retry_after: Value of a Retry-After header, if any
+
+        Returns:
+            Delay in seconds (full jitter, or the server's Retry-After)
+        """
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get(self, params: Dict[str, Any]) -> Any:
+        """
+        GET the fines endpoint, retrying transient failures.
+
+        Args:
+            params: Query parameters
+
+        Returns:
+            Decoded JSON payload
+
+        Raises:
+            APINotConfigured: base_url is the placeholder PLACEHOLDER_API_URL
+        """
+        if self.base_url == PLACEHOLDER_API_URL:
+            # Nothing answers there: fail at once rather than after every retry
+            raise APINotConfigured(f"API_BASE_URL is not configured (still {PLACEHOLDER_API_URL})")
+        url = f"{self.base_url}/fines"
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                count('bytes_fetched', len(response.content), source='api')
+                if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                    delay = self._backoff(attempt, response.headers.get('Retry-After'))
+                    logger.warning(f"API returned {response.status_code}, retrying in {delay:.2f}s")
+                    time.sleep(delay)
+                    continue
+                response.raise_for_status()
+                return response.json()
+            except (ConnectionError, ChunkedEncodingError, Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"API request failed ({e}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+        raise RequestException(f"Giving up on {url} after {self.max_retries} retries")
+
+    @staticmethod
+    def parse_page(payload: Any) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Split a page payload into records and the next cursor.
+
+        Args:
+            payload: Either a list of records or {'data': [...], 'next_cursor': ...}
+
+        Returns:
+            Tuple of (records, next cursor or None)
+        """
+        if isinstance(payload, list):
+            return payload, None
+        if isinstance(payload, dict):
+            return payload.get('data') or [], payload.get('next_cursor')
+        raise ValueError(f"Unexpected API payload of type {type(payload).__name__}")
+
+    def _params(self, since: Optional[str], until: Optional[str] = None, **extra) -> Dict[str, Any]:
+        """Build query parameters for a page request."""
+        params = {'limit': self.page_size}
+        if since:
+            params['since'] = since
+        if until:
+            params['until'] = until
+        params.update(extra)
+        return params
+
+    def iter_records(self, since: Optional[str] = None, until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream all records from the API in order.
+
+        Cursor-paginated responses are followed one page at a time.
+        Offset-paginated responses are fetched up to max_workers pages
+        ahead and yielded in order until a short page is returned. A
+        server that ignores limit/offset (a page longer than page_size,
+        or a page starting with the previous page's first record) ends
+        the stream instead of being paged forever.
+
+        Args:
+            since: Only return fines on or after this ISO date
+            until: Only return fines before this ISO date
+
+        Yields:
+            GDPR fines records
+        """
+        records, cursor = self.parse_page(self.get(self._params(since, until, offset=0)))
+        yield from records
+
+        if cursor is not None:
+            while cursor:
+                records, cursor = self.parse_page(self.get(self._params(since, until, cursor=cursor)))
+                yield from records
+            return
+
+        if len(records) < self.page_size or self._ignores_paging(records, None):
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = deque()
+            next_offset = self.page_size
+            for _ in range(self.max_workers):
+                pending.append(pool.submit(self.get, self._params(since, until, offset=next_offset)))
+                next_offset += self.page_size
+
+            while pending:
+                previous = records
+                records, _ = self.parse_page(pending.popleft().result())
+                if self._ignores_paging(records, previous):
+                    for future in pending:
+                        future.cancel()
+                    return
+                yield from records
+                if len(records) < self.page_size:
+                    for future in pending:
+                        future.cancel()
+                    return
+                pending.append(pool.submit(self.get, self._params(since, until, offset=next_offset)))
+                next_offset += self.page_size
+
+    def _ignores_paging(self, records: List[Dict[str, Any]], previous: Optional[List[Dict[str, Any]]]) -> bool:
+        """Whether a page shows the server ignoring limit (too long) or offset (a repeat)."""
+        if len(records) > self.page_size:
+            logger.warning(f"API returned {len(records)} records for a page of {self.page_size}; "
+                           f"treating it as the last page")
+            return True
+        if previous and records and records[0] == previous[0]:
+            logger.warning("API repeated the previous page; it appears to ignore offset")
+            return True
+        return False
+
+    def iter_page_range(self, first_page: int, last_page: int) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the records on pages [first_page, last_page) of an offset-paginated API.
+
+        The pages are fetched up to max_workers at a time and yielded in
+        order, stopping after the first short page.
+
+        Args:
+            first_page: Zero-based index of the first page
+            last_page: Index one past the last page
+
+        Yields:
+            GDPR fines records
+        """
+        offsets = [page * self.page_size for page in range(first_page, last_page)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for payload in pool.map(lambda offset: self.get(self._params(None, offset=offset)), offsets):
+                records, cursor = self.parse_page(payload)
+                if cursor is not None:
+                    raise ValueError("Page ranges need an offset-paginated API")
+                yield from records
+                if len(records) < self.page_size:
+                    return
@@ -0,0 +1,413 @@
+"""
+Compact in-memory fines store for analysis.
+
+FinesStore holds the collector's fines as NumPy arrays: amount as
+float64, decision date as int32 days, and country, authority, sector,
+company, article and violation type as small integer codes into label
+lists. Rows are kept in date order, so a year is a contiguous slice.
+Country, sector and cited article (parsed with etl.articles, one entry
+per fine and article) each have a precomputed index: the row numbers
+sorted by group, plus the offset at which each group starts. Filters are
+unions of index slices and per-group aggregates are np.add.reduceat /
+np.maximum.reduceat over those slices, so cells never rerun a pandas
+groupby.
+
+save() writes everything to one file: a JSON header followed by the raw
+arrays, each aligned to ALIGNMENT bytes. load() memory-maps that file,
+so opening a store reads only the header and the pages later touched.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from etl.articles import DEFAULT_LAW, LAW_ALIASES, parse_citations
+from etl.storage import COLUMN_ALIASES, ColumnarStore
+
+logger = logging.getLogger(__name__)
+
+# File signature and format version
+MAGIC = b'GDPRFST1'
+
+# Byte alignment of each array in a saved store
+ALIGNMENT = 64
+
+# Columns kept as integer codes into a label list
+CODED_COLUMNS = ('country', 'authority', 'sector', 'company', 'article_violated', 'type_of_violation')
+
+# Dimensions with a precomputed group index
+DIMENSIONS = ('country', 'year', 'sector', 'article')
+
+# Label of missing values in coded columns
+MISSING_LABEL = 'Unknown'
+
+# Aggregates returned by FinesStore.aggregate, as in db.rollups
+AGGREGATES = ('fine_count', 'total_amount', 'max_amount', 'avg_amount')
+
+# Columns read from gdpr.fines by FinesStore.from_database
+_DATABASE_COLUMNS = ('date', 'amount') + CODED_COLUMNS
+
+
+def _code_dtype(size: int) -> np.dtype:
+    """Smallest signed integer type holding codes for size labels."""
+    return np.dtype(np.int16) if size < 2 ** 15 else np.dtype(np.int32)
+
+
+def _group_index(codes: np.ndarray, size: int):
+    """Return (rows, offsets): row numbers sorted by code and where each code's rows start."""
+    rows = np.argsort(codes, kind='stable').astype(np.int32)
+    offsets = np.searchsorted(codes[rows], np.arange(size + 1)).astype(np.int64)
+    return rows, offsets
+
+
+class FinesStore:
+    """Integer-coded fines with sorted group indexes, for fast filters and aggregates."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], labels: Dict[str, List[Any]]):
+        """
+        Initialize a store from its arrays; use from_frame(), from_database(),
+        from_columnar() or load() to build one.
+
+        Args:
+            arrays: amount, date, year, one <column> code array per coded
+                column, and the <dimension>_rows / <dimension>_offsets
+                indexes (year only has offsets, as rows are in date order)
+            labels: Label list of each coded column and dimension
+        """
+        self.arrays = arrays
+        self.labels = labels
+        self._positions: Dict[str, Dict[Any, int]] = {}
+
+    # Building
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'FinesStore':
+        """
+        Build a store from a DataFrame of fines.
+
+        Accepts the collector's and database's column names
+        (article_violated, type_of_violation) or the tracker's (article,
+        type). Columns other than date, amount and CODED_COLUMNS are
+        dropped; rows without a date or amount are skipped.
+
+        Args:
+            df: Fines with at least date and amount
+
+        Returns:
+            FinesStore
+        """
+        missing = [col for col in ('date', 'amount') if col not in df.columns]
+        if missing:
+            raise ValueError(f"Missing required columns: {missing}")
+        df = df.rename(columns={v: k for k, v in COLUMN_ALIASES.items() if v in df.columns and k not in df.columns})
+
+        dates = pd.to_datetime(df['date'], errors='coerce')
+        amounts = pd.to_numeric(df['amount'], errors='coerce').astype(np.float64)
+        keep = (dates.notna() & amounts.notna()).to_numpy()
+        if not keep.all():
+            logger.warning(f"Skipping {int((~keep).sum())} fines without a date or amount")
+
+        # Date order makes every year (and any date range) a contiguous slice
+        days = dates.to_numpy()[keep].astype('datetime64[D]').astype(np.int64)
+        order = np.argsort(days, kind='stable')
+        arrays: Dict[str, np.ndarray] = {
+            'amount': amounts.to_numpy()[keep][order],
+            'date': days[order].astype(np.int32),
+        }
+        labels: Dict[str, List[Any]] = {}
+
+        for column in CODED_COLUMNS:
+            values = df[column] if column in df.columns else pd.Series(None, index=df.index, dtype=object)
+            values = values.astype('string').fillna(MISSING_LABEL).to_numpy(dtype=object)[keep][order]
+            categories, codes = np.unique(values, return_inverse=True)
+            labels[column] = categories.tolist()
+            arrays[column] = codes.astype(_code_dtype(len(categories)))
+
+        years = arrays['date'].astype('datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970
+        year_labels = np.unique(years)
+        arrays['year'] = years.astype(np.int16)
+        arrays['year_offsets'] = np.append(np.searchsorted(years, year_labels), len(years)).astype(np.int64)
+        labels['year'] = year_labels.tolist()
+
+        for dimension in ('country', 'sector'):
+            arrays[f'{dimension}_rows'], arrays[f'{dimension}_offsets'] = _group_index(
+                arrays[dimension], len(labels[dimension])
+            )
+
+        # One (fine, article) pair per cited article; each distinct citation string is parsed once
+        parsed = [sorted({(c.law, c.article) for c in parse_citations(value)})
+                  for value in labels['article_violated']]
+        article_labels = sorted({pair for pairs in parsed for pair in pairs})
+        article_codes = {pair: code for code, pair in enumerate(article_labels)}
+        citation_articles = np.array([article_codes[pair] for pairs in parsed for pair in pairs], dtype=np.int32)
+        citation_sizes = np.array([len(pairs) for pairs in parsed], dtype=np.int64)
+        citation_starts = np.concatenate(([0], np.cumsum(citation_sizes)[:-1]))
+
+        counts = citation_sizes[arrays['article_violated']]
+        pair_rows = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+        pair_firsts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        pair_positions = (np.repeat(citation_starts[arrays['article_violated']] - pair_firsts, counts)
+                          + np.arange(counts.sum()))
+        pair_codes = citation_articles[pair_positions]
+        by_article = np.lexsort((pair_rows, pair_codes))
+        arrays['article_rows'] = pair_rows[by_article]
+        arrays['article_offsets'] = np.searchsorted(
+            pair_codes[by_article], np.arange(len(article_labels) + 1)
+        ).astype(np.int64)
+        labels['article'] = [f"Art. {article} {law}" if law == DEFAULT_LAW else f"{law} {article}"
+                             for law, article in article_labels]
+        labels['article_key'] = [[law, article] for law, article in article_labels]
+
+        return cls(arrays, labels)
+
+    @classmethod
+    def from_database(cls, years: Optional[Iterable[int]] = None) -> 'FinesStore':
+        """
+        Build a store from gdpr.fines.
+
+        Args:
+            years: Only include fines decided in these years
+
+        Returns:
+            FinesStore
+        """
+        from db.init_db import execute_query
+
+        query = f"SELECT {', '.join(_DATABASE_COLUMNS)} FROM gdpr.fines"
+        params: Dict[str, Any] = {}
+        if years is not None:
+            params['years'] = [int(year) for year in years]
+            query += " WHERE EXTRACT(YEAR FROM date)::INTEGER = ANY(%(years)s)"
+        return cls.from_frame(execute_query(query, params, result_format='dataframe'))
+
+    @classmethod
+    def from_columnar(cls, store: ColumnarStore, years: Optional[Iterable[int]] = None) -> 'FinesStore':
+        """
+        Build a store from the processed 'fines' dataset of a ColumnarStore.
+
+        Args:
+            store: Columnar store written by the scraper or collector
+            years: Only include these decision years
+
+        Returns:
+            FinesStore
+        """
+        columns = ['date', 'amount'] + [COLUMN_ALIASES.get(column, column) for column in CODED_COLUMNS]
+        return cls.from_frame(store.read_frame('fines', columns=columns, years=years))
+
+    # Saving and loading
+
+    def save(self, path: str) -> int:
+        """
+        Write the store to a single file that load() can memory-map.
+
+        Args:
+            path: Target file; written next to it and renamed into place
+
+        Returns:
+            Bytes written
+        """
+        layout = {}
+        offset = 0
+        for name, array in self.arrays.items():
+            array = np.ascontiguousarray(array)
+            layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        header = json.dumps({'arrays': layout, 'labels': self.labels}).encode('utf-8')
+        data_start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, 'little'))
+            f.write(header)
+            for name, array in self.arrays.items():
+                f.seek(data_start + layout[name]['offset'])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, path)
+        logger.info(f"Saved {len(self)} fines to {path} ({data_start + offset:,} bytes)")
+        return data_start + offset
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'FinesStore':
+        """
+        Open a store written by save().
+
+        Args:
+            path: Store file
+            mmap: Memory-map the arrays read-only instead of reading them
+                into memory
+
+        Returns:
+            FinesStore
+        """
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a fines store file")
+            header_size = int.from_bytes(f.read(8), 'little')
+            header = json.loads(f.read(header_size))
+        data_start = -(-(len(MAGIC) + 8 + header_size) // ALIGNMENT) * ALIGNMENT
+
+        buffer = np.memmap(path, dtype=np.uint8, mode='r') if mmap else np.fromfile(path, dtype=np.uint8)
+        arrays = {}
+        for name, spec in header['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape'], dtype=np.int64))
+            start = data_start + spec['offset']
+            arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+        return cls(arrays, header['labels'])
+
+    # Queries
+
+    def __len__(self) -> int:
+        return len(self.arrays['amount'])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the arrays (labels excluded)."""
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def _codes(self, name: str, values: Iterable[Any]) -> List[int]:
+        """Codes of the given labels in a coded column or dimension; unknown labels are ignored."""
+        positions = self._positions.get(name)
+        if positions is None:
+            positions = self._positions[name] = {label: code for code, label in enumerate(self.labels[name])}
+        return [positions[value] for value in values if value in positions]
+
+    def _article_codes(self, articles: Iterable[Union[int, Sequence]], law: str) -> List[int]:
+        """Codes of article numbers of law, or of (law, article) pairs."""
+        keys = {(law, int(article)) if np.isscalar(article) else (LAW_ALIASES.get(article[0], article[0]), int(article[1]))
+                for article in articles}
+        return [code for code, (key_law, key_article) in enumerate(self.labels['article_key'])
+                if (key_law, key_article) in keys]
+
+    def _index(self, dimension: str):
+        """Return (rows, offsets) of a dimension; rows is None for year, whose groups are slices."""
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension '{dimension}', expected one of {DIMENSIONS}")
+        return self.arrays.get(f'{dimension}_rows'), self.arrays[f'{dimension}_offsets']
+
+    def _group_mask(self, dimension: str, codes: List[int]) -> np.ndarray:
+        """Boolean row mask of the fines in any of the given groups."""
+        rows, offsets = self._index(dimension)
+        mask = np.zeros(len(self), dtype=bool)
+        for code in codes:
+            if rows is None:
+                mask[offsets[code]:offsets[code + 1]] = True
+            else:
+                mask[rows[offsets[code]:offsets[code + 1]]] = True
+        return mask
+
+    def mask(self, years: Optional[Iterable[int]] = None, countries: Optional[Iterable[str]] = None,
+             sectors: Optional[Iterable[str]] = None, articles: Optional[Iterable[Union[int, Sequence]]] = None,
+             law: str = DEFAULT_LAW) -> Optional[np.ndarray]:
+        """
+        Select fines by year, country, sector and cited article.
+
+        Each filter is the union of its groups' index slices; filters are
+        combined with AND.
+
+        Args:
+            years: Decision years
+            countries: Country names
+            sectors: Sector names
+            articles: Article numbers of law, or (law, article) pairs
+            law: Law of plain article numbers
+
+        Returns:
+            Boolean mask over the rows, or None when no filter is given
+        """
+        selected = None
+        filters = (('year', years, lambda values: self._codes('year', [int(v) for v in values])),
+                   ('country', countries, lambda values: self._codes('country', values)),
+                   ('sector', sectors, lambda values: self._codes('sector', values)),
+                   ('article', articles, lambda values: self._article_codes(values, law)))
+        for dimension, values, to_codes in filters:
+            if values is None:
+                continue
+            group_mask = self._group_mask(dimension, to_codes(list(values)))
+            selected = group_mask if selected is None else selected & group_mask
+        return selected
+
+    def aggregate(self, by: str = 'country', order_by: str = 'total_amount', descending: bool = True,
+                  limit: Optional[int] = None, **filters: Any) -> pd.DataFrame:
+        """
+        Count and sum fines per group of a dimension.
+
+        Fines citing several articles count once for each when grouping
+        by article, as in db.fine_articles.article_stats.
+
+        Args:
+            by: One of DIMENSIONS
+            order_by: One of AGGREGATES, or None to keep group order
+            descending: Sort in descending order
+            limit: Maximum number of groups to return
+            **filters: Filters accepted by mask()
+
+        Returns:
+            DataFrame indexed by group with fine_count, total_amount,
+            max_amount and avg_amount; groups without fines are left out
+        """
+        if order_by is not None and order_by not in AGGREGATES:
+            raise ValueError(f"Unknown sort key '{order_by}', expected one of {AGGREGATES}")
+        rows, offsets = self._index(by)
+        amounts = self.arrays['amount'] if rows is None else self.arrays['amount'][rows]
+        selected = self.mask(**filters)
+        included = None
+        if selected is not None:
+            included = selected if rows is None else selected[rows]
+            amounts = np.where(included, amounts, 0.0)
+
+        starts = offsets[:-1]
+        if included is None:
+            counts = np.diff(offsets)
+        else:
+            counts = np.diff(np.concatenate(([0], np.cumsum(included, dtype=np.int64)))[offsets])
+        present = np.flatnonzero(counts)
+        # reduceat over the non-empty groups only: an empty group would otherwise yield its neighbour's first value
+        group_starts = starts[present]
+        totals = np.add.reduceat(amounts, group_starts) if len(present) else np.empty(0)
+        maxima_input = amounts if included is None else np.where(included, amounts, -np.inf)
+        maxima = np.maximum.reduceat(maxima_input, group_starts) if len(present) else np.empty(0)
+
+        result = pd.DataFrame({
+            'fine_count': counts[present],
+            'total_amount': totals,
+            'max_amount': maxima,
+            'avg_amount': totals / counts[present],
+        }, index=pd.Index([self.labels[by][code] for code in present], name=by))
+        if order_by is not None:
+            result = result.sort_values(order_by, ascending=not descending, kind='stable')
+        return result.head(limit) if limit is not None else result
+
+    def frame(self, columns: Optional[Sequence[str]] = None, **filters: Any) -> pd.DataFrame:
+        """
+        Materialise selected fines as a DataFrame.
+
+        Coded columns come back as pandas categoricals built from the
+        codes without decoding the strings.
+
+        Args:
+            columns: Columns to return (date, amount, year and CODED_COLUMNS by default)
+            **filters: Filters accepted by mask()
+
+        Returns:
+            DataFrame of fines in date order
+        """
+        columns = list(columns or ('date', 'amount', 'year') + CODED_COLUMNS)
+        selected = self.mask(**filters)
+        data = {}
+        for column in columns:
+            values = self.arrays[column] if selected is None else self.arrays[column][selected]
+            if column in CODED_COLUMNS:
+                data[column] = pd.Categorical.from_codes(values, categories=self.labels[column])
+            elif column == 'date':
+                data[column] = values.astype('datetime64[D]').astype('datetime64[ns]')
+            else:
+                data[column] = np.asarray(values)
+        return pd.DataFrame(data)
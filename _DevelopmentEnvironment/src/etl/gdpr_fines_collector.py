@@ -6,47 +6,123 @@ This script collects GDPR fines data from external sources, validates it,
 and loads it into the database.
 """
 
+import argparse
 import os
 import sys
 import logging
 import json
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Any, Optional
 
+import ijson
 import pandas as pd
-import requests
 from requests.exceptions import RequestException
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 
-# Add parent directory to path to allow importing from sibling modules
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from db.init_db import DB_CONFIG, check_connection
+from db.config import load_environment
+from db.init_db import check_connection
+from db.cache import bump_table_version, ensure_change_notifications
+from db.pool import get_engine
+from db.rollups import ensure_rollups, refresh_rollups
+from db.companies import ensure_companies
+from db.fine_articles import ensure_fine_articles
+from db.search import ensure_search
+from etl.articles import link_fine_articles, rebuild_fine_articles
+from etl.entities import CompanyResolver, resolve_companies, resolve_unassigned
+from etl.extract import PLACEHOLDER_API_URL, FinesAPIClient
+from etl.instrumentation import count_rows, instrumented_run, timed, timed_iter
+from etl.validation import RuleSet, ValidationResult, default_rules
+from etl.normalize import normalize_dates, normalize_frame
+from etl.storage import TRACKER_ALIASES, ColumnarStore
+from etl.loaders import DEFAULT_CHUNK_SIZE, KEY_COLUMN, LOAD_STRATEGIES, assign_fine_keys, load_frame, upsert_frame
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
 logger = logging.getLogger(__name__)
 
-# Database connection string
-db_url = f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
+def batched(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Group a stream of records into lists of at most size records.
+    
+    Args:
+        records: Iterable of records
+        size: Maximum number of records per batch
+        
+    Yields:
+        Lists of records
+    """
+    iterator = iter(records)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
 
 class GDPRFinesCollector:
     """Collects and processes GDPR fines data."""
     
-    def __init__(self, api_url: Optional[str] = None, api_key: Optional[str] = None):
+    def __init__(self, api_url: Optional[str] = None, api_key: Optional[str] = None,
+                 load_strategy: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 incremental: bool = True, api_client: Optional[FinesAPIClient] = None,
+                 rules: Optional[RuleSet] = None, link_articles: bool = True,
+                 resolve_entities: bool = True, page_size: Optional[int] = None,
+                 upsert: bool = True):
         """
         Initialize the GDPR fines collector.
         
         Args:
             api_url: URL for the GDPR fines API
             api_key: API key for authentication
+            load_strategy: One of 'copy', 'multi' or 'executemany'; defaults to
+                'copy' when the engine is psycopg2-backed
+            chunk_size: Number of rows sent to the database per chunk
+            incremental: Only fetch the fines since the last load; a full
+                run fetches every fine and still upserts them
+            api_client: Paginated API client; built from api_url and api_key
+                when not given
+            rules: Validation rules; defaults to default_rules() with the
+                country whitelist from gdpr.countries
+            link_articles: Parse article citations of loaded fines into
+                gdpr.fine_articles
+            resolve_entities: Resolve each fine's company to a
+                gdpr.companies entity before loading
+            page_size: Records per API page (defaults to API_PAGE_SIZE);
+                ignored when api_client is given
+            upsert: Upsert on the natural key and skip unchanged rows
+                instead of appending every record, which only suits an
+                empty table
         """
-        self.api_url = api_url or os.getenv('API_BASE_URL', 'https://api.example.com')
+        load_environment()
+        self.api_url = api_url or os.getenv('API_BASE_URL', PLACEHOLDER_API_URL)
         self.api_key = api_key or os.getenv('API_KEY', '')
-        self.engine = create_engine(db_url)
+        self.engine = get_engine()
+        
+        # Bulk load settings (None lets the loader pick COPY for psycopg2)
+        self.load_strategy = load_strategy or os.getenv('LOAD_STRATEGY') or None
+        if self.load_strategy is not None and self.load_strategy not in LOAD_STRATEGIES:
+            raise ValueError(f"Unknown load strategy '{self.load_strategy}', expected one of {LOAD_STRATEGIES}")
+        self.chunk_size = chunk_size
+        self.incremental = incremental
+        self.upsert = upsert
+        self.link_articles = link_articles
+        self.resolve_entities = resolve_entities
+        self.resolver = CompanyResolver(float(os.getenv('COMPANY_MATCH_THRESHOLD', '0.55')))
+        self._schema_ready = False
+        self._source = None
+        self.rules = rules
+        self.last_validation: Optional[ValidationResult] = None
+        self.validation_failures: Dict[str, int] = {}
+        self.api_client = api_client or FinesAPIClient(
+            self.api_url,
+            self.api_key,
+            page_size=page_size or int(os.getenv('API_PAGE_SIZE', '500')),
+            max_workers=int(os.getenv('API_MAX_WORKERS', '4'))
+        )
+        
+        # Columnar store shared with the scraper (raw snapshots and offline fallback)
+        self.store = ColumnarStore(
+            os.getenv('FINES_STORE_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../data/store'),
+            file_format=os.getenv('FINES_STORE_FORMAT', 'parquet')
+        )
         
         # For demo purposes, we'll use a sample file if available
         self.sample_file = os.path.join(
@@ -54,31 +130,169 @@ class GDPRFinesCollector:
             '../../data/sample_gdpr_fines.json'
         )
         
+    @timed('fetch')
     def fetch_data(self) -> List[Dict[str, Any]]:
         """
         Fetch GDPR fines data from the API or sample file.
         
+        Records fetched from the API are merged into the columnar store's
+        snapshot so later runs and analyses can read them offline.
+        
         Returns:
             List of GDPR fines data
         """
+        records = list(self.iter_records())
+        if records and self._source == 'api':
+            self._snapshot(records, mode='merge')
+        return records
+    
+    def _snapshot(self, records: List[Dict[str, Any]], mode: str) -> bool:
+        """
+        Write API records to the store's raw snapshot without failing the run.
+        
+        Args:
+            records: Records fetched from the API
+            mode: 'merge' to replace stored fines with the same key, or
+                'append' for chunks that are deduplicated at the end of the run
+            
+        Returns:
+            True if the records were written
+        """
+        try:
+            self.store.write('raw', records, mode=mode)
+            return True
+        except Exception as e:
+            logger.warning(f"Could not snapshot fines to {self.store.path('raw')}: {e}")
+            return False
+    
+    def get_watermark(self) -> Optional[str]:
+        """
+        Get the date of the most recent fine already loaded.
+        
+        Returns:
+            ISO date of the latest fine, or None if nothing is loaded yet
+        """
+        try:
+            self._ensure_schema()
+            with self.engine.connect() as conn:
+                latest = conn.execute(text("SELECT MAX(date) FROM gdpr.fines")).scalar()
+        except Exception as e:
+            logger.warning(f"Could not read load watermark: {e}")
+            return None
+        return latest.isoformat() if latest else None
+    
+    def iter_records(self, since: Optional[str] = None, until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream GDPR fines records from the API or sample file.
+        
+        API pages are fetched concurrently and retried with backoff; the
+        sample file is parsed incrementally. Either way only a bounded
+        number of records is held in memory.
+        
+        Args:
+            since: Only fetch fines on or after this ISO date
+            until: Only fetch fines before this ISO date
+            
+        Yields:
+            GDPR fines records
+        """
         try:
             # Try to fetch from API first
-            headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
-            response = requests.get(f"{self.api_url}/fines", headers=headers, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except (RequestException, json.JSONDecodeError) as e:
+            records = self.api_client.iter_records(since=since, until=until)
+            first = next(records, None)
+        except (RequestException, ValueError) as e:
             logger.warning(f"Failed to fetch data from API: {e}")
+            yield from self._filter_dates(self._iter_fallback_records(), since, until)
+            return
+        
+        self._source = 'api'
+        if first is not None:
+            yield first
+            yield from records
+    
+    def iter_page_range(self, first_page: int, last_page: int) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the records on API pages [first_page, last_page).
+        
+        Without the API the same slice of the fallback records is used,
+        with API_PAGE_SIZE records per page.
+        
+        Args:
+            first_page: Zero-based index of the first page
+            last_page: Index one past the last page
             
-            # Fall back to sample file for demo purposes
-            if os.path.exists(self.sample_file):
-                logger.info(f"Using sample data from {self.sample_file}")
-                with open(self.sample_file, 'r') as f:
-                    return json.load(f)
+        Yields:
+            GDPR fines records
+        """
+        try:
+            records = self.api_client.iter_page_range(first_page, last_page)
+            first = next(records, None)
+        except (RequestException, ValueError) as e:
+            logger.warning(f"Failed to fetch pages {first_page}-{last_page - 1} from API: {e}")
+            page_size = self.api_client.page_size
+            yield from islice(self._iter_fallback_records(), first_page * page_size, last_page * page_size)
+            return
+        
+        self._source = 'api'
+        if first is not None:
+            yield first
+            yield from records
+    
+    def _filter_dates(self, records: Iterable[Dict[str, Any]], since: Optional[str],
+                      until: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Apply the API's since=/until= bounds to fallback records.
+        
+        Dates are parsed a chunk at a time; when a bound is given, records
+        whose date can't be parsed are dropped.
+        
+        Args:
+            records: GDPR fines records
+            since: Only keep fines on or after this ISO date
+            until: Only keep fines before this ISO date
             
-            # Generate a minimal sample if no sample file
-            logger.warning("No sample file found, generating minimal sample data")
-            return self._generate_sample_data()
+        Yields:
+            Records within the bounds
+        """
+        if not since and not until:
+            yield from records
+            return
+        for batch in batched(records, self.chunk_size):
+            dates = normalize_dates(pd.Series([record.get('date') for record in batch], dtype=object))
+            keep = dates.notna()
+            if since:
+                keep &= dates >= pd.Timestamp(since)
+            if until:
+                keep &= dates < pd.Timestamp(until)
+            yield from (record for record, kept in zip(batch, keep.to_numpy()) if kept)
+    
+    def _iter_fallback_records(self) -> Iterator[Dict[str, Any]]:
+        """
+        Stream records from the columnar store, the sample file, or a
+        generated sample.
+        
+        Yields:
+            GDPR fines records
+        """
+        if self.store.exists('raw'):
+            logger.info(f"Using stored data from {self.store.path('raw')}")
+            self._source = 'store'
+            # The store keeps the tracker's field names (article, type, source)
+            for record in self.store.iter_records('raw', batch_size=self.chunk_size):
+                yield {TRACKER_ALIASES.get(field, field): value for field, value in record.items()}
+            return
+        
+        self._source = 'sample'
+        # Fall back to sample file for demo purposes
+        if os.path.exists(self.sample_file):
+            logger.info(f"Using sample data from {self.sample_file}")
+            with open(self.sample_file, 'rb') as f:
+                yield from ijson.items(f, 'item', use_float=True)
+            return
+        
+        # Generate a minimal sample if no sample file
+        logger.warning("No sample file found, generating minimal sample data")
+        yield from self._generate_sample_data()
     
     def _generate_sample_data(self) -> List[Dict[str, Any]]:
         """
@@ -110,6 +324,7 @@ class GDPRFinesCollector:
             }
         ]
     
+    @timed('validate')
     def validate_data(self, data: List[Dict[str, Any]]) -> pd.DataFrame:
         """
         Validate and clean the GDPR fines data.
@@ -129,24 +344,46 @@ class GDPRFinesCollector:
         if missing_columns:
             raise ValueError(f"Missing required columns: {missing_columns}")
         
-        # Validate data types and formats
-        if 'amount' in df.columns:
-            df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
-            
-        if 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'], errors='coerce')
+        # Normalise amounts, dates and country names before the rules run
+        df = normalize_frame(df)
         
-        # Filter out invalid records
-        invalid_amount = df['amount'].isna()
-        invalid_date = df['date'].isna()
+        # Evaluate all rules in one pass and quarantine rejected records
+        if self.rules is None:
+            countries = self._load_country_whitelist()
+            rules = default_rules(countries)
+            # Without the whitelist, rebuild the rules next time so the country check comes back with the DB
+            if countries is not None:
+                self.rules = rules
+        else:
+            rules = self.rules
+        result = rules.evaluate(df)
+        self.last_validation = result
+        count_rows('validate', len(df), len(result.valid))
         
-        if invalid_amount.any() or invalid_date.any():
-            invalid_count = (invalid_amount | invalid_date).sum()
-            logger.warning(f"Dropped {invalid_count} invalid records")
-            df = df[~(invalid_amount | invalid_date)]
+        for name, count in result.failures.items():
+            self.validation_failures[name] = self.validation_failures.get(name, 0) + count
+            if count:
+                logger.warning(f"Rule {name}: {count} failing records")
+        if result.rejected:
+            logger.warning(f"Quarantined {result.rejected} invalid records")
         
-        return df
+        return result.valid
+    
+    def _load_country_whitelist(self) -> Optional[List[str]]:
+        """
+        Load the country whitelist from gdpr.countries.
+        
+        Returns:
+            List of country names, or None if the table cannot be read
+        """
+        try:
+            with self.engine.connect() as conn:
+                return [row[0] for row in conn.execute(text("SELECT name FROM gdpr.countries"))]
+        except Exception as e:
+            logger.warning(f"Country whitelist unavailable, skipping country check: {e}")
+            return None
     
+    @timed('transform')
     def transform_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Transform the GDPR fines data.
@@ -164,12 +401,66 @@ class GDPRFinesCollector:
         if 'date' in df.columns:
             df['date'] = pd.to_datetime(df['date']).dt.date
         
+        # Add natural key and content hash for incremental loads
+        df = assign_fine_keys(df)
+        
         # Add processing timestamp
         df['created_at'] = datetime.now()
         df['updated_at'] = datetime.now()
         
         return df
     
+    def _ensure_schema(self):
+        """Create the gdpr schema, fines table, natural key index, rollups, article links, search and companies if missing."""
+        if self._schema_ready:
+            return
+        
+        # Check if table exists, if not create schema and table first
+        with self.engine.connect() as conn:
+            conn.execute(text("CREATE SCHEMA IF NOT EXISTS gdpr"))
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS gdpr.fines (
+                    id SERIAL PRIMARY KEY,
+                    country VARCHAR(100) NOT NULL,
+                    authority VARCHAR(200),
+                    company VARCHAR(200) NOT NULL,
+                    amount NUMERIC(20, 2) NOT NULL,
+                    date DATE NOT NULL,
+                    controller_processor VARCHAR(50),
+                    article_violated VARCHAR(100),
+                    type_of_violation TEXT,
+                    source_url TEXT,
+                    summary TEXT,
+                    sector VARCHAR(200),
+                    fine_key VARCHAR(64),
+                    row_hash BIGINT,
+                    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+                )
+            """))
+            conn.execute(text("ALTER TABLE gdpr.fines ADD COLUMN IF NOT EXISTS fine_key VARCHAR(64)"))
+            conn.execute(text("ALTER TABLE gdpr.fines ADD COLUMN IF NOT EXISTS row_hash BIGINT"))
+            conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_fines_fine_key ON gdpr.fines(fine_key)"
+            ))
+            conn.commit()
+        
+        # Rollup tables and the triggers that track which groups each load touches
+        ensure_rollups()
+        # Article link table, filled for fines loaded before it existed
+        if ensure_fine_articles():
+            rebuild_fine_articles(self.engine)
+        # Generated full-text search column and its indexes
+        ensure_search()
+        # Company entities, resolved for fines loaded before the tables existed
+        if ensure_companies():
+            with self.engine.begin() as conn:
+                resolve_unassigned(conn, self.resolver)
+        # Triggers that tell query caches in other processes about our writes
+        ensure_change_notifications()
+        self._schema_ready = True
+    
+    @timed('load')
     def load_data(self, df: pd.DataFrame) -> int:
         """
         Load the GDPR fines data into the database.
@@ -181,84 +472,173 @@ class GDPRFinesCollector:
             Number of records loaded
         """
         try:
-            # Check if table exists, if not create schema and table first
-            with self.engine.connect() as conn:
-                conn.execute(text("CREATE SCHEMA IF NOT EXISTS gdpr"))
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS gdpr.fines (
-                        id SERIAL PRIMARY KEY,
-                        country VARCHAR(100) NOT NULL,
-                        authority VARCHAR(200),
-                        company VARCHAR(200) NOT NULL,
-                        amount NUMERIC(20, 2) NOT NULL,
-                        date DATE NOT NULL,
-                        controller_processor VARCHAR(50),
-                        article_violated VARCHAR(100),
-                        type_of_violation TEXT,
-                        source_url TEXT,
-                        summary TEXT,
-                        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-                    )
-                """))
-                conn.commit()
+            self._ensure_schema()
                 
-            # Load data to database
-            records_loaded = df.to_sql(
-                'fines', 
-                self.engine, 
-                schema='gdpr',
-                if_exists='append',
-                index=False,
-                method='multi'
-            )
+            if self.upsert:
+                # Upsert new and changed records only
+                counts = upsert_frame(
+                    self.engine,
+                    df,
+                    'fines',
+                    schema='gdpr',
+                    strategy=self.load_strategy,
+                    chunk_size=self.chunk_size
+                )
+                records_loaded = counts['inserted'] + counts['updated']
+            else:
+                # Append all records in chunks
+                records_loaded = load_frame(
+                    self.engine,
+                    df,
+                    'fines',
+                    schema='gdpr',
+                    strategy=self.load_strategy,
+                    chunk_size=self.chunk_size
+                )
+            count_rows('load', len(df), records_loaded)
             
+            if records_loaded:
+                bump_table_version('gdpr.fines')
+                if self.link_articles:
+                    self.link_fine_articles(df)
             logger.info(f"Successfully loaded {records_loaded} records")
             return records_loaded
         except Exception as e:
             logger.error(f"Error loading data to database: {e}")
             raise
     
+    @timed('resolve_companies')
+    def resolve_companies(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Resolve each fine's company to a gdpr.companies entity.
+        
+        Known spellings are looked up in the alias index; only new
+        spellings are matched, against the companies in their LSH
+        buckets, so each chunk is resolved incrementally.
+        
+        Args:
+            df: DataFrame with transformed data
+            
+        Returns:
+            DataFrame with a company_id column
+        """
+        if not self.resolve_entities or df.empty or 'company' not in df.columns:
+            return df
+        self._ensure_schema()
+        with self.engine.begin() as conn:
+            df = resolve_companies(conn, df, self.resolver)
+        for table in ('gdpr.companies', 'gdpr.company_aliases', 'gdpr.company_keys'):
+            bump_table_version(table)
+        return df
+    
+    @timed('link_articles')
+    def link_fine_articles(self, df: pd.DataFrame) -> int:
+        """
+        Link the loaded fines to their article citations in gdpr.fine_articles.
+        
+        Only the distinct article_violated values of the batch are parsed,
+        and the links are written with one DELETE and one INSERT ... SELECT.
+        
+        Args:
+            df: DataFrame of loaded fines with fine_key and article_violated
+            
+        Returns:
+            Number of links written
+        """
+        if df.empty or KEY_COLUMN not in df.columns or 'article_violated' not in df.columns:
+            return 0
+        with self.engine.begin() as conn:
+            linked = link_fine_articles(conn, df['article_violated'], keys=df[KEY_COLUMN].tolist())
+        bump_table_version('gdpr.fine_articles')
+        logger.debug(f"Linked {len(df)} fines to {linked} article citations")
+        return linked
+    
     def run_etl(self) -> bool:
         """
         Run the full ETL process.
         
+        Stage timings, row counts and database round trips are logged as
+        JSON at the end of the run and, with ETL_METRICS_DIR set, written
+        as a Prometheus textfile; ETL_PROFILE captures profiles of the run.
+        Records fetched from the API are added to the store's raw snapshot.
+        
         Returns:
             True if successful, False otherwise
         """
-        try:
-            # Check database connection
-            if not check_connection():
-                raise RuntimeError("Database connection failed")
+        with instrumented_run('collector') as run:
+            try:
+                # Check database connection
+                if not check_connection():
+                    raise RuntimeError("Database connection failed")
+                    
+                # Only pull fines since the last load in incremental mode
+                since = self.get_watermark() if self.incremental else None
                 
-            # Extract
-            logger.info("Fetching GDPR fines data...")
-            raw_data = self.fetch_data()
-            logger.info(f"Fetched {len(raw_data)} records")
-            
-            # Validate
-            logger.info("Validating data...")
-            validated_df = self.validate_data(raw_data)
-            
-            # Transform
-            logger.info("Transforming data...")
-            transformed_df = self.transform_data(validated_df)
-            
-            # Load
-            logger.info("Loading data to database...")
-            self.load_data(transformed_df)
-            
-            logger.info("ETL process completed successfully")
-            return True
-        except Exception as e:
-            logger.error(f"ETL process failed: {e}")
-            return False
+                # Extract, validate, transform and load one chunk at a time
+                logger.info(f"Streaming GDPR fines data{f' since {since}' if since else ''}...")
+                fetched = validated = loaded = 0
+                snapshotted = False
+                records_stream = self.iter_records(since=since)
+                chunks = timed_iter('fetch', batched(records_stream, self.chunk_size))
+                for chunk_num, records in enumerate(chunks, start=1):
+                    count_rows('fetch', len(records), len(records))
+                    if self._source == 'api':
+                        snapshotted = self._snapshot(records, mode='append') or snapshotted
+                    validated_df = self.validate_data(records)
+                    transformed_df = self.transform_data(validated_df)
+                    resolved_df = self.resolve_companies(transformed_df)
+                    chunk_loaded = self.load_data(resolved_df)
+                    
+                    fetched += len(records)
+                    validated += len(validated_df)
+                    loaded += chunk_loaded
+                    logger.info(
+                        f"Chunk {chunk_num}: fetched {len(records)}, "
+                        f"valid {len(validated_df)}, loaded {chunk_loaded}"
+                    )
+                
+                logger.info(f"Fetched {fetched} records, {validated} valid, {loaded} loaded")
+                
+                # Fines fetched again replace their earlier snapshot
+                if snapshotted:
+                    try:
+                        self.store.deduplicate('raw')
+                    except Exception as e:
+                        logger.warning(f"Could not compact the snapshot in {self.store.path('raw')}: {e}")
+                
+                # Bring the aggregate rollups up to date with this load
+                if loaded:
+                    try:
+                        with timed('refresh_rollups'):
+                            refresh_rollups()
+                    except Exception as e:
+                        logger.warning(f"Rollup refresh failed, it will catch up on the next run: {e}")
+                logger.info("ETL process completed successfully")
+                return True
+            except Exception as e:
+                logger.error(f"ETL process failed: {e}")
+                run.mark_failed()
+                return False
 
-def main():
+def main(argv: Optional[List[str]] = None, prog: Optional[str] = None):
     """
     Main function to run the ETL process.
+    
+    Args:
+        argv: Command line arguments (sys.argv[1:] by default)
+        prog: Program name shown in the usage message
     """
-    collector = GDPRFinesCollector()
+    parser = argparse.ArgumentParser(prog=prog, description='Load new GDPR fines into the database')
+    parser.add_argument('--full', action='store_true',
+                        help='Fetch and upsert every fine instead of only those since the last load')
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    collector = GDPRFinesCollector(incremental=not args.full)
     success = collector.run_etl()
     
     if success:
@@ -0,0 +1,432 @@
+"""
+Pipeline instrumentation.
+
+The collector and the scraper time their stages (fetch, validate,
+transform, load, scrape_page, process_row, ...) with timed(), which works
+as a context manager and as a decorator on plain and async functions, and
+count rows in and out of each stage, bytes fetched and database round
+trips. A run wrapped in instrumented_run() then writes its metrics as a
+Prometheus textfile (ETL_METRICS_DIR, for the node_exporter textfile
+collector) and logs them as one JSON line. ETL_METRICS=off turns timing
+and counting into no-ops that don't even read the clock, for hot loops
+where the bookkeeping would show.
+
+Setting ETL_PROFILE to 'cpu', 'memory' or 'cpu,memory' additionally
+captures a cProfile profile and/or a tracemalloc snapshot of that run in
+ETL_PROFILE_DIR. Profiling only sees the main thread, and tracemalloc
+slows Python-heavy stages down several times over, so leave it off for
+scheduled runs.
+"""
+
+import asyncio
+import cProfile
+import functools
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import ContextDecorator, contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Prefix of every exported metric
+METRIC_PREFIX = 'gdpr_etl'
+
+# Capture modes accepted in ETL_PROFILE
+PROFILE_MODES = ('cpu', 'memory')
+
+# Number of entries in the text summaries written next to the profiles
+PROFILE_TOP = 40
+
+# Help text of the known counters, exported as last-run gauges
+COUNTER_HELP = {
+    'rows_in': 'Rows entering each stage in the last run',
+    'rows_out': 'Rows leaving each stage in the last run',
+    'rows_dropped': 'Rows dropped (rejected, unchanged or unparseable) by each stage in the last run',
+    'bytes_fetched': 'Bytes received from each source in the last run',
+}
+
+
+def metrics_enabled() -> bool:
+    """
+    Whether stage timings and counters are recorded, from ETL_METRICS (on by default).
+
+    Returns:
+        False when ETL_METRICS is '0', 'false', 'no' or 'off'
+    """
+    return os.getenv('ETL_METRICS', '').strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+class RunMetrics:
+    """Thread-safe stage timings and counters of the current run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear all timings and counters and start a new run, re-reading ETL_METRICS."""
+        with self._lock:
+            self.enabled = metrics_enabled()
+            self.started = time.time()
+            self.success = True
+            self.stages: Dict[str, Dict[str, float]] = {}
+            self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    def observe(self, stage: str, seconds: float, round_trips: int = 0):
+        """Record one call of a stage."""
+        with self._lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'round_trips': 0}
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            stats['round_trips'] += round_trips
+
+    def count(self, name: str, value: float = 1, **labels: Any):
+        """Add value to the counter name with the given labels."""
+        key = (name, tuple(sorted((label, str(label_value)) for label, label_value in labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def mark_failed(self):
+        """Record that the run failed."""
+        self.success = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return the run's metrics as a dictionary.
+
+        Returns:
+            Dictionary with started, duration_seconds, success, stages
+            (calls, seconds, max_seconds and round_trips per stage) and
+            counters (name, labels and value)
+        """
+        with self._lock:
+            return {
+                'started': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+                'duration_seconds': round(time.time() - self.started, 6),
+                'success': self.success,
+                'stages': {stage: dict(stats) for stage, stats in self.stages.items()},
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+            }
+
+
+run_metrics = RunMetrics()
+
+
+def _round_trips() -> int:
+    """Statements sent through the shared connection pool so far (0 if it was never imported)."""
+    pool = sys.modules.get('db.pool')
+    return pool.metrics.round_trips if pool is not None else 0
+
+
+class timed(ContextDecorator):
+    """
+    Time a pipeline stage.
+
+    Use as ``with timed('load'):`` or as ``@timed('load')`` on a function
+    or coroutine function. Each call adds its wall time, and the database
+    round trips made meanwhile, to the stage in run_metrics; stages may
+    nest, so 'load' includes the time of 'link_articles'. Nothing is
+    measured while metrics are disabled.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def _recreate_cm(self):
+        # A fresh timer per call, so concurrent calls don't share a start time
+        return timed(self.stage)
+
+    def __enter__(self):
+        if not run_metrics.enabled:
+            self._start = None
+            return self
+        self._round_trips = _round_trips()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._start is None:
+            return False
+        seconds = time.perf_counter() - self._start
+        round_trips = _round_trips() - self._round_trips
+        run_metrics.observe(self.stage, seconds, round_trips)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps({
+                'event': 'stage', 'stage': self.stage, 'seconds': round(seconds, 6),
+                'round_trips': round_trips, 'error': exc_info[0] is not None
+            }))
+        return False
+
+    def __call__(self, func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self._recreate_cm():
+                    return await func(*args, **kwargs)
+            return wrapper
+        return super().__call__(func)
+
+
+def timed_iter(stage: str, iterable: Iterable[Any]) -> Iterator[Any]:
+    """
+    Time the work done producing each item of a lazy iterable.
+
+    Streams fetch as they are consumed, so wrapping one attributes the
+    time spent waiting for the next item to stage rather than to whatever
+    consumes it.
+
+    Args:
+        stage: Stage name
+        iterable: Iterable to time
+
+    Yields:
+        The iterable's items
+    """
+    if not run_metrics.enabled:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        with timed(stage):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def count(name: str, value: float = 1, **labels: Any):
+    """
+    Add value to a counter of the current run.
+
+    Args:
+        name: Counter name, e.g. 'bytes_fetched'
+        value: Amount to add
+        **labels: Label values, e.g. source='api'
+    """
+    if run_metrics.enabled:
+        run_metrics.count(name, value, **labels)
+
+
+def count_rows(stage: str, rows_in: int, rows_out: int):
+    """
+    Count the rows entering and leaving a stage; the difference is counted as dropped.
+
+    Args:
+        stage: Stage name
+        rows_in: Rows the stage received
+        rows_out: Rows the stage passed on (or wrote)
+    """
+    if not run_metrics.enabled:
+        return
+    run_metrics.count('rows_in', rows_in, stage=stage)
+    run_metrics.count('rows_out', rows_out, stage=stage)
+    run_metrics.count('rows_dropped', max(rows_in - rows_out, 0), stage=stage)
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    """Format labels for the Prometheus text format."""
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def prometheus_text(job: str, snapshot: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Render the run's metrics in the Prometheus text exposition format.
+
+    Everything is exported as a gauge describing the last run, as the
+    textfile collector expects of batch jobs.
+
+    Args:
+        job: Value of the job label, e.g. 'collector' or 'scraper'
+        snapshot: run_metrics.snapshot() to render; the current run by default
+
+    Returns:
+        Metrics text ending in a newline
+    """
+    snapshot = snapshot or run_metrics.snapshot()
+    lines: List[str] = []
+
+    def gauge(name: str, help_text: str, samples: List[Tuple[Dict[str, Any], float]]):
+        metric = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        for labels, value in samples:
+            lines.append(f"{metric}{_labels({'job': job, **labels})} {value!r}")
+
+    gauge('last_run_timestamp_seconds', 'Start time of the last run',
+          [({}, float(datetime.fromisoformat(snapshot['started']).timestamp()))])
+    gauge('last_run_duration_seconds', 'Wall time of the last run', [({}, snapshot['duration_seconds'])])
+    gauge('last_run_success', 'Whether the last run succeeded', [({}, float(snapshot['success']))])
+
+    stages = sorted(snapshot['stages'].items())
+    gauge('stage_seconds', 'Wall time spent in each stage in the last run',
+          [({'stage': stage}, stats['seconds']) for stage, stats in stages])
+    gauge('stage_max_seconds', 'Longest single call of each stage in the last run',
+          [({'stage': stage}, stats['max_seconds']) for stage, stats in stages])
+    gauge('stage_calls', 'Calls of each stage in the last run',
+          [({'stage': stage}, float(stats['calls'])) for stage, stats in stages])
+    gauge('stage_db_round_trips', 'Database statements sent during each stage in the last run',
+          [({'stage': stage}, float(stats['round_trips'])) for stage, stats in stages])
+
+    by_name: Dict[str, List[Tuple[Dict[str, Any], float]]] = {}
+    for counter in snapshot['counters']:
+        by_name.setdefault(counter['name'], []).append((counter['labels'], float(counter['value'])))
+    for name, samples in by_name.items():
+        gauge(name, COUNTER_HELP.get(name, f"{name} in the last run"), samples)
+
+    return '\n'.join(lines) + '\n'
+
+
+def write_textfile(job: str, directory: Optional[str] = None) -> Optional[str]:
+    """
+    Write the run's metrics to <directory>/gdpr_<job>.prom.
+
+    The file is written next to its final name and renamed over it, so
+    the textfile collector never reads a partial file.
+
+    Args:
+        job: Job name, used for the file name and the job label
+        directory: Target directory; ETL_METRICS_DIR by default
+
+    Returns:
+        Path written, or None when no directory is configured
+    """
+    directory = directory or os.getenv('ETL_METRICS_DIR')
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"gdpr_{job}.prom")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(prometheus_text(job))
+    os.replace(tmp_path, path)
+    return path
+
+
+def log_summary(job: str):
+    """Log the run's metrics as one JSON line."""
+    logger.info(json.dumps({'event': 'run', 'job': job, **run_metrics.snapshot()}))
+
+
+def profile_modes() -> Tuple[str, ...]:
+    """
+    Parse ETL_PROFILE into capture modes.
+
+    Returns:
+        Tuple of modes from PROFILE_MODES ('all' selects every mode)
+    """
+    value = os.getenv('ETL_PROFILE', '').strip().lower()
+    if not value or value in ('0', 'false', 'no', 'off'):
+        return ()
+    if value in ('1', 'true', 'yes', 'on', 'all'):
+        return PROFILE_MODES
+    modes = tuple(mode.strip() for mode in value.split(',') if mode.strip())
+    unknown = [mode for mode in modes if mode not in PROFILE_MODES]
+    if unknown:
+        raise ValueError(f"Unknown ETL_PROFILE mode(s) {unknown}, expected any of {PROFILE_MODES}")
+    return modes
+
+
+@contextmanager
+def profiled(name: str, modes: Optional[Iterable[str]] = None, directory: Optional[str] = None) -> Iterator[None]:
+    """
+    Capture a CPU profile and/or allocation snapshot of a block.
+
+    Writes <name>-<timestamp>.prof (open with pstats or snakeviz) and a
+    -cpu.txt summary for 'cpu', and <name>-<timestamp>.tracemalloc (load
+    with tracemalloc.Snapshot.load) and a -memory.txt summary for 'memory'.
+
+    Args:
+        name: Prefix of the profile files
+        modes: Capture modes; parsed from ETL_PROFILE by default
+        directory: Output directory; ETL_PROFILE_DIR (or ./profiles) by default
+    """
+    modes = tuple(profile_modes() if modes is None else modes)
+    if not modes:
+        yield
+        return
+
+    directory = directory or os.getenv('ETL_PROFILE_DIR') or 'profiles'
+    os.makedirs(directory, exist_ok=True)
+    prefix = os.path.join(directory, f"{name}-{datetime.now():%Y%m%d%H%M%S}")
+
+    profiler = cProfile.Profile() if 'cpu' in modes else None
+    started_tracing = 'memory' in modes and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(f"{prefix}.prof")
+            with open(f"{prefix}-cpu.txt", 'w', encoding='utf-8') as f:
+                pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(PROFILE_TOP)
+            logger.info(f"CPU profile written to {prefix}.prof")
+        if 'memory' in modes:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            snapshot.dump(f"{prefix}.tracemalloc")
+            with open(f"{prefix}-memory.txt", 'w', encoding='utf-8') as f:
+                f.write(f"Traced memory: {current / 2 ** 20:.1f} MiB current, {peak / 2 ** 20:.1f} MiB peak\n\n")
+                for stat in snapshot.statistics('lineno')[:PROFILE_TOP]:
+                    f.write(f"{stat}\n")
+            logger.info(f"Allocation snapshot written to {prefix}.tracemalloc")
+
+
+@contextmanager
+def instrumented_run(job: str) -> Iterator[RunMetrics]:
+    """
+    Instrument one run of a job.
+
+    Resets run_metrics, profiles the run if ETL_PROFILE is set, and on
+    exit logs the JSON summary and writes the Prometheus textfile (unless
+    ETL_METRICS disables metrics). An
+    exception marks the run failed; call mark_failed() on the yielded
+    metrics for failures that are handled inside the block.
+
+    Args:
+        job: Job name, e.g. 'collector' or 'scraper'
+
+    Yields:
+        The run's metrics
+    """
+    run_metrics.reset()
+    try:
+        with profiled(job):
+            yield run_metrics
+    except BaseException:
+        run_metrics.mark_failed()
+        raise
+    finally:
+        if run_metrics.enabled:
+            log_summary(job)
+            try:
+                path = write_textfile(job)
+                if path:
+                    logger.debug(f"Metrics written to {path}")
+            except OSError as e:
+                logger.warning(f"Could not write metrics textfile: {e}")
@@ -0,0 +1,425 @@
+"""
+Bulk loaders for GDPR fines data.
+
+This module provides the strategies used to push a transformed DataFrame
+into PostgreSQL: a streaming COPY FROM STDIN path, the pandas to_sql
+based INSERT paths, and an incremental upsert keyed on the enforcement
+tracker ID.
+"""
+
+import io
+import logging
+import time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+# Supported load strategies
+LOAD_STRATEGIES = ('copy', 'multi', 'executemany')
+
+# Default number of rows sent to the database per chunk
+DEFAULT_CHUNK_SIZE = 10000
+
+# NULL marker used in the COPY CSV stream
+COPY_NULL = '\\N'
+
+# Natural key and change-detection columns
+KEY_COLUMN = 'fine_key'
+HASH_COLUMN = 'row_hash'
+
+# Columns that never take part in the content hash
+UNHASHED_COLUMNS = {'id', KEY_COLUMN, HASH_COLUMN, 'company_id', 'created_at', 'updated_at'}
+
+# Columns identifying a fine when no enforcement tracker ID is available
+IDENTITY_COLUMNS = ['country', 'authority', 'company', 'date', 'amount', 'article_violated']
+
+# Enforcement tracker ID as it appears in tracker URLs
+ETID_PATTERN = r'(ETid-\d+)'
+
+
+def default_strategy(engine) -> str:
+    """
+    Pick the load strategy for an engine.
+
+    Args:
+        engine: SQLAlchemy engine the data will be loaded through
+
+    Returns:
+        'copy' for psycopg2-backed PostgreSQL engines, 'multi' otherwise
+    """
+    if engine.dialect.name == 'postgresql' and engine.dialect.driver == 'psycopg2':
+        return 'copy'
+    return 'multi'
+
+
+def iter_chunks(df: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Split a DataFrame into consecutive chunks of at most chunk_size rows.
+
+    Args:
+        df: DataFrame to split
+        chunk_size: Maximum number of rows per chunk
+
+    Yields:
+        DataFrame slices
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def _quote_ident(name: str) -> str:
+    """Quote an SQL identifier."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _qualified_name(table: str, schema: Optional[str]) -> str:
+    """Build a quoted, schema-qualified table name."""
+    if schema:
+        return f"{_quote_ident(schema)}.{_quote_ident(table)}"
+    return _quote_ident(table)
+
+
+def table_columns(conn, table: str, schema: Optional[str] = None) -> List[str]:
+    """
+    Look up the writable columns of a table in the catalog.
+
+    Args:
+        conn: SQLAlchemy connection
+        table: Table name
+        schema: Schema name (None also finds temporary tables)
+
+    Returns:
+        Column names in table order, without generated columns; empty if
+        the table does not exist
+    """
+    if not inspect(conn).has_table(table, schema=schema):
+        return []
+    return [column['name'] for column in inspect(conn).get_columns(table, schema=schema)
+            if not column.get('computed')]
+
+
+def select_table_columns(conn, df: pd.DataFrame, table: str, schema: Optional[str] = None) -> pd.DataFrame:
+    """
+    Drop the DataFrame columns that the target table does not have.
+
+    Records can carry fields that only identify them (etid, url) or that
+    the table does not keep; they must not reach COPY or INSERT.
+
+    Args:
+        conn: SQLAlchemy connection
+        df: DataFrame to load
+        table: Target table name
+        schema: Target schema name
+
+    Returns:
+        DataFrame with only the table's columns, or df unchanged if the
+        table does not exist yet
+    """
+    columns = set(table_columns(conn, table, schema))
+    if not columns:
+        return df
+    dropped = [col for col in df.columns if col not in columns]
+    if not dropped:
+        return df
+    logger.debug(f"Not loading columns missing from {table}: {dropped}")
+    return df[[col for col in df.columns if col in columns]]
+
+
+def _log_chunk(strategy: str, chunk_num: int, rows: int, elapsed: float) -> None:
+    """Report the throughput of a single loaded chunk."""
+    rate = rows / elapsed if elapsed > 0 else float('inf')
+    logger.info(
+        f"[{strategy}] chunk {chunk_num}: {rows} rows in {elapsed:.3f}s "
+        f"({rate:,.0f} rows/sec)"
+    )
+
+
+def copy_frame(raw_conn, df: pd.DataFrame, table: str, schema: Optional[str] = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Stream a DataFrame into a table with COPY FROM STDIN.
+
+    Each chunk is serialised to an in-memory CSV buffer and sent with
+    copy_expert. The caller owns the transaction.
+
+    Args:
+        raw_conn: DBAPI (psycopg2) connection
+        df: DataFrame to load
+        table: Target table name
+        schema: Target schema name
+        chunk_size: Number of rows per COPY chunk
+
+    Returns:
+        Number of rows copied
+    """
+    columns = ', '.join(_quote_ident(col) for col in df.columns)
+    copy_sql = (
+        f"COPY {_qualified_name(table, schema)} ({columns}) "
+        f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+    )
+
+    total = 0
+    with raw_conn.cursor() as cur:
+        for chunk_num, chunk in enumerate(iter_chunks(df, chunk_size), start=1):
+            start = time.perf_counter()
+            buffer = io.StringIO()
+            chunk.to_csv(buffer, index=False, header=False, na_rep=COPY_NULL)
+            buffer.seek(0)
+            cur.copy_expert(copy_sql, buffer)
+            _log_chunk('copy', chunk_num, len(chunk), time.perf_counter() - start)
+            total += len(chunk)
+    return total
+
+
+def insert_frame(conn, df: pd.DataFrame, table: str, schema: Optional[str] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, method: Optional[str] = 'multi') -> int:
+    """
+    Insert a DataFrame chunk by chunk with pandas to_sql.
+
+    Args:
+        conn: SQLAlchemy connection; the caller owns the transaction
+        df: DataFrame to load
+        table: Target table name
+        schema: Target schema name
+        chunk_size: Number of rows per INSERT chunk
+        method: 'multi' for multi-row VALUES, None for executemany
+
+    Returns:
+        Number of rows inserted
+    """
+    strategy = method or 'executemany'
+    total = 0
+    for chunk_num, chunk in enumerate(iter_chunks(df, chunk_size), start=1):
+        start = time.perf_counter()
+        chunk.to_sql(table, conn, schema=schema, if_exists='append', index=False, method=method)
+        _log_chunk(strategy, chunk_num, len(chunk), time.perf_counter() - start)
+        total += len(chunk)
+    return total
+
+
+def write_frame(conn, df: pd.DataFrame, table: str, schema: Optional[str] = None,
+                strategy: str = 'copy', chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Write a DataFrame through an open SQLAlchemy connection using a strategy.
+
+    Unlike load_frame, the caller owns the transaction, so the rows can be
+    committed together with other writes. Columns the table does not have
+    are dropped.
+
+    Args:
+        conn: SQLAlchemy connection
+        df: DataFrame to load
+        table: Target table name
+        schema: Target schema name
+        strategy: One of LOAD_STRATEGIES
+        chunk_size: Number of rows per chunk
+
+    Returns:
+        Number of rows written
+    """
+    df = select_table_columns(conn, df, table, schema)
+    if strategy == 'copy':
+        return copy_frame(conn.connection, df, table, schema=schema, chunk_size=chunk_size)
+    method = 'multi' if strategy == 'multi' else None
+    return insert_frame(conn, df, table, schema=schema, chunk_size=chunk_size, method=method)
+
+
+def load_frame(engine, df: pd.DataFrame, table: str, schema: Optional[str] = None,
+               strategy: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Load a DataFrame into a table in a single transaction.
+
+    Args:
+        engine: SQLAlchemy engine
+        df: DataFrame to load
+        table: Target table name
+        schema: Target schema name
+        strategy: One of LOAD_STRATEGIES; defaults to default_strategy(engine)
+        chunk_size: Number of rows per chunk
+
+    Returns:
+        Number of rows loaded
+    """
+    strategy = strategy or default_strategy(engine)
+    if strategy not in LOAD_STRATEGIES:
+        raise ValueError(f"Unknown load strategy '{strategy}', expected one of {LOAD_STRATEGIES}")
+    if df.empty:
+        return 0
+
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        total = write_frame(conn, df, table, schema, strategy, chunk_size)
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else float('inf')
+    logger.info(f"[{strategy}] loaded {total} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+    return total
+
+
+def _hash_frame(df: pd.DataFrame, columns) -> np.ndarray:
+    """Hash the given columns of each row into signed 64-bit integers."""
+    columns = sorted(columns)
+    hashed = pd.util.hash_pandas_object(df[columns].astype(str), index=False)
+    return hashed.to_numpy().view(np.int64)
+
+
+def assign_fine_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the natural key and content hash columns to a DataFrame.
+
+    The natural key is the enforcement tracker ID, taken from an 'etid'
+    column or extracted from the tracker URL. Rows without one fall back
+    to a hash of their identifying columns.
+
+    Args:
+        df: DataFrame with transformed data
+
+    Returns:
+        DataFrame with 'fine_key' and 'row_hash' columns
+    """
+    content_columns = [col for col in df.columns if col not in UNHASHED_COLUMNS]
+    df[HASH_COLUMN] = _hash_frame(df, content_columns)
+
+    keys = pd.Series(np.nan, index=df.index, dtype=object)
+    if 'etid' in df.columns:
+        keys = df['etid'].where(df['etid'].astype(str).str.match(ETID_PATTERN))
+    for url_column in ('source_url', 'url'):
+        if url_column in df.columns:
+            keys = keys.fillna(df[url_column].astype(str).str.extract(ETID_PATTERN, expand=False))
+
+    missing = keys.isna()
+    if missing.any():
+        identity = [col for col in IDENTITY_COLUMNS if col in df.columns]
+        fallback = _hash_frame(df.loc[missing], identity).view(np.uint64)
+        keys[missing] = ['h' + format(value, '016x') for value in fallback]
+
+    df[KEY_COLUMN] = keys
+    return df
+
+
+def fetch_row_hashes(conn, keys, table: str, schema: Optional[str] = None) -> pd.Series:
+    """
+    Look up the stored content hashes for a set of natural keys.
+
+    Args:
+        conn: SQLAlchemy connection
+        keys: Natural keys to look up
+        table: Target table name
+        schema: Target schema name
+
+    Returns:
+        Series of stored row hashes indexed by natural key
+    """
+    result = conn.execute(
+        text(
+            f"SELECT {KEY_COLUMN}, {HASH_COLUMN} FROM {_qualified_name(table, schema)} "
+            f"WHERE {KEY_COLUMN} = ANY(:keys)"
+        ),
+        {'keys': list(keys)}
+    )
+    rows = result.fetchall()
+    return pd.Series(
+        [row[1] for row in rows],
+        index=[row[0] for row in rows],
+        dtype='Int64'
+    )
+
+
+def filter_changed(conn, df: pd.DataFrame, table: str, schema: Optional[str] = None) -> pd.DataFrame:
+    """
+    Drop rows whose natural key is already stored with the same content hash.
+
+    Args:
+        conn: SQLAlchemy connection
+        df: DataFrame with 'fine_key' and 'row_hash' columns
+        table: Target table name
+        schema: Target schema name
+
+    Returns:
+        DataFrame with only new or changed rows
+    """
+    df = df.drop_duplicates(subset=KEY_COLUMN, keep='last')
+    stored = fetch_row_hashes(conn, df[KEY_COLUMN], table, schema)
+    known = df[KEY_COLUMN].map(stored)
+    changed = known.isna() | (known != df[HASH_COLUMN]).fillna(True)
+    skipped = int((~changed).sum())
+    if skipped:
+        logger.info(f"Skipping {skipped} unchanged records")
+    return df[changed.to_numpy(dtype=bool)]
+
+
+def upsert_frame(engine, df: pd.DataFrame, table: str, schema: Optional[str] = None,
+                 strategy: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Insert new and update changed rows through a staging table.
+
+    Rows already stored with the same content hash are skipped before they
+    reach the database. The remaining rows are loaded into a temporary
+    staging table and merged with INSERT ... ON CONFLICT DO UPDATE, all in
+    a single transaction. Only the columns the target table has are
+    loaded, so identifying fields such as etid or url are dropped once
+    the natural key has been derived from them.
+
+    Args:
+        engine: SQLAlchemy engine
+        df: DataFrame with 'fine_key' and 'row_hash' columns
+        table: Target table name
+        schema: Target schema name
+        strategy: One of LOAD_STRATEGIES used to fill the staging table
+        chunk_size: Number of rows per chunk
+
+    Returns:
+        Dictionary with 'inserted', 'updated' and 'skipped' counts
+    """
+    strategy = strategy or default_strategy(engine)
+    if strategy not in LOAD_STRATEGIES:
+        raise ValueError(f"Unknown load strategy '{strategy}', expected one of {LOAD_STRATEGIES}")
+
+    target = _qualified_name(table, schema)
+    staging = f"{table}_staging"
+    counts = {'inserted': 0, 'updated': 0, 'skipped': 0}
+
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        changed = filter_changed(conn, df, table, schema)
+        counts['skipped'] = len(df) - len(changed)
+        if changed.empty:
+            logger.info("No new or changed records to load")
+            return counts
+
+        conn.execute(text(
+            f"CREATE TEMP TABLE {_quote_ident(staging)} (LIKE {target}) ON COMMIT DROP"
+        ))
+        conn.execute(text(f"ALTER TABLE {_quote_ident(staging)} DROP COLUMN id"))
+        changed = select_table_columns(conn, changed, table, schema).drop(columns='id', errors='ignore')
+        write_frame(conn, changed, staging, None, strategy, chunk_size)
+
+        columns = ', '.join(_quote_ident(col) for col in changed.columns)
+        updates = ', '.join(
+            f"{_quote_ident(col)} = EXCLUDED.{_quote_ident(col)}"
+            for col in changed.columns
+            if col not in (KEY_COLUMN, 'created_at')
+        )
+        result = conn.execute(text(
+            f"INSERT INTO {target} ({columns}) "
+            f"SELECT {columns} FROM {_quote_ident(staging)} "
+            f"ON CONFLICT ({KEY_COLUMN}) DO UPDATE SET {updates} "
+            f"WHERE {target}.{HASH_COLUMN} IS DISTINCT FROM EXCLUDED.{HASH_COLUMN} "
+            f"RETURNING (xmax = 0) AS inserted"
+        ))
+        flags = [row[0] for row in result]
+
+    counts['inserted'] = sum(flags)
+    counts['updated'] = len(flags) - counts['inserted']
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"[upsert] {counts['inserted']} inserted, {counts['updated']} updated, "
+        f"{counts['skipped']} unchanged in {elapsed:.2f}s"
+    )
+    return counts
@@ -0,0 +1,172 @@
+"""
+Normalisation of GDPR fines fields.
+
+This module turns the enforcement tracker's raw amount, date and country
+values into clean typed columns. It is shared by the scraper and the ETL
+collector, and every step is a vectorized pandas string operation or a
+lookup over unique values, so bulk reprocessing never goes row by row.
+"""
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# Canonical country names keyed by casefolded spelling
+COUNTRY_ALIASES: Dict[str, str] = {
+    'austria': 'Austria', 'österreich': 'Austria',
+    'belgium': 'Belgium', 'belgique': 'Belgium', 'belgië': 'Belgium',
+    'bulgaria': 'Bulgaria',
+    'croatia': 'Croatia', 'hrvatska': 'Croatia',
+    'cyprus': 'Cyprus',
+    'czech republic': 'Czech Republic', 'czechia': 'Czech Republic',
+    'denmark': 'Denmark', 'danmark': 'Denmark',
+    'estonia': 'Estonia',
+    'finland': 'Finland', 'suomi': 'Finland',
+    'france': 'France',
+    'germany': 'Germany', 'deutschland': 'Germany',
+    'greece': 'Greece', 'hellas': 'Greece',
+    'hungary': 'Hungary', 'magyarország': 'Hungary',
+    'iceland': 'Iceland',
+    'ireland': 'Ireland', 'éire': 'Ireland',
+    'isle of man': 'Isle of Man',
+    'italy': 'Italy', 'italia': 'Italy',
+    'latvia': 'Latvia',
+    'liechtenstein': 'Liechtenstein',
+    'lithuania': 'Lithuania',
+    'luxembourg': 'Luxembourg',
+    'malta': 'Malta',
+    'netherlands': 'Netherlands', 'the netherlands': 'Netherlands', 'holland': 'Netherlands',
+    'norway': 'Norway', 'norge': 'Norway',
+    'poland': 'Poland', 'polska': 'Poland',
+    'portugal': 'Portugal',
+    'romania': 'Romania',
+    'slovakia': 'Slovakia', 'slovak republic': 'Slovakia',
+    'slovenia': 'Slovenia',
+    'spain': 'Spain', 'españa': 'Spain',
+    'sweden': 'Sweden', 'sverige': 'Sweden',
+    'united kingdom': 'United Kingdom', 'uk': 'United Kingdom', 'great britain': 'United Kingdom',
+    'gibraltar': 'Gibraltar',
+}
+
+# Amount strings meaning "no known amount"
+UNKNOWN_AMOUNT_PATTERN = r'^(?:unknown|n/?a|none|-+|\?|)$'
+
+
+def _map_uniques(values: pd.Series, parse) -> pd.Series:
+    """Run a vectorized parser over the distinct values only and broadcast the result back."""
+    codes, uniques = pd.factorize(values)
+    parsed = parse(pd.Series(uniques)).to_numpy()
+    missing = parse(pd.Series([None], dtype=object)).to_numpy()
+    # Missing values have code -1, which picks up the trailing parsed None
+    return pd.Series(np.concatenate([parsed, missing])[codes], index=values.index)
+
+
+def normalize_amounts(values: pd.Series) -> pd.Series:
+    """
+    Parse fine amounts into floats.
+
+    Handles thousands separators ("525,000", "1.500.000", "1 000"),
+    currency markers ("EUR", "€") and qualifiers such as "Only known:
+    10,000" (the known part is kept). "Unknown" and empty values become
+    NaN.
+
+    Args:
+        values: Raw amount values
+
+    Returns:
+        Float Series of amounts
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype('float64')
+    return _map_uniques(values, _parse_amounts)
+
+
+def _parse_amounts(values: pd.Series) -> pd.Series:
+    text = values.astype('string').str.strip().str.lower()
+    unknown = text.str.fullmatch(UNKNOWN_AMOUNT_PATTERN).fillna(True).astype(bool)
+
+    # Drop currency markers and spaces/apostrophes used as group separators
+    text = text.str.replace(r'(?:eur|€)', '', regex=True)
+    text = text.str.replace(r"(?<=\d)[\s'](?=\d{3}\b)", '', regex=True)
+
+    # Dots used as thousands separators (1.500.000) versus decimal points
+    dotted_thousands = text.str.contains(r'\d{1,3}(?:\.\d{3}){2,}', regex=True).fillna(False).astype(bool)
+    text = text.mask(dotted_thousands, text.str.replace('.', '', regex=False))
+    text = text.str.replace(r'(?<=\d),(?=\d{3}\b)', '', regex=True)
+    text = text.str.replace(',', '.', regex=False)
+
+    amounts = pd.to_numeric(text.str.extract(r'(\d+(?:\.\d+)?)', expand=False), errors='coerce')
+    return amounts.astype('float64').mask(unknown)
+
+
+def normalize_dates(values: pd.Series) -> pd.Series:
+    """
+    Parse decision dates into timestamps.
+
+    Accepts ISO dates and datetimes, compact YYYYMMDD values (including
+    floats such as 20240404.0), slashes, and partial dates: YYYY-MM maps
+    to the first of the month and YYYY to 1 January.
+
+    Args:
+        values: Raw date values
+
+    Returns:
+        datetime64 Series, NaT where the value cannot be parsed
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return _map_uniques(values, _parse_dates)
+
+
+def _parse_dates(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(values):
+        text = values.round().astype('Int64').astype('string')
+    else:
+        text = values.astype('string').str.strip().str.replace(r'\.0+$', '', regex=True)
+
+    text = text.str.replace('/', '-', regex=False)
+    text = text.str.replace(r'^(\d{4}-\d{2}-\d{2})[T ].*$', r'\1', regex=True)
+    text = text.str.replace(r'^(\d{4})(\d{2})(\d{2})$', r'\1-\2-\3', regex=True)
+    text = text.str.replace(r'^(\d{4})-(\d{1,2})$', r'\1-\2-01', regex=True)
+    text = text.str.replace(r'^(\d{4})$', r'\1-01-01', regex=True)
+    return pd.to_datetime(text, format='%Y-%m-%d', errors='coerce')
+
+
+def canonicalize_countries(values: pd.Series) -> pd.Series:
+    """
+    Map country spellings to canonical names.
+
+    The lookup runs once per distinct value and is broadcast back with
+    the factorized codes. Unknown names are title-cased.
+
+    Args:
+        values: Raw country values
+
+    Returns:
+        Series of canonical country names
+    """
+    keys = values.astype('string').str.strip().str.replace(r'\s+', ' ', regex=True)
+    codes, uniques = pd.factorize(keys.str.casefold())
+    # Trailing None is picked up by the -1 code of missing values
+    canonical = np.array([COUNTRY_ALIASES.get(key, key.title()) for key in uniques] + [None], dtype=object)
+    return pd.Series(canonical[codes], index=values.index, dtype=object)
+
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalise the amount, date and country columns present in a frame.
+
+    Args:
+        df: DataFrame of raw fines
+
+    Returns:
+        The same DataFrame with normalised columns
+    """
+    if 'amount' in df.columns:
+        df['amount'] = normalize_amounts(df['amount'])
+    if 'date' in df.columns:
+        df['date'] = normalize_dates(df['date'])
+    if 'country' in df.columns:
+        df['country'] = canonicalize_countries(df['country'])
+    return df
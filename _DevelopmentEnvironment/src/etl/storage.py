@@ -0,0 +1,326 @@
+"""
+Columnar storage for GDPR fines data.
+
+Fines are kept as Arrow datasets with a fixed schema, partitioned by
+decision year, in Parquet (compressed, default) or Arrow IPC/Feather
+(uncompressed, zero-copy) files. Country, authority and sector are
+dictionary-encoded. Reads are memory-mapped and only decode the
+requested columns and partitions.
+"""
+
+import logging
+import os
+import shutil
+import time
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs
+
+from etl.normalize import normalize_frame
+
+logger = logging.getLogger(__name__)
+
+# Supported file formats
+STORE_FORMATS = ('parquet', 'feather')
+
+# Columns stored as dictionary-encoded strings
+DICTIONARY_COLUMNS = ('country', 'authority', 'sector')
+
+# Collector / database column names mapped to the tracker's field names
+COLUMN_ALIASES = {
+    'article_violated': 'article',
+    'type_of_violation': 'type',
+    'source_url': 'source',
+}
+
+# Tracker field names mapped back to the collector / database column names
+TRACKER_ALIASES = {tracker: column for column, tracker in COLUMN_ALIASES.items()}
+
+# Fields identifying a fine when merging snapshots, in order of preference
+MERGE_KEY = ('etid', 'url', 'source')
+
+# Ways of writing to a dataset
+WRITE_MODES = ('overwrite', 'append', 'merge')
+
+# Hive-style partition column derived from the decision date
+PARTITION_COLUMN = 'year'
+
+
+def _field(name: str, value_type: pa.DataType) -> pa.Field:
+    if name in DICTIONARY_COLUMNS:
+        return pa.field(name, pa.dictionary(pa.int32(), pa.string()))
+    return pa.field(name, value_type)
+
+
+# Raw fines as scraped: every field is text
+RAW_SCHEMA = pa.schema([
+    _field(name, pa.string()) for name in (
+        'etid', 'country', 'authority', 'date', 'amount', 'company', 'sector',
+        'article', 'type', 'summary', 'source', 'url',
+    )
+])
+
+# Processed fines: parsed dates and amounts
+FINES_SCHEMA = pa.schema([
+    _field(field.name, {'date': pa.date32(), 'amount': pa.float64()}.get(field.name, pa.string()))
+    for field in RAW_SCHEMA
+])
+
+# Schema of each dataset kept in the store
+DATASET_SCHEMAS = {
+    'raw': RAW_SCHEMA,
+    'fines': FINES_SCHEMA,
+}
+
+
+class ColumnarStore:
+    """Year-partitioned Arrow datasets of GDPR fines under one directory."""
+
+    def __init__(self, root: str, file_format: str = 'parquet'):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding one sub-directory per dataset
+            file_format: 'parquet' (compressed) or 'feather' (Arrow IPC, zero-copy reads)
+        """
+        if file_format not in STORE_FORMATS:
+            raise ValueError(f"Unknown store format '{file_format}', expected one of {STORE_FORMATS}")
+        self.root = root
+        self.file_format = file_format
+        self.extension = 'feather' if file_format == 'feather' else 'parquet'
+        # Memory-map files on read instead of copying them into buffers
+        self.filesystem = pyarrow.fs.LocalFileSystem(use_mmap=True)
+
+    def path(self, name: str) -> str:
+        """Directory of a dataset."""
+        return os.path.join(self.root, name)
+
+    def exists(self, name: str) -> bool:
+        """Whether a dataset has been written."""
+        return os.path.isdir(self.path(name)) and any(
+            files for _, _, files in os.walk(self.path(name))
+        )
+
+    @staticmethod
+    def _schema(name: str) -> pa.Schema:
+        if name not in DATASET_SCHEMAS:
+            raise ValueError(f"Unknown dataset '{name}', expected one of {sorted(DATASET_SCHEMAS)}")
+        return DATASET_SCHEMAS[name]
+
+    def to_table(self, name: str, data: Union[pd.DataFrame, Iterable[Dict[str, Any]]]) -> pa.Table:
+        """
+        Conform records to a dataset's schema.
+
+        Collector column names are mapped to the tracker's field names,
+        missing fields are filled with nulls and other columns dropped.
+        Processed datasets have their dates and amounts normalised.
+
+        Args:
+            name: Dataset name ('raw' or 'fines')
+            data: DataFrame or iterable of fine records
+
+        Returns:
+            Arrow table with the dataset schema plus the year partition column
+        """
+        schema = self._schema(name)
+        df = data.copy() if isinstance(data, pd.DataFrame) else pd.DataFrame(list(data))
+        df = df.rename(columns={k: v for k, v in COLUMN_ALIASES.items() if v not in df.columns})
+
+        extra = [col for col in df.columns if col not in schema.names]
+        if extra:
+            logger.debug(f"Dropping columns not in the {name} schema: {extra}")
+        df = df.reindex(columns=schema.names)
+
+        if name == 'raw':
+            years = normalize_frame(df[['date']].copy())['date'].dt.year
+        else:
+            df = normalize_frame(df)
+            years = df['date'].dt.year
+            df['date'] = df['date'].dt.date
+
+        text_columns = [field.name for field in schema
+                        if pa.types.is_string(field.type) or pa.types.is_dictionary(field.type)]
+        df[text_columns] = df[text_columns].astype('string')
+
+        table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+        return table.append_column(PARTITION_COLUMN, pa.array(years.astype('Int16'), type=pa.int16()))
+
+    def write(self, name: str, data: Union[pd.DataFrame, Iterable[Dict[str, Any]]],
+              mode: str = 'overwrite', key: Sequence[str] = MERGE_KEY) -> int:
+        """
+        Write records to a dataset.
+
+        Overwrites and merges write a new copy of the dataset next to the
+        old one and swap it in, so a failed write leaves the old one intact.
+
+        Args:
+            name: Dataset name ('raw' or 'fines')
+            data: DataFrame or iterable of fine records
+            mode: 'overwrite' replaces the dataset, 'append' adds new files,
+                'merge' replaces stored fines with the same key and keeps the rest
+            key: Fields identifying a fine in 'merge' mode; the first one
+                set is used, and fines without any are compared whole
+
+        Returns:
+            Number of rows written
+        """
+        if mode not in WRITE_MODES:
+            raise ValueError(f"Unknown write mode '{mode}', expected one of {WRITE_MODES}")
+        table = self.to_table(name, data)
+        written = table.num_rows
+        if mode == 'append':
+            self._write_table(table, self.path(name))
+        else:
+            if mode == 'merge' and self.exists(name):
+                table = self._latest(pa.concat_tables([self._table_in_write_order(name), table]), key)
+            self._replace(name, table)
+        logger.info(f"Wrote {written} rows to {self.path(name)}")
+        return written
+
+    def deduplicate(self, name: str, key: Sequence[str] = MERGE_KEY) -> int:
+        """
+        Keep only the latest written version of each fine in a dataset.
+
+        Used after appending snapshots chunk by chunk.
+
+        Args:
+            name: Dataset name ('raw' or 'fines')
+            key: Fields identifying a fine, as for write(mode='merge')
+
+        Returns:
+            Number of rows removed
+        """
+        if not self.exists(name):
+            return 0
+        table = self._table_in_write_order(name)
+        latest = self._latest(table, key)
+        removed = table.num_rows - latest.num_rows
+        if removed:
+            self._replace(name, latest)
+            logger.info(f"Removed {removed} superseded rows from {self.path(name)}")
+        return removed
+
+    def _table_in_write_order(self, name: str) -> pa.Table:
+        """Read a whole dataset, oldest file first (file names start with their write time)."""
+        dataset = self.dataset(name)
+        fragments = sorted(dataset.get_fragments(), key=lambda fragment: os.path.basename(fragment.path))
+        return pa.concat_tables([fragment.to_table(schema=dataset.schema) for fragment in fragments])
+
+    @staticmethod
+    def _latest(table: pa.Table, key: Sequence[str]) -> pa.Table:
+        """Drop all but the last row of each fine, identified by the first key field set."""
+        df = table.drop([PARTITION_COLUMN]).to_pandas()
+        columns = [col for col in key if col in df.columns]
+        ids = pd.Series(None, index=df.index, dtype=object)
+        for col in columns:
+            ids = ids.fillna(df[col].astype(object))
+        whole = pd.util.hash_pandas_object(df.astype(str), index=False).astype(str)
+        ids = ids.where(ids.notna(), 'row:' + whole)
+        return table.filter(pa.array(~ids.duplicated(keep='last').to_numpy()))
+
+    def _replace(self, name: str, table: pa.Table):
+        """Write a dataset's new contents beside it and swap them in."""
+        path = self.path(name)
+        staged = f"{path}.{uuid.uuid4().hex}.tmp"
+        self._write_table(table, staged)
+        if os.path.isdir(path):
+            retired = f"{staged}.old"
+            os.rename(path, retired)
+            os.rename(staged, path)
+            shutil.rmtree(retired)
+        else:
+            os.rename(staged, path)
+
+    def _write_table(self, table: pa.Table, path: str):
+        """Write a table as year-partitioned files under path."""
+        file_options = None
+        if self.file_format == 'feather':
+            # Uncompressed IPC buffers can be memory-mapped without copying
+            file_options = ds.IpcFileFormat().make_write_options(compression=None)
+
+        ds.write_dataset(
+            table,
+            path,
+            format='ipc' if self.file_format == 'feather' else 'parquet',
+            filesystem=self.filesystem,
+            file_options=file_options,
+            partitioning=ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.int16())]), flavor='hive'),
+            basename_template=f"part-{time.time_ns():020d}-{uuid.uuid4().hex}-{{i}}.{self.extension}",
+            existing_data_behavior='overwrite_or_ignore',
+        )
+
+    def dataset(self, name: str) -> ds.Dataset:
+        """Open a dataset for lazy, column-pruned scans."""
+        schema = self._schema(name).append(pa.field(PARTITION_COLUMN, pa.int16()))
+        return ds.dataset(
+            self.path(name),
+            schema=schema,
+            format='ipc' if self.file_format == 'feather' else 'parquet',
+            filesystem=self.filesystem,
+            partitioning='hive',
+        )
+
+    def _filter(self, years: Optional[Iterable[int]]):
+        if years is None:
+            return None
+        return pc.field(PARTITION_COLUMN).isin(list(years))
+
+    def read_table(self, name: str, columns: Optional[List[str]] = None,
+                   years: Optional[Iterable[int]] = None) -> pa.Table:
+        """
+        Read a dataset as an Arrow table.
+
+        Only the requested columns are decoded and only the matching year
+        partitions are opened.
+
+        Args:
+            name: Dataset name ('raw' or 'fines')
+            columns: Columns to read (defaults to all)
+            years: Decision years to read (defaults to all)
+
+        Returns:
+            Arrow table
+        """
+        if not self.exists(name):
+            return self._schema(name).empty_table().select(columns or self._schema(name).names)
+        return self.dataset(name).to_table(columns=columns or self._schema(name).names,
+                                           filter=self._filter(years))
+
+    def read_frame(self, name: str, columns: Optional[List[str]] = None,
+                   years: Optional[Iterable[int]] = None) -> pd.DataFrame:
+        """
+        Read a dataset as a DataFrame.
+
+        Dictionary-encoded columns come back as pandas categoricals.
+
+        Args:
+            name: Dataset name ('raw' or 'fines')
+            columns: Columns to read (defaults to all)
+            years: Decision years to read (defaults to all)
+
+        Returns:
+            DataFrame of fines
+        """
+        return self.read_table(name, columns, years).to_pandas()
+
+    def iter_records(self, name: str, batch_size: int = 10000) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a dataset as plain records, one record batch at a time.
+
+        Args:
+            name: Dataset name ('raw' or 'fines')
+            batch_size: Maximum rows decoded per batch
+
+        Yields:
+            Fine records
+        """
+        if not self.exists(name):
+            return
+        for batch in self.dataset(name).to_batches(columns=self._schema(name).names, batch_size=batch_size):
+            yield from batch.to_pylist()
@@ -0,0 +1,218 @@
+"""
+Synthetic GDPR fines.
+
+Generates realistic, reproducible fines for benchmarks and load tests.
+Country, sector and violation frequencies roughly follow the enforcement
+tracker, and amounts are log-normal and rounded the way authorities
+announce them. A small, configurable fraction of records is dirty
+(unknown amounts, odd date formats, blank companies, repeated fines) so
+validation and normalisation do real work. The same seed always yields
+the same records, and generation is vectorized (about a million rows in
+a few seconds); iter_fine_chunks() produces larger datasets chunk by chunk.
+"""
+
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Country -> (authority, relative share of fines)
+COUNTRIES = {
+    'Spain': ('Spanish Data Protection Authority (aepd)', 30),
+    'Italy': ('Italian Data Protection Authority (Garante)', 16),
+    'Germany': ('Data Protection Authority of Baden-Wuerttemberg', 9),
+    'Romania': ('Romanian National Supervisory Authority for Personal Data Processing (ANSPDCP)', 7),
+    'Greece': ('Hellenic Data Protection Authority (HDPA)', 4),
+    'France': ('French Data Protection Authority (CNIL)', 4),
+    'Poland': ('Polish National Personal Data Protection Office (UODO)', 3),
+    'Belgium': ('Belgian Data Protection Authority (APD)', 3),
+    'Norway': ('Norwegian Supervisory Authority (Datatilsynet)', 3),
+    'Netherlands': ('Dutch Supervisory Authority for Data Protection (AP)', 2),
+    'United Kingdom': ("Information Commissioner's Office (ICO)", 2),
+    'Sweden': ('Data Protection Authority of Sweden', 2),
+    'Ireland': ('Data Protection Authority of Ireland', 1),
+    'Croatia': ('Croatian Data Protection Authority (AZOP)', 2),
+    'Hungary': ('Hungarian National Authority for Data Protection and the Freedom of Information', 3),
+    'Czech Republic': ('Czech Data Protection Auhtority (UOOU)', 2),
+    'Cyprus': ('Cypriot Data Protection Commissioner', 1),
+    'Denmark': ('Danish Data Protection Agency (Datatilsynet)', 1),
+    'Finland': ('Data Protection Authority of Finland', 1),
+    'Portugal': ('Portuguese Data Protection Authority (CNPD)', 1),
+}
+
+SECTORS = [
+    'Industry and Commerce', 'Employment', 'Public Sector and Education', 'Media, Telecoms and Broadcasting',
+    'Finance, Insurance and Consulting', 'Health Care', 'Individuals and Private Associations',
+    'Transportation and Energy', 'Real Estate', 'Accomodation and Hospitalty', 'Not assigned',
+]
+
+VIOLATIONS = {
+    'Insufficient legal basis for data processing': ['Art. 5 (1) a) GDPR, Art. 6 GDPR', 'Art. 6 (1) GDPR'],
+    'Insufficient technical and organisational measures to ensure information security':
+        ['Art. 32 GDPR', 'Art. 5 (1) f) GDPR, Art. 32 GDPR'],
+    'Non-compliance with general data processing principles': ['Art. 5 GDPR', 'Art. 5 (1) c) GDPR'],
+    'Insufficient fulfilment of data subjects rights': ['Art. 15 GDPR', 'Art. 12 GDPR, Art. 17 GDPR'],
+    'Insufficient fulfilment of information obligations': ['Art. 13 GDPR', 'Art. 13 GDPR, Art. 14 GDPR'],
+    'Insufficient cooperation with supervisory authority': ['Art. 31 GDPR', 'Art. 58 GDPR'],
+    'Insufficient fulfilment of data breach notification obligations': ['Art. 33 GDPR', 'Art. 33 GDPR, Art. 34 GDPR'],
+    'Insufficient data processing agreement': ['Art. 28 GDPR'],
+    'Lack of appointment of data protection officer': ['Art. 37 GDPR'],
+}
+
+_COMPANY_PREFIXES = [
+    'Acme', 'Nordic', 'Euro', 'Iberia', 'Alpine', 'Atlas', 'Helios', 'Vertex', 'Orion', 'Delta', 'Nova',
+    'Summit', 'Pioneer', 'Meridian', 'Aurora', 'Polar', 'Crown', 'Harbor', 'Zenith', 'Bright',
+]
+_COMPANY_KINDS = [
+    'Telecom', 'Energy', 'Bank', 'Insurance', 'Retail', 'Health', 'Media', 'Logistics', 'Software',
+    'Hotels', 'Foods', 'Mobility', 'Clinic', 'Estates', 'Credit',
+]
+_COMPANY_SUFFIXES = ['S.A.', 'S.L.', 'S.p.A.', 'GmbH', 'AG', 'SAS', 'B.V.', 'Ltd', 'AB', 'AS', 'Sp. z o.o.']
+
+# Record layouts: field names used by the fines API and by the tracker pages
+STYLES = ('api', 'tracker')
+
+_FIRST_DATE = date(2018, 5, 25)
+
+
+def _choice(rng: np.random.Generator, values: List[Any], size: int, weights=None) -> np.ndarray:
+    probabilities = None
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        probabilities = weights / weights.sum()
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=probabilities)]
+
+
+def _generate_columns(n: int, seed: int, style: str, dirty_fraction: float, start: int,
+                      end_date: Optional[date]) -> Dict[str, np.ndarray]:
+    """Generate the raw fine columns as object arrays, keyed by field name."""
+    if style not in STYLES:
+        raise ValueError(f"Unknown style '{style}', expected one of {STYLES}")
+    rng = np.random.default_rng([seed, start])
+    end_date = end_date or date.today()
+
+    countries = list(COUNTRIES)
+    shares = np.array([COUNTRIES[c][1] for c in countries], dtype=float)
+    country_code = rng.choice(len(countries), size=n, p=shares / shares.sum())
+    country = np.asarray(countries, dtype=object)[country_code]
+    authority = np.asarray([COUNTRIES[c][0] for c in countries], dtype=object)[country_code]
+
+    violation_types = list(VIOLATIONS)
+    violation = _choice(rng, violation_types, n, [10, 8, 6, 4, 4, 2, 2, 1, 1])
+    article = np.empty(n, dtype=object)
+    for name in violation_types:
+        mask = violation == name
+        article[mask] = _choice(rng, VIOLATIONS[name], int(mask.sum()))
+
+    company = (
+        _choice(rng, _COMPANY_PREFIXES, n) + ' ' + _choice(rng, _COMPANY_KINDS, n) + ' '
+        + _choice(rng, _COMPANY_SUFFIXES, n)
+    )
+
+    # Fines skew small with a long tail: median around EUR 10k, rounded to 3 significant figures
+    amounts = np.clip(rng.lognormal(mean=9.3, sigma=2.0, size=n), 100, 1.2e9)
+    magnitude = 10 ** np.maximum(np.floor(np.log10(amounts)) - 2, 0)
+    amounts = (np.round(amounts / magnitude) * magnitude).astype(np.int64)
+    amount = pd.Series(amounts).map('{:,}'.format).to_numpy(dtype=object)
+
+    # Format each calendar day once and index into it
+    span = (end_date - _FIRST_DATE).days
+    days = (span * rng.beta(2.2, 1.2, size=n)).astype(np.int64)
+    calendar = pd.date_range(_FIRST_DATE, periods=span + 1, freq='D')
+    date_text = calendar.strftime('%Y-%m-%d').to_numpy(dtype=object)[days]
+
+    etid = np.char.add('ETid-', (np.arange(start, start + n) + 1).astype(str)).astype(object)
+    url = np.char.add('https://www.enforcementtracker.com/', etid.astype(str)).astype(object)
+    sector = _choice(rng, SECTORS, n, [20, 14, 12, 9, 9, 8, 8, 6, 5, 4, 5])
+    summary = (
+        'The ' + country + ' DPA has imposed a fine of EUR ' + amount + ' on ' + company
+        + ' (' + violation + ').'
+    )
+
+    if dirty_fraction and n:
+        dirty = rng.random(n) < dirty_fraction
+        kind = rng.integers(0, 5, size=n)
+        amount = np.where(dirty & (kind == 0), 'Unknown', amount)
+        amount = np.where(dirty & (kind == 1), 'Only known: ' + amount, amount)
+        if style == 'api':
+            # Only the API carries raw date formats; the tracker renders ISO dates
+            compact = calendar.strftime('%Y%m%d').to_numpy(dtype=object)[days]
+            date_text = np.where(dirty & (kind == 2), compact, date_text)
+        company = np.where(dirty & (kind == 3), '', company)
+        # Repeat the previous fine's content under a new ETid
+        repeat = np.flatnonzero(dirty & (kind == 4))
+        repeat = repeat[repeat > 0]
+        for column in (country, authority, company, amount, date_text, article, violation, sector):
+            column[repeat] = column[repeat - 1]
+
+    if style == 'tracker':
+        return {
+            'etid': etid, 'country': country, 'authority': authority, 'date': date_text,
+            'amount': amount, 'company': company, 'sector': sector, 'article': article,
+            'type': violation, 'summary': summary, 'source': url, 'url': url,
+        }
+    return {
+        'country': country, 'authority': authority, 'company': company, 'amount': amount,
+        'date': date_text, 'article_violated': article, 'type_of_violation': violation,
+        'source_url': url, 'summary': summary, 'sector': sector,
+    }
+
+
+def generate_frame(n: int, seed: int = 0, style: str = 'api', dirty_fraction: float = 0.02,
+                   start: int = 0, end_date: Optional[date] = None) -> pd.DataFrame:
+    """
+    Generate synthetic fines as a DataFrame of raw (string) values.
+
+    Args:
+        n: Number of fines
+        seed: Random seed; the same seed, n and start give the same rows
+        style: 'api' (collector field names) or 'tracker' (scraper field names)
+        dirty_fraction: Share of records with unknown amounts, unusual date
+            formats, blank companies or duplicated content
+        start: Offset of the first fine, so chunks of a large dataset have
+            distinct ETids
+        end_date: Latest decision date (defaults to today)
+
+    Returns:
+        DataFrame of raw fine records
+    """
+    return pd.DataFrame(_generate_columns(n, seed, style, dirty_fraction, start, end_date))
+
+
+def generate_fines(n: int, seed: int = 0, style: str = 'api', dirty_fraction: float = 0.02,
+                   start: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generate synthetic fines as a list of records.
+
+    Args:
+        n: Number of fines
+        seed: Random seed
+        style: 'api' or 'tracker' field names
+        dirty_fraction: Share of dirty records
+        start: Offset of the first fine
+
+    Returns:
+        List of fine records
+    """
+    columns = _generate_columns(n, seed, style, dirty_fraction, start, None)
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def iter_fine_chunks(n: int, chunk_size: int = 10000, seed: int = 0, style: str = 'api',
+                     dirty_fraction: float = 0.02) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Generate n synthetic fines in chunks, holding one chunk in memory at a time.
+
+    Args:
+        n: Total number of fines
+        chunk_size: Records per chunk
+        seed: Random seed
+        style: 'api' or 'tracker' field names
+        dirty_fraction: Share of dirty records
+
+    Yields:
+        Lists of up to chunk_size fine records
+    """
+    for start in range(0, n, chunk_size):
+        yield generate_fines(min(chunk_size, n - start), seed, style, dirty_fraction, start)
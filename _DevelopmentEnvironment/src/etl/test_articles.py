@@ -0,0 +1,53 @@
+import pytest
+
+from etl.articles import Citation, citation_frame, parse_citations
+
+
+def cited(*citations):
+    return sorted(Citation(*citation) for citation in citations)
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('Art. 12-14 GDPR', cited(('GDPR', 12), ('GDPR', 13), ('GDPR', 14))),
+    ('Art. 12 – 14 GDPR', cited(('GDPR', 12), ('GDPR', 13), ('GDPR', 14))),
+    ('Art. 6, 12-14 GDPR', cited(('GDPR', 6), ('GDPR', 12), ('GDPR', 13), ('GDPR', 14))),
+    ('Art. 6(1)(f) GDPR', cited(('GDPR', 6, '1', 'f'))),
+    ('Art. 6 (1) lit. f DSGVO', cited(('GDPR', 6, '1', 'f'))),
+    ('Art. 6(1)(a), (f) GDPR', cited(('GDPR', 6, '1', 'a'), ('GDPR', 6, '1', 'f'))),
+    ('Art. 5 (1) a), f) GDPR, Art. 6 (1) GDPR', cited(('GDPR', 5, '1', 'a'), ('GDPR', 5, '1', 'f'), ('GDPR', 6, '1'))),
+    ('Art. 9 (2) and (3) RGPD', cited(('GDPR', 9, '2'), ('GDPR', 9, '3'))),
+    ('Article 32 GDPR', cited(('GDPR', 32))),
+    ('Art. 5, Art. 6 GDPR', cited(('GDPR', 5), ('GDPR', 6))),
+])
+def test_ranges_paragraphs_and_points(value, expected):
+    assert parse_citations(value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('Art. 5 GDPR, Art. 22 LOPDGDD', cited(('GDPR', 5), ('LOPDGDD', 22))),
+    ('Art. 32 GDPR, § 26 BDSG', cited(('GDPR', 32), ('BDSG', 26))),
+    ('Art. 6 GDPR and Art. 13 TKG', cited(('GDPR', 6), ('TKG', 13))),
+    ('Art. 12-14 GDPR, Section 4 BDSG', cited(('GDPR', 12), ('GDPR', 13), ('GDPR', 14), ('BDSG', 4))),
+    ('Art. 6 (1) DSGVO, 26 (1) BDSG', cited(('GDPR', 6, '1'), ('BDSG', 26, '1'))),
+    ('Art. 5 (1) f) GDPR, 32', cited(('GDPR', 5, '1', 'f'), ('GDPR', 32))),
+    ('Art. 21 LOPDGDD, Art. 6', cited(('LOPDGDD', 21), ('GDPR', 6))),
+])
+def test_mixed_law_citations_keep_each_provisions_law(value, expected):
+    assert parse_citations(value) == expected
+
+
+@pytest.mark.parametrize('value', [None, '', '   ', 'Unknown', 'Art. 2019 GDPR'])
+def test_unparseable_citations_cite_nothing(value):
+    assert parse_citations(value) == []
+
+
+def test_implausible_ranges_keep_only_their_first_article():
+    assert parse_citations('Art. 14-12 GDPR') == cited(('GDPR', 14))
+    assert parse_citations('Art. 1-99 GDPR') == cited(('GDPR', 1))
+
+
+def test_citation_frame_parses_each_distinct_string_once():
+    frame = citation_frame(['Art. 12-14 GDPR', None, 'Art. 12-14 GDPR', 'Unknown', 'Art. 6(1)(f) GDPR'])
+    assert list(frame.columns) == ['citation', 'law', 'article', 'paragraph', 'point']
+    assert frame['citation'].tolist() == ['Art. 12-14 GDPR'] * 3 + ['Art. 6(1)(f) GDPR']
+    assert frame['article'].tolist() == [12, 13, 14, 6]
@@ -0,0 +1,47 @@
+from datetime import date
+
+import pytest
+
+from etl import backfill
+from etl.backfill import HistoricalBackfill, plan_date_ranges
+
+
+def test_date_ranges_align_to_calendar_intervals():
+    assert plan_date_ranges(date(2018, 5, 25), date(2019, 3, 1), 'quarter') == [
+        ('2018-05-25', '2018-07-01'), ('2018-07-01', '2018-10-01'),
+        ('2018-10-01', '2019-01-01'), ('2019-01-01', '2019-03-01'),
+    ]
+    with pytest.raises(ValueError):
+        plan_date_ranges(date(2020, 1, 1), date(2021, 1, 1), 'week')
+
+
+def test_runs_started_in_the_same_second_get_their_own_staging_tables(db_conn):
+    runs = [HistoricalBackfill(by='page', workers=1) for _ in range(3)]
+    for run in runs:
+        run._start_run()
+    assert len({run.run_id for run in runs}) == 3
+    assert len({run.staging_table for run in runs}) == 3
+    with db_conn, db_conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM gdpr.backfill_runs")
+        assert cur.fetchone()[0] == 3
+        for run in runs:
+            cur.execute(f"DROP TABLE gdpr.{run.staging_table}")
+
+
+def test_resumed_workers_use_the_run_page_size(db_conn, monkeypatch):
+    monkeypatch.setenv('API_PAGE_SIZE', '50')
+    original = HistoricalBackfill(by='page', pages_per_range=3, workers=1)
+    original._start_run()
+
+    monkeypatch.setenv('API_PAGE_SIZE', '500')
+    resumed = HistoricalBackfill(by='date', pages_per_range=20, workers=1, run_id=original.run_id)
+    resumed._resume_run()
+    assert (resumed.by, resumed.page_size, resumed.pages_per_range) == ('page', 50, 3)
+    assert resumed._next_page_ranges(1, 0, 0) == [(0, '0', '3')]
+
+    monkeypatch.setattr(backfill, '_collector', None)
+    backfill._init_worker(resumed.collector_kwargs)
+    assert backfill._collector.api_client.page_size == 50
+
+    with db_conn, db_conn.cursor() as cur:
+        cur.execute(f"DROP TABLE gdpr.{original.staging_table}")
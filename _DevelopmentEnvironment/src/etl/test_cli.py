@@ -0,0 +1,22 @@
+import pytest
+
+from etl import cli
+
+
+def test_scraper_is_found_in_the_checkout(monkeypatch):
+    monkeypatch.delenv('GDPR_SCRAPER_DIR', raising=False)
+    assert cli.scraper_dir() == cli.DEFAULT_SCRAPER_DIR
+
+
+def test_scraper_dir_can_be_configured(monkeypatch, tmp_path):
+    (tmp_path / 'gdpr_scraper.py').write_text('')
+    monkeypatch.setenv('GDPR_SCRAPER_DIR', str(tmp_path))
+    assert cli.scraper_dir() == str(tmp_path)
+
+
+def test_missing_scraper_is_reported(monkeypatch, tmp_path, capsys):
+    monkeypatch.setenv('GDPR_SCRAPER_DIR', str(tmp_path))
+    with pytest.raises(SystemExit) as exited:
+        cli.main(['scrape', '--help'])
+    assert exited.value.code == 2
+    assert 'GDPR_SCRAPER_DIR' in capsys.readouterr().err
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from etl.entities import CompanyResolver, name_key, resolve_companies
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('Google LLC', 'google'),
+    ('Google Ireland Limited', 'google'),
+    ('GOOGLE LLC.', 'google'),
+    ('Société Générale S.A.', 'societe generale'),
+    ('H&M Hennes & Mauritz GmbH', 'h m hennes mauritz'),
+    ('Holding AG', 'holding'),
+])
+def test_name_keys_drop_legal_forms_and_qualifiers(raw, expected):
+    assert name_key(raw) == expected
+
+
+@pytest.mark.parametrize('raw', [
+    'Unknown', 'UNKNOWN', 'Unknown company', 'Private individual', 'private person', 'Not disclosed',
+    'Undisclosed', 'N/A', 'Anonymous', 'Natural person', '-', '  ', None,
+])
+def test_placeholder_and_empty_names_have_no_key(raw):
+    assert name_key(raw) == ''
+
+
+def test_placeholder_names_stay_unresolved(db_conn):
+    from db.pool import get_engine
+
+    df = pd.DataFrame({'company': [
+        'Google LLC', 'Google Ireland Limited', 'Unknown', 'Private individual', 'Not disclosed', '', None,
+    ]})
+    with get_engine().begin() as conn:
+        df = resolve_companies(conn, df, CompanyResolver())
+    ids = df['company_id']
+    assert ids[0] == ids[1] and pd.notna(ids[0])
+    assert ids[2:].isna().all()
+
+    with db_conn, db_conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM gdpr.companies")
+        assert cur.fetchone()[0] == 1
+        cur.execute("SELECT alias FROM gdpr.company_aliases ORDER BY alias")
+        assert [row[0] for row in cur.fetchall()] == ['Google Ireland Limited', 'Google LLC']
@@ -0,0 +1,232 @@
+import json
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from etl import extract
+from etl.extract import PLACEHOLDER_API_URL, APINotConfigured, FinesAPIClient
+from etl.storage import ColumnarStore
+
+
+class StubAPI:
+    """Local fines API: offset or cursor pages of date-ordered records, with scripted failures."""
+
+    def __init__(self, records, cursor=False, ignore=()):
+        self.records = sorted(records, key=lambda record: record['date'])
+        self.cursor = cursor
+        # Paging parameters the server disregards, e.g. ('offset',)
+        self.ignore = set(ignore)
+        # Statuses returned, in order, before a page is served: {offset: [(status, retry_after), ...]}
+        # A 'truncated' status sends a 200 whose body is cut short
+        self.failures = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+                status, body, headers = stub.respond(query)
+                data = json.dumps(body).encode('utf-8')
+                truncated = status == 'truncated'
+                self.send_response(200 if truncated else status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data) + (100 if truncated else 0)))
+                self.end_headers()
+                self.wfile.write(data)
+                if truncated:
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def respond(self, query):
+        offset = 0 if 'offset' in self.ignore else int(query.get('cursor') or query.get('offset') or 0)
+        limit = len(self.records) if 'limit' in self.ignore else int(query['limit'])
+        with self._lock:
+            self.requests.append(query)
+            pending = self.failures.get(offset)
+            if pending:
+                status, retry_after = pending.pop(0)
+                return status, {'error': 'unavailable'}, {'Retry-After': retry_after} if retry_after else {}
+        selected = [record for record in self.records
+                    if record['date'] >= query.get('since', '') and record['date'] < query.get('until', '9999')]
+        page = selected[offset:offset + limit]
+        if not self.cursor:
+            return 200, page, {}
+        next_cursor = str(offset + limit) if offset + limit < len(selected) else None
+        return 200, {'data': page, 'next_cursor': next_cursor}, {}
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def make_records(n):
+    start = date(2019, 1, 1)
+    return [{'id': i, 'date': (start + timedelta(days=i)).isoformat(), 'country': 'Spain',
+             'company': f'Company {i}', 'amount': 1000 + i} for i in range(n)]
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff delays instead of sleeping."""
+    delays = []
+    monkeypatch.setattr(extract.time, 'sleep', delays.append)
+    return delays
+
+
+@pytest.fixture
+def api():
+    with StubAPI(make_records(1234)) as stub:
+        yield stub
+
+
+def make_client(url, **kwargs):
+    return FinesAPIClient(url, page_size=100, max_workers=4, backoff_base=0.1, **kwargs)
+
+
+def test_offset_pages_are_yielded_in_order(api):
+    records = list(make_client(api.url).iter_records())
+    assert [record['id'] for record in records] == list(range(1234))
+
+
+def test_cursor_pages_are_followed_in_order():
+    with StubAPI(make_records(450), cursor=True) as stub:
+        records = list(make_client(stub.url).iter_records())
+    assert [record['id'] for record in records] == list(range(450))
+
+
+def test_transient_statuses_are_retried_with_backoff(api, sleeps):
+    api.failures[300] = [(429, '0.25'), (503, None), (503, None)]
+    records = list(make_client(api.url).iter_records())
+    assert [record['id'] for record in records] == list(range(1234))
+    assert sum(1 for query in api.requests if query.get('offset') == '300') == 4
+    # Retry-After wins; otherwise full jitter up to backoff_base * 2 ** attempt
+    assert sleeps[0] == 0.25
+    assert 0 <= sleeps[1] <= 0.2 and 0 <= sleeps[2] <= 0.4
+
+
+def test_truncated_responses_are_retried(api, sleeps):
+    api.failures[200] = [('truncated', None)]
+    records = list(make_client(api.url).iter_records())
+    assert [record['id'] for record in records] == list(range(1234))
+    assert sum(1 for query in api.requests if query.get('offset') == '200') == 2
+
+
+@pytest.mark.parametrize('ignore, expected', [
+    (('limit', 'offset'), 1234),
+    (('offset',), 100),
+])
+def test_servers_ignoring_paging_are_not_paged_forever(ignore, expected):
+    with StubAPI(make_records(1234), ignore=ignore) as stub:
+        records = list(make_client(stub.url).iter_records())
+    assert [record['id'] for record in records] == list(range(expected))
+    assert len(stub.requests) <= 1 + 4 + 1
+
+
+def test_retries_give_up_after_max_retries(api, sleeps):
+    api.failures[0] = [(503, None)] * 10
+    with pytest.raises(extract.RequestException):
+        make_client(api.url, max_retries=2).get({'limit': 100, 'offset': 0})
+    assert len(sleeps) == 2
+
+
+def test_since_and_until_bound_the_records(api):
+    records = list(make_client(api.url).iter_records(since='2020-01-01', until='2021-01-01'))
+    assert records and all('2020-01-01' <= record['date'] < '2021-01-01' for record in records)
+    assert len(records) == 366
+    assert all(query['since'] == '2020-01-01' and query['until'] == '2021-01-01' for query in api.requests)
+
+
+def test_page_range_returns_its_slice(api):
+    records = list(make_client(api.url).iter_page_range(2, 5))
+    assert [record['id'] for record in records] == list(range(200, 500))
+
+
+def test_page_range_stops_at_short_page(api):
+    records = list(make_client(api.url).iter_page_range(11, 20))
+    assert [record['id'] for record in records] == list(range(1100, 1234))
+
+
+def test_placeholder_url_fails_without_retrying(sleeps):
+    start = time.perf_counter()
+    with pytest.raises(APINotConfigured):
+        list(FinesAPIClient(PLACEHOLDER_API_URL).iter_records())
+    assert sleeps == []
+    assert time.perf_counter() - start < 1
+
+
+def test_collector_fallback_applies_since_and_until(tmp_path, monkeypatch, sleeps):
+    from etl.gdpr_fines_collector import GDPRFinesCollector
+
+    store = ColumnarStore(str(tmp_path / 'store'))
+    store.write('raw', [dict(record, etid=f"ETid-{record['id']}") for record in make_records(800)])
+    monkeypatch.setenv('FINES_STORE_DIR', str(tmp_path / 'store'))
+    collector = GDPRFinesCollector(api_url=PLACEHOLDER_API_URL, chunk_size=128)
+
+    records = list(collector.iter_records(since='2020-01-01', until='2020-07-01'))
+    assert collector._source == 'store'
+    assert sleeps == []
+    assert [str(record['date'])[:10] for record in records] == [
+        (date(2020, 1, 1) + timedelta(days=i)).isoformat() for i in range(182)
+    ]
+    assert len(list(collector.iter_records())) == 800
+
+
+def test_stored_tracker_records_are_loaded(tmp_path, monkeypatch, sleeps, db_conn):
+    from etl.gdpr_fines_collector import GDPRFinesCollector
+    from etl.synthetic import generate_fines
+
+    records = generate_fines(200, seed=5, style='tracker', dirty_fraction=0)
+    ColumnarStore(str(tmp_path / 'store')).write('raw', records)
+    monkeypatch.setenv('FINES_STORE_DIR', str(tmp_path / 'store'))
+    collector = GDPRFinesCollector(api_url=PLACEHOLDER_API_URL, chunk_size=64, resolve_entities=False)
+
+    assert collector.run_etl()
+    assert collector._source == 'store'
+    with db_conn, db_conn.cursor() as cur:
+        cur.execute(
+            "SELECT fine_key, article_violated, type_of_violation, source_url FROM gdpr.fines ORDER BY id"
+        )
+        rows = cur.fetchall()
+    assert sorted(row[0] for row in rows) == sorted(record['etid'] for record in records)
+    assert all(article and violation and url for _, article, violation, url in rows)
+
+
+def test_api_runs_merge_into_the_snapshot(tmp_path, monkeypatch, sleeps, db_conn):
+    from etl.gdpr_fines_collector import GDPRFinesCollector
+
+    monkeypatch.setenv('FINES_STORE_DIR', str(tmp_path / 'store'))
+    records = [dict(record, etid=f"ETid-{record['id']}") for record in make_records(300)]
+    with StubAPI(records) as stub:
+        def run(**kwargs):
+            collector = GDPRFinesCollector(api_url=stub.url, chunk_size=64, resolve_entities=False, **kwargs)
+            assert collector.run_etl()
+            return collector.store.read_frame('raw')
+
+        assert len(run()) == 300
+        # An incremental run refetches the fines of the last loaded day
+        assert len(run()) == 300
+        stub.records[10]['amount'] = 999999
+        snapshot = run(incremental=False)
+    assert len(snapshot) == 300
+    assert snapshot.set_index('etid').loc['ETid-10', 'amount'] == '999999'
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl.articles import DEFAULT_LAW, parse_citations
+from etl.fines_store import AGGREGATES, MISSING_LABEL, FinesStore
+from etl.normalize import normalize_frame
+from etl.synthetic import generate_fines
+
+
+@pytest.fixture(scope='module')
+def fines():
+    df = normalize_frame(pd.DataFrame(generate_fines(3000, seed=11, style='tracker', dirty_fraction=0)))
+    df['date'] = pd.to_datetime(df['date'])
+    # Missing sectors are grouped under MISSING_LABEL; unparseable citations cite no article
+    df.loc[df.index % 17 == 0, 'sector'] = None
+    df.loc[df.index % 23 == 0, 'article'] = 'Section 4 BDSG-old'
+    return df
+
+
+@pytest.fixture(scope='module')
+def store(fines):
+    return FinesStore.from_frame(fines)
+
+
+def expected(df, by):
+    """The aggregates computed with a pandas groupby over the same fines."""
+    df = df.assign(year=df['date'].dt.year, sector=df['sector'].fillna(MISSING_LABEL))
+    if by == 'article':
+        pairs = df['article'].map(lambda value: sorted({(c.law, c.article) for c in parse_citations(value)}))
+        df = df.assign(article=pairs).explode('article').dropna(subset=['article'])
+        df['article'] = [f"Art. {article} {law}" if law == DEFAULT_LAW else f"{law} {article}"
+                         for law, article in df['article']]
+    grouped = df.groupby(by)['amount'].agg(['count', 'sum', 'max', 'mean'])
+    grouped.columns = list(AGGREGATES)
+    return grouped
+
+
+def assert_same(actual, reference):
+    actual = actual.sort_index()
+    assert list(actual.index) == list(reference.index)
+    assert list(actual['fine_count']) == list(reference['fine_count'])
+    for column in ('total_amount', 'max_amount', 'avg_amount'):
+        np.testing.assert_allclose(actual[column].to_numpy(), reference[column].to_numpy(), rtol=1e-12)
+
+
+@pytest.mark.parametrize('by', ['country', 'year', 'sector', 'article'])
+def test_aggregates_match_pandas_groupby(store, fines, by):
+    assert_same(store.aggregate(by, order_by=None), expected(fines, by))
+
+
+@pytest.mark.parametrize('by', ['country', 'year', 'sector', 'article'])
+def test_filtered_aggregates_match_pandas_groupby(store, fines, by):
+    filters = {'years': [2020, 2022], 'countries': ['Germany', 'Spain', 'Italy', 'Atlantis'], 'articles': [5, 32]}
+    cited = fines['article'].map(lambda value: bool({c.article for c in parse_citations(value)} & {5, 32}))
+    selected = fines[fines['date'].dt.year.isin(filters['years']) & fines['country'].isin(filters['countries']) & cited]
+    assert_same(store.aggregate(by, order_by=None, **filters), expected(selected, by))
+
+
+def test_groups_without_selected_fines_are_left_out(store):
+    result = store.aggregate('country', countries=['Germany'])
+    assert list(result.index) == ['Germany']
+    assert store.aggregate('country', countries=['Atlantis']).empty
+
+
+def test_ordering_and_limit(store):
+    result = store.aggregate('sector', order_by='fine_count', limit=3)
+    assert len(result) == 3
+    assert result['fine_count'].is_monotonic_decreasing
+    assert result['fine_count'].iloc[0] == store.aggregate('sector', order_by=None)['fine_count'].max()
+
+
+def test_frame_returns_the_selected_fines(store, fines):
+    frame = store.frame(['date', 'amount', 'country'], years=[2021], countries=['France'])
+    selected = fines[(fines['date'].dt.year == 2021) & (fines['country'] == 'France')].sort_values('date', kind='stable')
+    assert list(frame['date']) == list(selected['date'])
+    np.testing.assert_array_equal(frame['amount'].to_numpy(), selected['amount'].to_numpy())
+    assert set(frame['country']) == {'France'}
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_saved_store_loads_with_the_same_contents(store, tmp_path, mmap):
+    path = str(tmp_path / 'fines.fst')
+    size = store.save(path)
+    assert size == (tmp_path / 'fines.fst').stat().st_size
+
+    loaded = FinesStore.load(path, mmap=mmap)
+    assert len(loaded) == len(store)
+    assert loaded.labels == store.labels
+    for name, array in store.arrays.items():
+        assert loaded.arrays[name].dtype == array.dtype
+        np.testing.assert_array_equal(loaded.arrays[name], array)
+    for by in ('country', 'article'):
+        pd.testing.assert_frame_equal(loaded.aggregate(by, years=[2021]), store.aggregate(by, years=[2021]))
+
+
+def test_loading_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'not a store')
+    with pytest.raises(ValueError):
+        FinesStore.load(str(path))
@@ -0,0 +1,60 @@
+import pytest
+
+from etl.gdpr_fines_collector import GDPRFinesCollector
+from etl.synthetic import generate_fines
+
+
+@pytest.fixture
+def records():
+    return generate_fines(300, seed=7, dirty_fraction=0)
+
+
+def run(records, collector=None, **kwargs):
+    collector = collector or GDPRFinesCollector(resolve_entities=False, **kwargs)
+    requested = []
+
+    def iter_records(since=None, until=None):
+        requested.append(since)
+        return iter(records)
+
+    collector.iter_records = iter_records
+    assert collector.run_etl()
+    return requested[0]
+
+
+def fines(conn):
+    with conn, conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*), COUNT(DISTINCT fine_key), SUM(amount), MAX(date) FROM gdpr.fines")
+        return cur.fetchone()
+
+
+def test_full_run_refetches_and_upserts_into_a_loaded_table(db_conn, records):
+    assert run(records) is None
+    count, keys, total, latest = fines(db_conn)
+    assert count == keys
+
+    assert run(records) == latest.isoformat()
+
+    changed = [dict(record) for record in records]
+    changed[0]['amount'] = 123456789
+    assert run(changed, incremental=False) is None
+    after = fines(db_conn)
+    assert after[:2] == (count, keys)
+    assert after[2] != total
+
+
+@pytest.mark.parametrize('chunk_size', [64, 100, 1000])
+def test_chunked_runs_load_every_record(db_conn, records, chunk_size):
+    collector = GDPRFinesCollector(resolve_entities=False, chunk_size=chunk_size)
+    chunks = []
+    load_data = collector.load_data
+
+    def spy(df):
+        chunks.append(len(df))
+        return load_data(df)
+
+    collector.load_data = spy
+    run(records, collector)
+    assert chunks == [min(chunk_size, len(records) - start) for start in range(0, len(records), chunk_size)]
+    count, keys, _, _ = fines(db_conn)
+    assert count == keys == len(records)
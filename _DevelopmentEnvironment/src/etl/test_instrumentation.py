@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import pytest
+
+from etl import instrumentation
+from etl.instrumentation import count, count_rows, instrumented_run, run_metrics, timed, timed_iter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Count perf_counter calls; afterwards restore ETL_METRICS and the shared run metrics."""
+    calls = []
+    perf_counter = time.perf_counter
+
+    def counting():
+        calls.append(1)
+        return perf_counter()
+
+    monkeypatch.setattr(instrumentation.time, 'perf_counter', counting)
+    yield calls
+    monkeypatch.undo()
+    run_metrics.reset()
+
+
+@timed('decorated')
+def decorated(value):
+    return value * 2
+
+
+@timed('decorated_async')
+async def decorated_async(value):
+    return value * 3
+
+
+def run_stages():
+    with instrumented_run('test') as metrics:
+        with timed('stage'):
+            count('bytes_fetched', 10, source='api')
+        assert list(timed_iter('fetch', range(3))) == [0, 1, 2]
+        assert decorated(2) == 4
+        assert asyncio.run(decorated_async(2)) == 6
+        count_rows('validate', 5, 3)
+    return metrics.snapshot()
+
+
+def test_enabled_metrics_time_and_count_every_stage(monkeypatch, clock):
+    monkeypatch.delenv('ETL_METRICS', raising=False)
+    snapshot = run_stages()
+    assert clock
+    assert {stage: stats['calls'] for stage, stats in snapshot['stages'].items()} == {
+        'stage': 1, 'fetch': 4, 'decorated': 1, 'decorated_async': 1
+    }
+    counters = {(c['name'], tuple(c['labels'].values())): c['value'] for c in snapshot['counters']}
+    assert counters[('rows_dropped', ('validate',))] == 2
+    assert counters[('bytes_fetched', ('api',))] == 10
+
+
+@pytest.mark.parametrize('value', ['0', 'off', 'False', 'no'])
+def test_disabled_metrics_never_read_the_clock(monkeypatch, clock, caplog, value):
+    monkeypatch.setenv('ETL_METRICS', value)
+    monkeypatch.setattr(instrumentation, '_round_trips', lambda: pytest.fail("round trips read"))
+    with caplog.at_level('INFO', logger='etl.instrumentation'):
+        snapshot = run_stages()
+    assert clock == []
+    assert snapshot['stages'] == {} and snapshot['counters'] == []
+    assert '"event": "run"' not in caplog.text
+
+
+def test_metrics_are_enabled_by_default(monkeypatch):
+    monkeypatch.delenv('ETL_METRICS', raising=False)
+    assert instrumentation.metrics_enabled()
+    monkeypatch.setenv('ETL_METRICS', 'on')
+    assert instrumentation.metrics_enabled()
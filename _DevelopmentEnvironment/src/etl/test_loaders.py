@@ -0,0 +1,107 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from etl.loaders import assign_fine_keys, copy_frame, load_frame, table_columns, upsert_frame
+
+
+def fines_frame(records):
+    df = pd.DataFrame(records)
+    df['date'] = pd.to_datetime(df['date']).dt.date
+    return assign_fine_keys(df)
+
+
+def stored(conn):
+    with conn, conn.cursor() as cur:
+        cur.execute("SELECT fine_key, company, amount, source_url FROM gdpr.fines ORDER BY fine_key")
+        return [(key, company, float(amount), url) for key, company, amount, url in cur.fetchall()]
+
+
+@pytest.fixture
+def engine(db_conn):
+    from db.pool import get_engine
+    return get_engine()
+
+
+def tracker_records(amount=1000):
+    return [
+        {'etid': 'ETid-101', 'url': 'https://www.enforcementtracker.com/ETid-101', 'country': 'Spain',
+         'company': 'A', 'amount': amount, 'date': '2021-01-01'},
+        {'url': 'https://www.enforcementtracker.com/ETid-102', 'country': 'Spain',
+         'company': 'B', 'amount': 2000, 'date': '2021-02-01'},
+        {'source_url': 'https://www.enforcementtracker.com/ETid-103', 'country': 'Spain',
+         'company': 'C', 'amount': 3000, 'date': '2021-03-01'},
+    ]
+
+
+@pytest.mark.parametrize('strategy', ['copy', 'multi'])
+def test_upsert_accepts_etid_and_url_keyed_records(db_conn, engine, strategy):
+    counts = upsert_frame(engine, fines_frame(tracker_records()), 'fines', 'gdpr', strategy=strategy)
+    assert counts == {'inserted': 3, 'updated': 0, 'skipped': 0}
+    assert [row[0] for row in stored(db_conn)] == ['ETid-101', 'ETid-102', 'ETid-103']
+
+    counts = upsert_frame(engine, fines_frame(tracker_records(amount=1500)), 'fines', 'gdpr', strategy=strategy)
+    assert counts == {'inserted': 0, 'updated': 1, 'skipped': 2}
+    assert stored(db_conn)[0] == ('ETid-101', 'A', 1500.0, None)
+    assert stored(db_conn)[2][3] == 'https://www.enforcementtracker.com/ETid-103'
+
+
+def test_table_columns_skip_generated_columns(engine):
+    with engine.connect() as conn:
+        columns = table_columns(conn, 'fines', 'gdpr')
+        assert {'fine_key', 'row_hash', 'article_violated'} <= set(columns)
+        assert 'search_vector' not in columns
+        assert table_columns(conn, 'no_such_table', 'gdpr') == []
+
+
+AWKWARD_TEXT = [
+    'plain', None, 'say "hello", then leave', 'line one\nline two\r\nline three', 'Société Générale – ŁÓDŹ 東京 ✓',
+    '', "back\\slash and 'single' quotes", '   padded   ',
+]
+
+
+@pytest.fixture
+def copy_table(db_conn):
+    with db_conn, db_conn.cursor() as cur:
+        cur.execute("CREATE TABLE gdpr.copy_test (id INTEGER PRIMARY KEY, label TEXT, amount NUMERIC(20, 2), day DATE)")
+    yield db_conn
+    with db_conn, db_conn.cursor() as cur:
+        cur.execute("DROP TABLE gdpr.copy_test")
+
+
+def awkward_frame():
+    return pd.DataFrame({
+        'id': range(len(AWKWARD_TEXT)),
+        'label': AWKWARD_TEXT,
+        'amount': [1000.5, None, 0, 2.25, float('nan'), 1e9, 3, 4],
+        'day': [date(2021, 1, 1), None, date(2022, 2, 2), None, date(2023, 3, 3), None, date(2024, 4, 4), None],
+    })
+
+
+def copied_rows(conn):
+    with conn, conn.cursor() as cur:
+        cur.execute("SELECT id, label, amount, day FROM gdpr.copy_test ORDER BY id")
+        return [(i, label, None if amount is None else float(amount), day) for i, label, amount, day in cur.fetchall()]
+
+
+def expected_rows(df):
+    return [tuple(None if pd.isna(value) else value for value in row)
+            for row in df[['id', 'label', 'amount', 'day']].itertuples(index=False)]
+
+
+@pytest.mark.parametrize('strategy', ['copy', 'multi'])
+def test_load_frame_round_trips_nulls_quotes_newlines_and_unicode(copy_table, engine, strategy):
+    df = awkward_frame()
+    assert load_frame(engine, df, 'copy_test', 'gdpr', strategy=strategy, chunk_size=3) == len(df)
+    assert copied_rows(copy_table) == expected_rows(df)
+
+
+def test_copy_frame_round_trips_in_the_callers_transaction(copy_table):
+    df = awkward_frame()
+    assert copy_frame(copy_table, df, 'copy_test', 'gdpr', chunk_size=2) == len(df)
+    copy_table.rollback()
+    assert copied_rows(copy_table) == []
+    copy_frame(copy_table, df, 'copy_test', 'gdpr')
+    copy_table.commit()
+    assert copied_rows(copy_table) == expected_rows(df)
@@ -0,0 +1,78 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl.normalize import canonicalize_countries, normalize_amounts, normalize_dates, normalize_frame
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('525,000', 525000.0),
+    ('1.500.000', 1500000.0),
+    ('1 000', 1000.0),
+    ("10'000", 10000.0),
+    ('EUR 20,000', 20000.0),
+    ('€ 35.000.000', 35000000.0),
+    ('Only known: 10,000', 10000.0),
+    ('2,5', 2.5),
+    ('1500.50', 1500.5),
+    (' 7000 ', 7000.0),
+])
+def test_amount_formats(raw, expected):
+    assert normalize_amounts(pd.Series([raw], dtype=object))[0] == expected
+
+
+@pytest.mark.parametrize('raw', ['Unknown', 'n/a', 'N/A', 'none', '-', '?', '', None])
+def test_unknown_amounts_are_nan(raw):
+    assert math.isnan(normalize_amounts(pd.Series([raw], dtype=object))[0])
+
+
+def test_numeric_amounts_pass_through():
+    result = normalize_amounts(pd.Series([1, 2, 3]))
+    assert result.dtype == np.float64
+    assert list(result) == [1.0, 2.0, 3.0]
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('2024-04-04', '2024-04-04'),
+    ('2024-04-04T12:30:00', '2024-04-04'),
+    ('2024-04-04 12:30', '2024-04-04'),
+    ('20240404', '2024-04-04'),
+    (20240404.0, '2024-04-04'),
+    ('2024/04/04', '2024-04-04'),
+    ('2024-04', '2024-04-01'),
+    ('2024', '2024-01-01'),
+])
+def test_date_formats(raw, expected):
+    assert normalize_dates(pd.Series([raw], dtype=object))[0] == pd.Timestamp(expected)
+
+
+@pytest.mark.parametrize('raw', ['04.04.2024', 'yesterday', '2024-13-01', '', None])
+def test_unparseable_dates_are_nat(raw):
+    assert pd.isna(normalize_dates(pd.Series([raw], dtype=object))[0])
+
+
+def test_numeric_dates_are_parsed_as_compact_dates():
+    result = normalize_dates(pd.Series([20240404.0, np.nan, 20190101.0]))
+    assert list(result[[0, 2]]) == [pd.Timestamp('2024-04-04'), pd.Timestamp('2019-01-01')]
+    assert pd.isna(result[1])
+
+
+def test_countries_are_canonicalised():
+    raw = pd.Series(['GERMANY', ' deutschland ', 'The  Netherlands', 'españa', 'atlantis', None], dtype=object)
+    assert list(canonicalize_countries(raw)) == ['Germany', 'Germany', 'Netherlands', 'Spain', 'Atlantis', None]
+
+
+def test_repeated_values_are_parsed_consistently():
+    raw = pd.Series(['525,000', 'Unknown', '525,000', None, '1.500.000'] * 1000, dtype=object)
+    result = normalize_amounts(raw)
+    assert result.index.equals(raw.index)
+    assert list(result[:5].fillna(-1)) == [525000.0, -1, 525000.0, -1, 1500000.0]
+    assert result.isna().sum() == 2000
+
+
+def test_normalize_frame_only_touches_present_columns():
+    df = pd.DataFrame({'amount': ['1,000'], 'country': ['FRANCE'], 'company': ['X']})
+    result = normalize_frame(df)
+    assert result.to_dict('records') == [{'amount': 1000.0, 'country': 'France', 'company': 'X'}]
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl.validation import RULE_TYPES, Rule, RuleSet, default_rules, register_rule_type
+
+
+def fines(**overrides):
+    df = pd.DataFrame({
+        'country': ['Germany', 'France', 'Atlantis', None, 'Spain'],
+        'company': ['A', 'B', 'C', 'D', ' '],
+        'amount': [1000.0, -5.0, 2000.0, 3000.0, 4000.0],
+        'date': pd.to_datetime(['2020-01-01', '2021-06-01', '2017-01-01', '2022-02-02', '2023-03-03']),
+        'article_violated': ['Art. 5 GDPR', 'Art. 6 GDPR', 'Art. 32 GDPR', 'Section 4', 'Art. 13 GDPR'],
+    })
+    return df.assign(**overrides)
+
+
+def test_default_rules_quarantine_failing_rows_with_reasons():
+    result = default_rules(['Germany', 'France', 'Spain']).evaluate(fines())
+    assert list(result.valid['company']) == ['A']
+    reasons = dict(zip(result.quarantine['company'], result.quarantine['failed_rules']))
+    assert reasons == {'B': 'amount_range', 'C': 'date_range', 'D': 'country_not_null', ' ': 'company_not_null'}
+    assert result.failures['amount_range'] == 1
+    assert result.failures['company_not_null'] == 1
+
+
+def test_date_range_rejects_fines_before_the_gdpr():
+    result = default_rules().evaluate(fines(date=pd.to_datetime(['2017-01-01'] * 5)))
+    assert result.valid.empty
+    assert result.failures['date_range'] == 5
+
+
+def test_warnings_are_counted_but_not_quarantined():
+    result = default_rules(['Germany', 'France', 'Spain']).evaluate(fines(date=pd.to_datetime(['2020-01-01'] * 5)))
+    assert result.failures['country_whitelist'] == 1
+    assert result.failures['article_format'] == 1
+    assert 'Atlantis' in set(result.valid['country'])
+
+
+def test_country_rule_only_applies_with_a_whitelist():
+    assert 'country_whitelist' not in default_rules().evaluate(fines()).failures
+    assert 'country_whitelist' in default_rules(['Germany']).evaluate(fines()).failures
+
+
+def test_duplicates_keep_the_first_occurrence():
+    df = pd.concat([fines(), fines()], ignore_index=True)
+    result = RuleSet([Rule('duplicate_fine', ['country', 'company', 'date', 'amount'], 'unique')]).evaluate(df)
+    assert result.failures['duplicate_fine'] == 5
+    assert list(result.valid.index) == [0, 1, 2, 3, 4]
+
+
+def test_rules_on_missing_columns_are_skipped():
+    result = RuleSet([Rule('sector_not_null', 'sector', 'not_null')]).evaluate(fines())
+    assert result.failures == {}
+    assert len(result.valid) == 5
+
+
+def test_registered_rule_types_can_be_used():
+    @register_rule_type('even_amount')
+    def _even_amount(df, column):
+        return (df[column] % 2 != 0).to_numpy()
+
+    try:
+        result = RuleSet([Rule('even', 'amount', 'even_amount')]).evaluate(fines(amount=[1.0, 2.0, 3.0, 4.0, 6.0]))
+        assert list(result.valid['amount']) == [2.0, 4.0, 6.0]
+    finally:
+        del RULE_TYPES['even_amount']
+
+
+def test_unknown_rule_type_and_severity_are_rejected():
+    with pytest.raises(ValueError):
+        Rule('x', 'amount', 'no_such_check')
+    with pytest.raises(ValueError):
+        Rule('x', 'amount', 'not_null', severity='fatal')
+
+
+def test_collector_rebuilds_rules_once_the_whitelist_is_available(monkeypatch):
+    from etl.gdpr_fines_collector import GDPRFinesCollector
+
+    collector = GDPRFinesCollector()
+    whitelists = iter([None, ['Germany', 'France', 'Spain']])
+    monkeypatch.setattr(collector, '_load_country_whitelist', lambda: next(whitelists))
+    records = fines(date=['2020-01-01'] * 5, amount=[1.0] * 5, company=list('ABCDE')).to_dict('records')
+
+    collector.validate_data(records)
+    assert 'country_whitelist' not in collector.last_validation.failures
+    assert collector.rules is None
+
+    collector.validate_data(records)
+    assert collector.last_validation.failures['country_whitelist'] == 1
+    assert collector.rules is not None
+    assert np.all(collector.validate_data(records)['country'].notna())
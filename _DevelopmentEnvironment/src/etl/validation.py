@@ -0,0 +1,214 @@
+"""
+Declarative validation rules for GDPR fines data.
+
+Each rule names a registered check type and compiles to a vectorized
+boolean mask over the frame (True marks a failing row). A RuleSet
+evaluates all of its rules in one pass, counts failures per rule, and
+splits the frame into valid rows and a quarantine of rejected rows.
+"""
+
+import logging
+import re
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Rule severities: rejected rows are quarantined, warnings are only counted
+REJECT = 'reject'
+WARN = 'warn'
+
+# Registry of check types: name -> function(df, column, **params) -> failure mask
+RULE_TYPES: Dict[str, Callable[..., np.ndarray]] = {}
+
+# Date the GDPR became enforceable
+GDPR_EFFECTIVE_DATE = date(2018, 5, 25)
+
+# Largest plausible fine in EUR
+MAX_FINE_AMOUNT = 5_000_000_000
+
+# Article citations such as "Art. 5 (1) a) GDPR" or "Art. 6, 12-14 GDPR"
+ARTICLE_PATTERN = r'^\s*Art(?:icle|\.)?\s*\d+'
+
+
+def register_rule_type(name: str):
+    """
+    Register a check type under a name.
+
+    Args:
+        name: Name used by Rule(check=...)
+
+    Returns:
+        Decorator registering the mask function
+    """
+    def decorator(func: Callable[..., np.ndarray]) -> Callable[..., np.ndarray]:
+        RULE_TYPES[name] = func
+        return func
+    return decorator
+
+
+@register_rule_type('not_null')
+def _not_null(df: pd.DataFrame, column: str) -> np.ndarray:
+    values = df[column]
+    mask = values.isna()
+    if values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+        mask |= values.astype(str).str.strip().eq('')
+    return mask.to_numpy()
+
+
+@register_rule_type('in_set')
+def _in_set(df: pd.DataFrame, column: str, values: Iterable[str], case_sensitive: bool = False) -> np.ndarray:
+    column_values = df[column].astype(str)
+    allowed = list(values)
+    if not case_sensitive:
+        column_values = column_values.str.casefold()
+        allowed = [value.casefold() for value in allowed]
+    return (~column_values.isin(allowed) & df[column].notna()).to_numpy()
+
+
+@register_rule_type('between')
+def _between(df: pd.DataFrame, column: str, min_value: Any = None, max_value: Any = None) -> np.ndarray:
+    values = df[column]
+    mask = np.zeros(len(df), dtype=bool)
+    if min_value is not None:
+        mask |= (values < min_value).to_numpy()
+    if max_value is not None:
+        mask |= (values > max_value).to_numpy()
+    return mask
+
+
+@register_rule_type('matches')
+def _matches(df: pd.DataFrame, column: str, pattern: str) -> np.ndarray:
+    values = df[column]
+    matched = values.astype(str).str.contains(re.compile(pattern, re.IGNORECASE), regex=True)
+    return (~matched & values.notna()).to_numpy()
+
+
+@register_rule_type('unique')
+def _unique(df: pd.DataFrame, column: Any) -> np.ndarray:
+    subset = [column] if isinstance(column, str) else list(column)
+    return df.duplicated(subset=subset, keep='first').to_numpy()
+
+
+class Rule:
+    """A named check applied to one column (or a list of columns for 'unique')."""
+
+    def __init__(self, name: str, column: Any, check: str, severity: str = REJECT, **params):
+        """
+        Initialize a rule.
+
+        Args:
+            name: Rule name used in failure counts and the quarantine
+            column: Column (or columns) the rule applies to
+            check: Registered check type
+            severity: 'reject' to quarantine failing rows, 'warn' to only count them
+            **params: Parameters passed to the check
+        """
+        if check not in RULE_TYPES:
+            raise ValueError(f"Unknown rule type '{check}', expected one of {sorted(RULE_TYPES)}")
+        if severity not in (REJECT, WARN):
+            raise ValueError(f"Unknown severity '{severity}'")
+        self.name = name
+        self.column = column
+        self.check = check
+        self.severity = severity
+        self.params = params
+
+    @property
+    def columns(self) -> List[str]:
+        return [self.column] if isinstance(self.column, str) else list(self.column)
+
+    def mask(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Evaluate the rule.
+
+        Args:
+            df: DataFrame to check
+
+        Returns:
+            Boolean array, True where a row fails the rule
+        """
+        return np.asarray(RULE_TYPES[self.check](df, self.column, **self.params), dtype=bool)
+
+
+class ValidationResult:
+    """Outcome of evaluating a RuleSet against a frame."""
+
+    def __init__(self, valid: pd.DataFrame, quarantine: pd.DataFrame, failures: Dict[str, int]):
+        self.valid = valid
+        self.quarantine = quarantine
+        self.failures = failures
+
+    @property
+    def rejected(self) -> int:
+        return len(self.quarantine)
+
+
+class RuleSet:
+    """A collection of rules evaluated together in one pass."""
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = list(rules)
+
+    def evaluate(self, df: pd.DataFrame) -> ValidationResult:
+        """
+        Evaluate all rules and split the frame into valid and quarantined rows.
+
+        Rules whose columns are missing from the frame are skipped.
+
+        Args:
+            df: DataFrame to validate
+
+        Returns:
+            ValidationResult with valid rows, quarantined rows (with a
+            'failed_rules' column) and per-rule failure counts
+        """
+        rules = [rule for rule in self.rules if all(col in df.columns for col in rule.columns)]
+        if not rules or df.empty:
+            return ValidationResult(df, df.iloc[0:0].assign(failed_rules=''), {rule.name: 0 for rule in rules})
+
+        masks = np.column_stack([rule.mask(df) for rule in rules])
+        counts = masks.sum(axis=0)
+        failures = {rule.name: int(count) for rule, count in zip(rules, counts)}
+
+        reject_columns = [i for i, rule in enumerate(rules) if rule.severity == REJECT]
+        rejected = masks[:, reject_columns].any(axis=1) if reject_columns else np.zeros(len(df), dtype=bool)
+
+        quarantine = df[rejected].copy()
+        reasons = np.full(int(rejected.sum()), '', dtype=object)
+        for i in reject_columns:
+            failed = masks[rejected, i]
+            reasons[failed] = reasons[failed] + rules[i].name + ';'
+        quarantine['failed_rules'] = [reason.rstrip(';') for reason in reasons]
+
+        return ValidationResult(df[~rejected], quarantine, failures)
+
+
+def default_rules(countries: Optional[Iterable[str]] = None) -> RuleSet:
+    """
+    Build the GDPR fines rule set described in data_quality_checks.qmd.
+
+    Args:
+        countries: Country whitelist (e.g. names from gdpr.countries);
+            the country rule is skipped when not given
+
+    Returns:
+        RuleSet with completeness, range, format, whitelist and duplicate rules
+    """
+    rules = [
+        Rule('country_not_null', 'country', 'not_null'),
+        Rule('company_not_null', 'company', 'not_null'),
+        Rule('amount_not_null', 'amount', 'not_null'),
+        Rule('date_not_null', 'date', 'not_null'),
+        Rule('amount_range', 'amount', 'between', min_value=0, max_value=MAX_FINE_AMOUNT),
+        Rule('date_range', 'date', 'between',
+             min_value=pd.Timestamp(GDPR_EFFECTIVE_DATE), max_value=pd.Timestamp.now().normalize()),
+        Rule('article_format', 'article_violated', 'matches', severity=WARN, pattern=ARTICLE_PATTERN),
+        Rule('duplicate_fine', ['country', 'company', 'date', 'amount'], 'unique'),
+    ]
+    if countries:
+        rules.append(Rule('country_whitelist', 'country', 'in_set', severity=WARN, values=countries))
+    return RuleSet(rules)
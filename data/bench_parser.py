@@ -0,0 +1,77 @@
+import argparse
+import glob
+import logging
+import os
+import re
+import time
+from typing import List
+
+from fixture_server import load_records, render_page
+from gdpr_scraper import PARSER_BACKENDS, GDPRScraper
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def extract_table(page_html: str) -> str:
+    """Return the inner HTML of the fines table, as page.inner_html('table.table') would"""
+    match = re.search(r'<table[^>]*class="[^"]*\btable\b[^"]*"[^>]*>(.*?)</table>', page_html, re.S)
+    return match.group(1) if match else page_html
+
+
+def load_tables(pages_dir: str = None, page_size: int = 50) -> List[str]:
+    """Load saved tracker pages, or render them from raw_gdpr_data.json when no directory is given"""
+    if pages_dir:
+        tables = []
+        for path in sorted(glob.glob(os.path.join(pages_dir, '*.html'))):
+            with open(path, 'r', encoding='utf-8') as f:
+                tables.append(extract_table(f.read()))
+        return tables
+
+    records = load_records(os.path.join(DATA_DIR, 'raw_gdpr_data.json'))
+    pages = (len(records) + page_size - 1) // page_size
+    return [extract_table(render_page(records, page, page_size)) for page in range(1, pages + 1)]
+
+
+def run_benchmark(tables: List[str], repeat: int = 20) -> dict:
+    """Time every parser backend over the tables and check they return identical records"""
+    results = {}
+    reference = None
+    for backend in PARSER_BACKENDS:
+        scraper = GDPRScraper(parser=backend, use_cache=False)  # parse only, never touch the page cache
+        records = [fine for table in tables for fine in scraper.parse_table(table)]
+        if reference is None:
+            reference = records
+        elif records != reference:
+            mismatches = sum(1 for a, b in zip(records, reference) if a != b)
+            raise AssertionError(
+                f"{backend} returned {len(records)} records ({mismatches} differing) "
+                f"vs {len(reference)} from {PARSER_BACKENDS[0]}"
+            )
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for table in tables:
+                scraper.parse_table(table)
+        elapsed = time.perf_counter() - start
+        rows = len(records) * repeat
+        results[backend] = {'seconds': elapsed, 'rows_per_sec': rows / elapsed if elapsed else float('inf')}
+        logger.info(f"{backend}: {rows} rows in {elapsed:.3f}s ({results[backend]['rows_per_sec']:,.0f} rows/sec)")
+
+    logger.info(f"All backends returned the same {len(reference)} records")
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Benchmark the fines table parser backends')
+    parser.add_argument('--pages', help='Directory of saved tracker pages (*.html)')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    run_benchmark(load_tables(args.pages), repeat=args.repeat)
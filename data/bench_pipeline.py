@@ -0,0 +1,459 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# The synthetic generator and ETL modules come from the installed gdpr-fines-etl package
+from etl.synthetic import generate_fines, iter_fine_chunks
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+INIT_SCRIPTS_DIR = os.path.join(os.path.dirname(DATA_DIR), '_DevelopmentEnvironment', 'init-scripts')
+
+# Dataset sizes benchmarked by default
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+
+# Where the load stage writes: a throwaway initdb cluster, a scratch database on the
+# configured server, or SQLite standing in for PostgreSQL
+DATABASES = ('temp', 'server', 'sqlite')
+
+# Scratch database created on the configured server by --database server
+SCRATCH_DATABASE = 'gdpr_fines_bench'
+
+# Collector stages that make up the pipeline time (generation is not counted)
+PIPELINE_STAGES = ('validate_data', 'transform_data', 'resolve_companies', 'load_data', 'refresh_rollups')
+
+# Tables emptied between dataset sizes
+RESET_TABLES = ('gdpr.fines', 'gdpr.fine_articles', 'gdpr.fines_by_country_month', 'gdpr.fines_by_article',
+                'gdpr.fines_by_sector', 'gdpr.rollup_dirty', 'gdpr.rollup_dirty_articles', 'gdpr.companies',
+                'gdpr.company_keys', 'gdpr.company_aliases', 'gdpr.company_blocks')
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss() -> int:
+    """Peak resident set size of this process so far, in bytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class StageRecorder:
+    """Accumulate wall time, peak RSS and traced allocations per pipeline stage"""
+
+    def __init__(self, trace_allocations: bool = True, interval: float = 0.01):
+        self.trace_allocations = trace_allocations
+        self.interval = interval
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._stage = None
+        self._peak = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name='rss-sampler', daemon=True)
+
+    def _sample(self):
+        """Track the highest RSS seen while a stage is running"""
+        while not self._stop.wait(self.interval):
+            rss = current_rss()
+            if rss is None:
+                return
+            with self._lock:
+                if self._stage is not None and rss > self._peak:
+                    self._peak = rss
+
+    def __enter__(self):
+        if self.trace_allocations:
+            tracemalloc.start()
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._sampler.join()
+        if self.trace_allocations:
+            tracemalloc.stop()
+
+    @contextmanager
+    def measure(self, stage: str, rows: int = 0):
+        """Time one call of a stage; repeated calls (one per chunk) are summed"""
+        baseline = current_rss() or max_rss()
+        with self._lock:
+            self._stage, self._peak = stage, baseline
+        if self.trace_allocations:
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            rss = current_rss()
+            with self._lock:
+                peak = max(self._peak, rss) if rss is not None else max_rss()
+                self._stage = None
+            metrics = self.stages.setdefault(stage, {
+                'seconds': 0.0, 'rows': 0, 'calls': 0, 'peak_rss_mb': 0.0, 'rss_growth_mb': 0.0
+            })
+            metrics['seconds'] += elapsed
+            metrics['rows'] += rows
+            metrics['calls'] += 1
+            metrics['peak_rss_mb'] = max(metrics['peak_rss_mb'], peak / 2 ** 20)
+            metrics['rss_growth_mb'] = max(metrics['rss_growth_mb'], (peak - baseline) / 2 ** 20)
+            if self.trace_allocations:
+                current, traced_peak = tracemalloc.get_traced_memory()
+                metrics['alloc_peak_mb'] = max(metrics.get('alloc_peak_mb', 0.0), (traced_peak - traced_before) / 2 ** 20)
+                metrics['alloc_net_mb'] = metrics.get('alloc_net_mb', 0.0) + (current - traced_before) / 2 ** 20
+
+    def results(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage metrics with throughput"""
+        results = {}
+        for stage, metrics in self.stages.items():
+            seconds = metrics['seconds']
+            results[stage] = dict(metrics, rows_per_sec=metrics['rows'] / seconds if seconds else None)
+        return results
+
+
+def find_pg_bin() -> Optional[str]:
+    """Directory holding initdb and pg_ctl: PG_BIN, the PATH or a Debian-style install"""
+    candidates = [os.getenv('PG_BIN')]
+    initdb = shutil.which('initdb')
+    if initdb:
+        candidates.append(os.path.dirname(initdb))
+    candidates.extend(sorted(glob.glob('/usr/lib/postgresql/*/bin'), reverse=True))
+    for candidate in candidates:
+        if candidate and os.path.exists(os.path.join(candidate, 'initdb')):
+            return candidate
+    return None
+
+
+class TemporaryPostgres:
+    """A throwaway PostgreSQL cluster on a Unix socket, deleted on stop"""
+
+    def __init__(self, bin_dir: str):
+        self.bin_dir = bin_dir
+        self.root = None
+
+    def start(self) -> Dict[str, str]:
+        """Run initdb and start the server; returns the DB_* settings to reach it"""
+        if hasattr(os, 'geteuid') and os.geteuid() == 0:
+            raise RuntimeError("initdb cannot run as root")
+        self.root = tempfile.mkdtemp(prefix='gdpr-bench-')
+        pgdata = os.path.join(self.root, 'data')
+        subprocess.run(
+            [os.path.join(self.bin_dir, 'initdb'), '-D', pgdata, '-U', 'postgres', '-A', 'trust',
+             '-E', 'UTF8', '--no-sync'],
+            check=True, capture_output=True
+        )
+        subprocess.run(
+            [os.path.join(self.bin_dir, 'pg_ctl'), '-D', pgdata, '-l', os.path.join(self.root, 'server.log'),
+             '-o', f"-k {self.root} -c listen_addresses=''", '-w', 'start'],
+            check=True, capture_output=True
+        )
+        return {'DB_HOST': self.root, 'DB_PORT': '5432', 'DB_USER': 'postgres', 'DB_PASSWORD': ''}
+
+    def stop(self):
+        """Stop the server and delete the cluster"""
+        if self.root is None:
+            return
+        subprocess.run(
+            [os.path.join(self.bin_dir, 'pg_ctl'), '-D', os.path.join(self.root, 'data'), '-m', 'fast', '-w', 'stop'],
+            capture_output=True
+        )
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.root = None
+
+
+def create_database(settings: Dict[str, str], name: str):
+    """(Re)create a database and run the init scripts in it"""
+    import psycopg2
+
+    connect = dict(host=settings['DB_HOST'], port=settings['DB_PORT'], user=settings['DB_USER'],
+                   password=settings['DB_PASSWORD'])
+    conn = psycopg2.connect(dbname='postgres', **connect)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"DROP DATABASE IF EXISTS {name}")
+        cur.execute(f"CREATE DATABASE {name}")
+    conn.close()
+
+    conn = psycopg2.connect(dbname=name, **connect)
+    with conn, conn.cursor() as cur:
+        for path in sorted(glob.glob(os.path.join(INIT_SCRIPTS_DIR, '*.sql'))):
+            with open(path, 'r', encoding='utf-8') as f:
+                cur.execute(f.read())
+    conn.close()
+
+
+def drop_database(settings: Dict[str, str], name: str):
+    """Drop a scratch database"""
+    import psycopg2
+
+    conn = psycopg2.connect(dbname='postgres', host=settings['DB_HOST'], port=settings['DB_PORT'],
+                            user=settings['DB_USER'], password=settings['DB_PASSWORD'])
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)")
+    conn.close()
+
+
+def sqlite_engine(path: str):
+    """SQLite engine with the gdpr schema attached as a second database"""
+    from sqlalchemy import create_engine, event
+
+    engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, 'connect')
+    def attach_schema(dbapi_conn, _):
+        dbapi_conn.execute(f"ATTACH DATABASE '{path}.gdpr' AS gdpr")
+
+    return engine
+
+
+def reset_tables(engine):
+    """Empty the fines and rollup tables between dataset sizes"""
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        if engine.dialect.name == 'sqlite':
+            conn.execute(text("DROP TABLE IF EXISTS gdpr.fines"))
+        else:
+            conn.execute(text(f"TRUNCATE {', '.join(RESET_TABLES)} RESTART IDENTITY"))
+
+
+def bench_collector(collector, n: int, seed: int, recorder: StageRecorder, rollups: bool):
+    """Run the collector's validate/transform/load stages over n synthetic fines, chunk by chunk"""
+    loaded = 0
+    for records in iter_fine_chunks(n, collector.chunk_size, seed=seed, style='api'):
+        with recorder.measure('validate_data', len(records)):
+            validated = collector.validate_data(records)
+        with recorder.measure('transform_data', len(validated)):
+            transformed = collector.transform_data(validated)
+        with recorder.measure('resolve_companies', len(transformed)):
+            transformed = collector.resolve_companies(transformed)
+        with recorder.measure('load_data', len(transformed)):
+            loaded += collector.load_data(transformed)
+        del records, validated, transformed
+
+    if rollups and loaded:
+        from db.rollups import refresh_rollups
+
+        with recorder.measure('refresh_rollups', loaded):
+            refresh_rollups()
+    return loaded
+
+
+def bench_scraper(n: int, seed: int, recorder: StageRecorder, store_dir: str,
+                  max_html_rows: int, max_store_rows: int):
+    """Time the scraper's process_row over rendered tracker pages and process_and_save_data into a temp store"""
+    from bs4 import BeautifulSoup
+
+    from bench_parser import extract_table
+    from fixture_server import render_page
+    from gdpr_scraper import GDPRScraper
+
+    scraper = GDPRScraper(use_cache=False, store_dir=store_dir)
+
+    html_rows = min(n, max_html_rows)
+    records = generate_fines(html_rows, seed=seed, style='tracker')
+    page_size = 50
+    pages = (len(records) + page_size - 1) // page_size
+    for page_num in range(1, pages + 1):
+        table = extract_table(render_page(records, page_num, page_size))
+        rows = BeautifulSoup(table, 'html.parser').find_all('tr')[1:]
+        with recorder.measure('process_row', len(rows)):
+            for row in rows:
+                scraper.process_row(row)
+    del records
+
+    store_rows = min(n, max_store_rows)
+    data = [fine for chunk in iter_fine_chunks(store_rows, 100_000, seed=seed, style='tracker') for fine in chunk]
+    with recorder.measure('process_and_save_data', len(data)):
+        scraper.process_and_save_data(data)
+    return {'process_row': html_rows, 'process_and_save_data': store_rows}
+
+
+def environment(database: str, engine) -> dict:
+    """Interpreter, library and database versions recorded with the results"""
+    import pyarrow
+
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'pyarrow': pyarrow.__version__,
+        'database': database,
+    }
+    if engine is not None:
+        from sqlalchemy import text
+
+        with engine.connect() as conn:
+            query = "SELECT sqlite_version()" if engine.dialect.name == 'sqlite' else "SHOW server_version"
+            info['database_version'] = conn.execute(text(query)).scalar()
+    return info
+
+
+def run_benchmark(sizes: List[int], seed: int = 0, database: str = 'temp', chunk_size: int = 10_000,
+                  trace_allocations: bool = False, max_html_rows: int = 100_000,
+                  max_store_rows: int = 1_000_000, skip_scraper: bool = False) -> dict:
+    """Benchmark the collector and scraper stages at each size and return the results"""
+    workdir = tempfile.mkdtemp(prefix='gdpr-bench-work-')
+    server = None
+    settings = None
+    if database == 'temp':
+        bin_dir = find_pg_bin()
+        try:
+            if bin_dir is None:
+                raise RuntimeError("initdb not found (set PG_BIN)")
+            server = TemporaryPostgres(bin_dir)
+            settings = server.start()
+            create_database(settings, 'gdpr_fines')
+            settings['DB_NAME'] = 'gdpr_fines'
+        except (RuntimeError, OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"Temporary PostgreSQL unavailable ({e}), using SQLite as a stand-in")
+            if server is not None:
+                server.stop()
+                server = None
+            database = 'sqlite'
+    elif database == 'server':
+        settings = {key: os.getenv(key, default) for key, default in (
+            ('DB_HOST', 'localhost'), ('DB_PORT', '5432'), ('DB_USER', 'andi_user'), ('DB_PASSWORD', 'andi_password')
+        )}
+        create_database(settings, SCRATCH_DATABASE)
+        settings['DB_NAME'] = SCRATCH_DATABASE
+
+    # db.config reads the connection settings at import, so point it at the benchmark database first
+    if settings:
+        os.environ.update(settings)
+    from etl.gdpr_fines_collector import GDPRFinesCollector
+    # Keep the per-chunk ETL logging quiet and report the stage totals instead
+    logging.getLogger().setLevel(logging.ERROR)
+    logger.setLevel(logging.INFO)
+
+    collector = GDPRFinesCollector(chunk_size=chunk_size, upsert=database != 'sqlite')
+    if database == 'sqlite':
+        # Plain executemany appends into an attached 'gdpr' database; the upsert path is PostgreSQL-only
+        collector.engine = sqlite_engine(os.path.join(workdir, 'fines.db'))
+        collector.load_strategy = 'executemany'
+        collector.link_articles = False
+        collector.resolve_entities = False
+        collector._schema_ready = True
+
+    report = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'seed': seed,
+        'chunk_size': chunk_size,
+        'allocations_traced': trace_allocations,
+        'environment': environment(database, collector.engine),
+        'runs': [],
+    }
+
+    def measure(n: int, trace: bool):
+        if database != 'sqlite':
+            collector._ensure_schema()
+        reset_tables(collector.engine)
+        with StageRecorder(trace) as recorder:
+            loaded = bench_collector(collector, n, seed, recorder, rollups=database != 'sqlite')
+            scraper_rows = None
+            if not skip_scraper:
+                scraper_rows = bench_scraper(n, seed, recorder, os.path.join(workdir, f'store-{n}'),
+                                             max_html_rows, max_store_rows)
+        return loaded, scraper_rows, recorder.results()
+
+    try:
+        for n in sizes:
+            logger.info(f"Benchmarking {n:,} fines")
+            loaded, scraper_rows, stages = measure(n, trace=False)
+            if trace_allocations:
+                # tracemalloc slows Python-heavy stages several times over, so allocations
+                # come from a second, traced pass and the timings from the untraced one
+                logger.info(f"Tracing allocations for {n:,} fines")
+                for stage, metrics in measure(n, trace=True)[2].items():
+                    stages[stage]['alloc_peak_mb'] = metrics['alloc_peak_mb']
+                    stages[stage]['alloc_net_mb'] = metrics['alloc_net_mb']
+            pipeline_seconds = sum(stages[stage]['seconds'] for stage in PIPELINE_STAGES if stage in stages)
+            run = {
+                'rows': n,
+                'loaded': loaded,
+                'pipeline_seconds': pipeline_seconds,
+                'pipeline_rows_per_sec': n / pipeline_seconds if pipeline_seconds else None,
+                'scraper_rows': scraper_rows,
+                'stages': stages,
+            }
+            report['runs'].append(run)
+            for stage, metrics in run['stages'].items():
+                rate = f"{metrics['rows_per_sec']:,.0f} rows/sec" if metrics['rows_per_sec'] else '-'
+                logger.info(
+                    f"  {stage}: {metrics['rows']:,} rows in {metrics['seconds']:.2f}s ({rate}), "
+                    f"peak RSS {metrics['peak_rss_mb']:,.0f} MB"
+                )
+    finally:
+        collector.engine.dispose()
+        if database != 'sqlite':
+            from db.pool import dispose_engine
+            dispose_engine()
+        if server is not None:
+            server.stop()
+        elif database == 'server':
+            drop_database(settings, SCRATCH_DATABASE)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Benchmark the ETL and scraper pipeline on synthetic fines')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database', choices=DATABASES, default='temp',
+                        help="temp: throwaway initdb cluster (falls back to SQLite); "
+                             f"server: scratch database {SCRATCH_DATABASE} on the DB_* server; sqlite")
+    parser.add_argument('--chunk-size', type=int, default=10_000)
+    parser.add_argument('--max-html-rows', type=int, default=100_000,
+                        help='Cap on rows rendered and parsed for the process_row stage')
+    parser.add_argument('--max-store-rows', type=int, default=1_000_000,
+                        help='Cap on rows held in memory for the process_and_save_data stage')
+    parser.add_argument('--skip-scraper', action='store_true')
+    parser.add_argument('--allocations', action='store_true',
+                        help='Also record tracemalloc allocation peaks (runs each size a second time)')
+    parser.add_argument('--output', default=os.path.join(DATA_DIR, 'bench_pipeline_results.json'))
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        args.sizes, seed=args.seed, database=args.database, chunk_size=args.chunk_size,
+        trace_allocations=args.allocations, max_html_rows=args.max_html_rows,
+        max_store_rows=args.max_store_rows, skip_scraper=args.skip_scraper
+    )
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Results written to {args.output}")
@@ -0,0 +1,125 @@
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(DATA_DIR), '_DevelopmentEnvironment', 'src')
+
+# Packages a check-db cold start must not import
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'sqlalchemy', 'requests', 'playwright', 'bs4', 'lxml')
+
+# Cold start budget of check-db in milliseconds (interpreter start, imports and configuration)
+CHECK_DB_BUDGET_MS = 200.0
+
+# What a command does before its real work: import the CLI and the command's module and read the configuration
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {src!r})
+from etl import cli
+cli.load_command({command!r})
+from db import config
+config.settings()
+print(json.dumps({{'import_seconds': time.perf_counter() - start, 'modules': sorted(sys.modules)}}))
+"""
+
+
+def cold_start(command: str) -> Dict[str, float]:
+    """Start a fresh interpreter, load a command and return its wall time, import time and loaded modules"""
+    script = STARTUP_SCRIPT.format(src=SRC_DIR, command=command)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    return {'wall_seconds': wall, 'import_seconds': data['import_seconds'], 'modules': data['modules']}
+
+
+def slowest_imports(command: str, top: int = 10) -> List[tuple]:
+    """Return the slowest top-level imports of a command's cold start from python -X importtime"""
+    script = STARTUP_SCRIPT.format(src=SRC_DIR, command=command)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', script],
+                            capture_output=True, text=True, check=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):  # nested imports are indented
+            imports.append((name.strip(), int(cumulative) / 1000))
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:top]
+
+
+def run_benchmark(command: str = 'check-db', runs: int = 10) -> dict:
+    """Time the cold start of a command over several fresh interpreters"""
+    samples = [cold_start(command) for _ in range(runs + 1)][1:]  # the first run warms the OS file cache
+    walls = [sample['wall_seconds'] * 1000 for sample in samples]
+    imports = [sample['import_seconds'] * 1000 for sample in samples]
+    heavy = sorted({
+        module.split('.')[0] for module in samples[-1]['modules'] if module.split('.')[0] in HEAVY_MODULES
+    })
+    result = {
+        'command': command,
+        'runs': runs,
+        'wall_ms_median': statistics.median(walls),
+        'wall_ms_min': min(walls),
+        'import_ms_median': statistics.median(imports),
+        'heavy_modules': heavy,
+        'slowest_imports_ms': slowest_imports(command),
+    }
+    logger.info(
+        f"{command}: cold start {result['wall_ms_median']:.1f} ms median ({result['wall_ms_min']:.1f} ms min), "
+        f"imports and configuration {result['import_ms_median']:.1f} ms"
+    )
+    for name, ms in result['slowest_imports_ms']:
+        logger.info(f"  {name}: {ms:.1f} ms")
+    return result
+
+
+def check_budget(result: dict, budget_ms: Optional[float]) -> List[str]:
+    """Return the reasons a cold start is over budget (none if it is within it)"""
+    problems = []
+    if budget_ms is not None and result['wall_ms_median'] > budget_ms:
+        problems.append(f"cold start {result['wall_ms_median']:.1f} ms is over the {budget_ms:.0f} ms budget")
+    if result['command'] == 'check-db' and result['heavy_modules']:
+        problems.append(f"check-db imports {', '.join(result['heavy_modules'])}")
+    return problems
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    sys.path.insert(0, SRC_DIR)
+    from etl.cli import COMMANDS
+
+    parser = argparse.ArgumentParser(description='Benchmark the cold start of gdpr-fines commands')
+    parser.add_argument('--command', choices=COMMANDS, default='check-db')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float,
+                        help=f'Fail above this median cold start (default {CHECK_DB_BUDGET_MS:.0f} ms for check-db)')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    budget = args.budget_ms if args.budget_ms is not None else (CHECK_DB_BUDGET_MS if args.command == 'check-db' else None)
+    result = run_benchmark(args.command, args.runs)
+    result['budget_ms'] = budget
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+    problems = check_budget(result, budget)
+    for problem in problems:
+        logger.error(problem)
+    if problems:
+        sys.exit(1)
+    logger.info(f"{args.command} cold start is within budget")
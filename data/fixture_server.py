@@ -0,0 +1,139 @@
+import argparse
+import html
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+# Column headers of the enforcement tracker table
+HEADERS = [
+    '', 'ETid', 'Country', 'Authority', 'Date of Decision', 'Fine [€]',
+    'Controller/Processor', 'Sector', 'Quoted Art.', 'Type', 'Summary', 'Source', 'Direct URL'
+]
+
+
+def _link(href):
+    """Render an anchor cell, or an empty cell when there is no link"""
+    if not href:
+        return '<td></td>'
+    return f'<td><a href="{html.escape(href)}">Link</a></td>'
+
+
+def render_row(record: Dict[str, Any]) -> str:
+    """Render a scraped record as a 13-cell tracker table row"""
+    cells = [
+        '<td></td>',
+        f"<td>{html.escape(str(record.get('etid') or ''))}</td>",
+        f"<td>{html.escape(str(record.get('country') or ''))}</td>",
+        f"<td>{html.escape(str(record.get('authority') or ''))}</td>",
+        f"<td>{html.escape(str(record.get('date') or ''))}</td>",
+        f"<td>{html.escape(str(record.get('amount') or ''))}</td>",
+        f"<td>{html.escape(str(record.get('company') or ''))}</td>",
+        f"<td>{html.escape(str(record.get('sector') or ''))}</td>",
+        f"<td>{html.escape(str(record.get('article') or ''))}</td>",
+        f"<td>{html.escape(str(record.get('type') or ''))}</td>",
+        f"<td>{html.escape(str(record.get('summary') or ''))}</td>",
+        _link(record.get('source')),
+        _link(record.get('url')),
+    ]
+    return '<tr>' + ''.join(cells) + '</tr>'
+
+
+def render_page(records: List[Dict[str, Any]], page_num: int, page_size: int) -> str:
+    """Render one page of records as an enforcement tracker HTML page"""
+    start = (page_num - 1) * page_size
+    rows = ''.join(render_row(record) for record in records[start:start + page_size])
+    header = '<tr>' + ''.join(f'<th>{html.escape(h)}</th>' for h in HEADERS) + '</tr>'
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Enforcement Tracker</title></head>'
+        f'<body><table class="table">{header}{rows}</table></body></html>'
+    )
+
+
+class FixtureServer:
+    """Serve scraped records as paginated tracker pages on localhost"""
+
+    def __init__(self, records: List[Dict[str, Any]], page_size: int = 50,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.records = records
+        self.page_size = page_size
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                try:
+                    page_num = max(int(query.get('page', ['1'])[0]), 1)
+                except ValueError:
+                    page_num = 1
+                body = render_page(server.records, page_num, server.page_size).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        """Start serving in a background thread"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def load_records(path: str) -> List[Dict[str, Any]]:
+    """Load scraped records from a raw JSON file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Serve raw GDPR data as enforcement tracker pages')
+    parser.add_argument('--data', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'raw_gdpr_data.json'))
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--page-size', type=int, default=50)
+    args = parser.parse_args()
+
+    fixture = FixtureServer(load_records(args.data), page_size=args.page_size, port=args.port)
+    logger.info(f"Serving {len(fixture.records)} records at {fixture.url}")
+    try:
+        fixture.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fixture.httpd.server_close()
@@ -1,36 +1,169 @@
+import argparse
 import asyncio
 from playwright.async_api import async_playwright
 import pandas as pd
 from datetime import datetime
 import json
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 import re
+import time
 from bs4 import BeautifulSoup
+from page_cache import PageCache
+import lxml.etree
+import lxml.html
+
+# The ETL instrumentation and columnar store come from the installed gdpr-fines-etl package
+from etl.instrumentation import count, count_rows, instrumented_run, timed
+from etl.storage import ColumnarStore
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+# Available HTML parser backends for the fines table
+PARSER_BACKENDS = ('lxml', 'bs4')
+
+# Number of cells in a tracker table row
+ROW_CELLS = 13
+
+class TokenBucket:
+    """Asyncio token-bucket rate limiter"""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
 class GDPRScraper:
-    def __init__(self):
-        self.base_url = "https://www.enforcementtracker.com"
+    def __init__(self, base_url: Optional[str] = None, concurrency: int = 4,
+                 rate_limit: float = 2.0, max_pages: Optional[int] = None, parser: str = 'lxml',
+                 use_cache: bool = True, cache_dir: Optional[str] = None, cache_ttl: Optional[float] = 24 * 3600,
+                 replay: bool = False, stop_after_unchanged: int = 2, store_dir: Optional[str] = None,
+                 store_format: str = 'parquet'):
+        """
+        Args:
+            base_url: Enforcement tracker URL (point at a local fixture server for offline runs)
+            concurrency: Number of browser pages crawling in parallel
+            rate_limit: Maximum page loads per second across all workers
+            max_pages: Optional page limit; by default crawl until a page comes back empty
+            parser: Table parser backend, 'lxml' (default) or 'bs4'
+            use_cache: Keep raw table HTML in an on-disk page cache
+            cache_dir: Page cache directory (defaults to data/page_cache)
+            cache_ttl: Seconds a cached page is reused without loading it in the browser
+            replay: Parse pages from the cache only, without starting Chromium
+            stop_after_unchanged: Stop crawling after this many consecutive unchanged pages
+                and take the remaining pages from the cache (0 disables)
+            store_dir: Columnar store directory for raw and processed fines (defaults to data/store)
+            store_format: Store file format, 'parquet' or 'feather'
+        """
+        if parser not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown parser '{parser}', expected one of {PARSER_BACKENDS}")
+        self.parser = parser
+        self.base_url = base_url or os.getenv('GDPR_TRACKER_URL', "https://www.enforcementtracker.com")
+        self.concurrency = max(concurrency, 1)
+        self.rate_limit = rate_limit
+        self.max_pages = max_pages
         self.data_dir = os.path.dirname(os.path.abspath(__file__))
         self.raw_data_file = os.path.join(self.data_dir, 'raw_gdpr_data.json')
-        self.processed_data_file = os.path.join(self.data_dir, 'gdpr_enforcement_data.csv')
+        self.store = ColumnarStore(store_dir or os.path.join(self.data_dir, 'store'), file_format=store_format)
+        self.replay = replay
+        self.stop_after_unchanged = stop_after_unchanged
+        self.cache = None
+        if use_cache or replay:
+            self.cache = PageCache(cache_dir or os.path.join(self.data_dir, 'page_cache'), ttl=cache_ttl)
+        self.page_changed = {}
 
-    async def scrape_page(self, page_num):
+    def page_url(self, page_num: int) -> str:
+        """URL of a tracker page"""
+        if page_num == 1:
+            return self.base_url
+        return f"{self.base_url}?page={page_num}"
+
+    @timed('scrape_page')
+    async def scrape_page(self, page_num, page=None):
         logging.info(f"Scraping page {page_num}")
+        page = page or self.page
         
         # Wait for table to load
-        await self.page.wait_for_selector('table.table')
+        await page.wait_for_selector('table.table')
         
         # Get the table HTML
-        table_html = await self.page.inner_html('table.table')
+        table_html = await page.inner_html('table.table')
+        count('bytes_fetched', len(table_html.encode('utf-8')), source='tracker')
+        if self.cache is not None:
+            self.page_changed[page_num] = self.cache.put(self.page_url(page_num), table_html)
+        fines = self.parse_table(table_html)
+        
+        for fine in fines:
+            logging.info(f"Scraped fine: {fine['company']} - {fine['amount']}")
+        
+        return fines
+
+    def scrape_cached_page(self, page_num) -> Optional[List[Dict[str, Any]]]:
+        """Parse a page from the cache if it was fetched within the TTL"""
+        if self.cache is None:
+            return None
+        table_html = self.cache.get(self.page_url(page_num))
+        if table_html is None:
+            return None
+        logging.info(f"Using cached page {page_num}")
+        self.page_changed[page_num] = False
+        return self.parse_table(table_html)
+
+    def unchanged_run(self, page_num) -> bool:
+        """Whether page_num ends a run of stop_after_unchanged unchanged pages"""
+        if not self.stop_after_unchanged or self.cache is None:
+            return False
+        first = page_num - self.stop_after_unchanged + 1
+        return first >= 1 and all(
+            self.page_changed.get(num) is False for num in range(first, page_num + 1)
+        )
+
+    def replay_cache(self, start: int = 1) -> List[Dict[str, Any]]:
+        """Parse cached pages from start onwards, without a browser, until one is missing or empty"""
+        fines = []
+        if self.cache is None:
+            return fines
+        page_num = start
+        while self.max_pages is None or page_num <= self.max_pages:
+            table_html = self.cache.get(self.page_url(page_num), fresh_only=False)
+            if table_html is None:
+                break
+            page_fines = self.parse_table(table_html)
+            if not page_fines:
+                break
+            fines.extend(page_fines)
+            page_num += 1
+        logging.info(f"Replayed {page_num - start} cached pages, found {len(fines)} fines")
+        self.cache.flush()
+        return fines
+
+    @timed('parse')
+    def parse_table(self, table_html: str) -> List[Dict[str, Any]]:
+        """Parse the fines table HTML with the configured parser backend"""
+        if self.parser == 'bs4':
+            return self.parse_table_bs4(table_html)
+        return self.parse_table_lxml(table_html)
+
+    def parse_table_bs4(self, table_html: str) -> List[Dict[str, Any]]:
+        """Parse the fines table with BeautifulSoup, one process_row call per row"""
         soup = BeautifulSoup(table_html, 'html.parser')
         
         # Find all rows except header
@@ -41,50 +174,170 @@ class GDPRScraper:
             fine = self.process_row(row)
             if fine:
                 fines.append(fine)
-                logging.info(f"Scraped fine: {fine['company']} - {fine['amount']}")
         
+        count_rows('parse', len(rows), len(fines))
+        return fines
+
+    def parse_table_lxml(self, table_html: str) -> List[Dict[str, Any]]:
+        """Parse the fines table with lxml, extracting each row's cells in a single pass"""
+        root = lxml.html.fragment_fromstring(table_html, create_parent='table')
+        lxml.etree.strip_elements(root, 'script', 'style', with_tail=False)  # get_text() skips these too
+        fines = []
+        rows = list(root.iter('tr'))[1:]  # Skip header row
+        
+        for row in rows:
+            cells = [cell for cell in row if cell.tag == 'td']
+            if len(cells) < ROW_CELLS:
+                continue
+            try:
+                anchors = [next(cell.iter('a'), None) for cell in cells[11:13]]
+                hrefs = [anchor.attrib['href'] if anchor is not None else None for anchor in anchors]
+            except KeyError as e:
+                logging.error(f"Error processing row: {str(e)}")
+                continue
+            texts = [''.join(text.strip() for text in cell.itertext()) for cell in cells]
+            fine = self.build_fine(texts, *hrefs)
+            if fine:
+                fines.append(fine)
+        
+        count_rows('parse', len(rows), len(fines))
         return fines
 
     async def scrape_fines(self):
+        """Scrape pages one after another on self.page until one comes back empty"""
         fines = []
-        max_pages = 10  # Only scrape first 10 pages
+        limiter = TokenBucket(self.rate_limit)
+        page = 1
         
-        for page in range(1, max_pages + 1):
-            # Navigate to page
-            if page > 1:
-                await self.page.goto(f"{self.base_url}?page={page}")
-                await asyncio.sleep(2)  # Small delay between pages
+        while self.max_pages is None or page <= self.max_pages:
+            page_fines = self.scrape_cached_page(page)
+            if page_fines is None:
+                # Navigate to page
+                await limiter.acquire()
+                with timed('fetch'):
+                    await self.page.goto(self.page_url(page))
+                page_fines = await self.scrape_page(page)
             
-            page_fines = await self.scrape_page(page)
+            if not page_fines:
+                logging.info(f"Page {page} is empty, stopping")
+                break
             fines.extend(page_fines)
             
             logging.info(f"Completed page {page}, found {len(page_fines)} fines")
+            if self.unchanged_run(page):
+                logging.info(f"Page {page} is unchanged, taking remaining pages from cache")
+                fines.extend(self.replay_cache(page + 1))
+                break
+            page += 1
         
         return fines
 
+    async def scrape_fines_concurrent(self, context):
+        """Scrape pages with a pool of browser pages pulling page numbers from a queue.
+
+        Crawling stops at the first empty page, or at the end of a run of unchanged pages
+        (the rest then comes from the cache); results are merged in page order.
+        """
+        queue = asyncio.Queue(maxsize=self.concurrency)
+        limiter = TokenBucket(self.rate_limit, capacity=self.concurrency)
+        stop = asyncio.Event()
+        results = {}
+        state = {'last_page': None, 'replay': False, 'error': None}
+
+        def stop_at(page_num, replay):
+            if state['last_page'] is None or page_num < state['last_page']:
+                state['last_page'] = page_num
+                state['replay'] = replay
+            stop.set()
+
+        async def produce():
+            page_num = 1
+            while not stop.is_set() and (self.max_pages is None or page_num <= self.max_pages):
+                await queue.put(page_num)
+                page_num += 1
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def work(page):
+            while True:
+                page_num = await queue.get()
+                if page_num is None:
+                    return
+                if stop.is_set() and (state['last_page'] is None or page_num >= state['last_page']):
+                    continue
+                try:
+                    page_fines = self.scrape_cached_page(page_num)
+                    if page_fines is None:
+                        await limiter.acquire()
+                        with timed('fetch'):
+                            await page.goto(self.page_url(page_num))
+                        page_fines = await self.scrape_page(page_num, page)
+                except Exception as e:
+                    logging.error(f"Error scraping page {page_num}: {str(e)}")
+                    state['error'] = state['error'] or e
+                    stop.set()
+                    continue
+                if not page_fines:
+                    logging.info(f"Page {page_num} is empty, stopping")
+                    stop_at(page_num, replay=False)
+                    continue
+                results[page_num] = page_fines
+                logging.info(f"Completed page {page_num}, found {len(page_fines)} fines")
+                if self.unchanged_run(page_num):
+                    logging.info(f"Page {page_num} is unchanged, taking remaining pages from cache")
+                    stop_at(page_num + 1, replay=True)
+
+        pages = [await context.new_page() for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(produce(), *(work(page) for page in pages))
+        finally:
+            for page in pages:
+                await page.close()
+
+        if state['error'] is not None:
+            raise state['error']
+
+        fines = []
+        for page_num in sorted(results):
+            if state['last_page'] is None or page_num < state['last_page']:
+                fines.extend(results[page_num])
+        if state['replay']:
+            fines.extend(self.replay_cache(state['last_page']))
+        return fines
+
+    @timed('save')
     def save_raw_data(self, data: List[Dict[str, Any]]):
-        """Save raw scraped data to JSON file"""
+        """Save raw scraped data to the columnar store"""
         try:
-            with open(self.raw_data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            logger.info(f"Raw data saved to {self.raw_data_file}")
+            self.store.write('raw', data)
+            logger.info(f"Raw data saved to {self.store.path('raw')}")
         except Exception as e:
             logger.error(f"Error saving raw data: {str(e)}")
 
+    def load_raw_data(self) -> List[Dict[str, Any]]:
+        """Load raw records from the store, or from a legacy raw JSON file"""
+        if self.store.exists('raw'):
+            return list(self.store.iter_records('raw'))
+        with open(self.raw_data_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def reprocess_raw_data(self):
+        """Rebuild the processed fines dataset from the saved raw data without crawling"""
+        try:
+            data = self.load_raw_data()
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Error loading raw data: {str(e)}")
+            return
+        self.process_and_save_data(data)
+
+    @timed('save')
     def process_and_save_data(self, data: List[Dict[str, Any]]):
-        """Process and save data to CSV"""
+        """Process and save data to the columnar store"""
         try:
-            df = pd.DataFrame(data)
-            
-            # Convert date strings to datetime objects
-            df['date'] = pd.to_datetime(df['date'].astype(str).str.slice(0, 8), format='%Y%m%d')
-            
-            # Clean amount column
-            df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
-            
-            # Save to CSV
-            df.to_csv(self.processed_data_file, index=False)
-            logger.info(f"Processed data saved to {self.processed_data_file}")
+            # Parse dates and amounts, canonicalise country names and write typed partitions
+            self.store.write('fines', data)
+            logger.info(f"Processed data saved to {self.store.path('fines')}")
+            df = self.store.read_frame('fines')
             
             # Print basic statistics
             logger.info("\nData Quality Summary:")
@@ -105,27 +358,43 @@ class GDPRScraper:
             logger.error(f"Error processing data: {str(e)}")
 
     async def run(self):
-        """Run the scraper"""
+        """Run the scraper, logging stage timings and counts (and writing ETL_METRICS_DIR/gdpr_scraper.prom)"""
+        with instrumented_run('scraper') as run:
+            await self._run(run)
+
+    async def _run(self, run):
+        if self.replay:
+            # Offline run from the page cache
+            fines = self.replay_cache()
+            if not fines:
+                logging.error("No cached pages to replay!")
+                run.mark_failed()
+                return
+            logging.info(f"Successfully replayed {len(fines)} fines")
+            self.save_raw_data(fines)
+            return
+        
         async with async_playwright() as p:
             # Launch browser
             browser = await p.chromium.launch(headless=True)
             context = await browser.new_context(
                 viewport={'width': 1920, 'height': 1080}
             )
-            self.page = await context.new_page()
 
             try:
-                # Navigate to initial page
-                logging.info("Navigating to the enforcement tracker...")
-                await self.page.goto(self.base_url)
-                await self.page.wait_for_selector('table.table')
-                await self.page.wait_for_load_state('networkidle')
-                
-                # Scrape the fines
-                fines = await self.scrape_fines()
+                if self.concurrency > 1:
+                    # Scrape the fines with a pool of pages
+                    logging.info(f"Crawling the enforcement tracker with {self.concurrency} pages...")
+                    fines = await self.scrape_fines_concurrent(context)
+                else:
+                    # Scrape the fines one page at a time
+                    self.page = await context.new_page()
+                    logging.info("Crawling the enforcement tracker...")
+                    fines = await self.scrape_fines()
                 
                 if not fines:
                     logging.error("No fines were scraped!")
+                    run.mark_failed()
                     return
                 
                 logging.info(f"Successfully scraped {len(fines)} fines")
@@ -141,14 +410,25 @@ class GDPRScraper:
             finally:
                 await browser.close()
 
+    @timed('process_row')
     def process_row(self, row):
         cells = row.find_all('td')
-        if len(cells) < 13:  # We expect at least 13 cells
+        if len(cells) < ROW_CELLS:  # We expect at least 13 cells
             return None
         
+        try:
+            anchors = [cell.find('a') for cell in cells[11:13]]
+            hrefs = [anchor['href'] if anchor is not None else None for anchor in anchors]
+        except KeyError as e:
+            logging.error(f"Error processing row: {str(e)}")
+            return None
+        return self.build_fine([cell.get_text(strip=True) for cell in cells], *hrefs)
+
+    def build_fine(self, texts: List[str], source: Optional[str], url: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Build a fine record from a row's cell texts and link hrefs"""
         try:
             # Get the date text from cell 4 (0-based index)
-            date_text = cells[4].get_text(strip=True)
+            date_text = texts[4]
             if not date_text:
                 return None
             
@@ -157,21 +437,21 @@ class GDPRScraper:
             
             # Extract other fields
             fine = {
-                'etid': cells[1].get_text(strip=True),
-                'country': cells[2].get_text(strip=True).split('\n')[-1],
-                'authority': cells[3].get_text(strip=True),
+                'etid': texts[1],
+                'country': texts[2].split('\n')[-1],
+                'authority': texts[3],
                 'date': date,  # Now this is already a string
-                'amount': cells[5].get_text(strip=True),
-                'company': cells[6].get_text(strip=True),
-                'sector': cells[7].get_text(strip=True),
-                'article': cells[8].get_text(strip=True),
-                'type': cells[9].get_text(strip=True),
-                'summary': cells[10].get_text(strip=True),
-                'source': cells[11].find('a')['href'] if cells[11].find('a') else None,
-                'url': cells[12].find('a')['href'] if cells[12].find('a') else None
+                'amount': texts[5],
+                'company': texts[6],
+                'sector': texts[7],
+                'article': texts[8],
+                'type': texts[9],
+                'summary': texts[10],
+                'source': source,
+                'url': url
             }
             return fine
-        except (ValueError, IndexError, KeyError, AttributeError) as e:
+        except (ValueError, IndexError) as e:
             logging.error(f"Error processing row: {str(e)}")
             return None
 
@@ -186,7 +466,16 @@ class GDPRScraper:
             logging.error(f"Error saving data: {str(e)}")
             raise
 
-if __name__ == "__main__":
+def main(argv: Optional[List[str]] = None, prog: Optional[str] = None):
+    """Parse the command line and run the scraper"""
+    parser = argparse.ArgumentParser(prog=prog, description='Scrape the GDPR enforcement tracker')
+    parser.add_argument('--url', help='Tracker URL (e.g. a local fixture server)')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--replay', action='store_true', help='Parse cached pages without starting Chromium')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the on-disk page cache')
+    parser.add_argument('--reprocess', action='store_true', help='Rebuild the processed fines from the saved raw data')
+    args = parser.parse_args(argv)
+    
     # Set up logging
     logging.basicConfig(
         level=logging.INFO,
@@ -194,5 +483,16 @@ if __name__ == "__main__":
     )
     
     # Create and run scraper
-    scraper = GDPRScraper()
-    asyncio.run(scraper.run()) 
\ No newline at end of file
+    scraper = GDPRScraper(
+        base_url=args.url,
+        concurrency=args.concurrency,
+        use_cache=not args.no_cache,
+        replay=args.replay
+    )
+    if args.reprocess:
+        scraper.reprocess_raw_data()
+    else:
+        asyncio.run(scraper.run())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PageCache:
+    """On-disk, content-addressed cache of page HTML keyed by URL
+
+    Page bodies are stored once per SHA-256 hash under blobs/, and index.json maps each
+    URL to its current hash plus fetch and access times. Entries older than the TTL are
+    treated as stale, and the least recently used URLs are evicted once the blobs exceed
+    max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, ttl: Optional[float] = 24 * 3600, max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, 'blobs')
+        self.index_file = os.path.join(cache_dir, 'index.json')
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """Read the URL index, starting empty if it is missing or corrupt"""
+        if not os.path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable page cache index: {str(e)}")
+            return {}
+
+    def _save_index(self):
+        """Write the URL index atomically"""
+        tmp_file = self.index_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_file, self.index_file)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, f"{digest}.html")
+
+    @staticmethod
+    def digest(html: str) -> str:
+        """Content hash of a page body"""
+        return hashlib.sha256(html.encode('utf-8')).hexdigest()
+
+    def hash_for(self, url: str) -> Optional[str]:
+        """Hash of the cached body for a URL, if any"""
+        entry = self.index.get(url)
+        return entry['hash'] if entry else None
+
+    def is_fresh(self, url: str) -> bool:
+        """Whether a URL was fetched within the TTL"""
+        entry = self.index.get(url)
+        if not entry:
+            return False
+        return self.ttl is None or time.time() - entry['fetched_at'] < self.ttl
+
+    def get(self, url: str, fresh_only: bool = True) -> Optional[str]:
+        """Return the cached body for a URL, or None if missing (or stale when fresh_only)"""
+        entry = self.index.get(url)
+        if not entry or (fresh_only and not self.is_fresh(url)):
+            return None
+        try:
+            with open(self._blob_path(entry['hash']), 'r', encoding='utf-8') as f:
+                html = f.read()
+        except OSError:
+            del self.index[url]
+            self._save_index()
+            return None
+        entry['accessed_at'] = time.time()
+        return html
+
+    def put(self, url: str, html: str) -> bool:
+        """Store a body for a URL and return True if it differs from the cached one"""
+        digest = self.digest(html)
+        previous = self.index.get(url)
+        changed = previous is None or previous['hash'] != digest
+
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(html)
+
+        now = time.time()
+        self.index[url] = {'hash': digest, 'size': len(html.encode('utf-8')), 'fetched_at': now, 'accessed_at': now}
+        if previous and changed:
+            self._drop_blob(previous['hash'])
+        self._evict()
+        self._save_index()
+        return changed
+
+    def _drop_blob(self, digest: str):
+        """Delete a blob once no URL references it"""
+        if any(entry['hash'] == digest for entry in self.index.values()):
+            return
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Evict least recently used URLs until the blobs fit in max_bytes"""
+        sizes = {entry['hash']: entry['size'] for entry in self.index.values()}
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        for url, entry in sorted(self.index.items(), key=lambda item: item[1]['accessed_at']):
+            if total <= self.max_bytes:
+                break
+            del self.index[url]
+            if not any(other['hash'] == entry['hash'] for other in self.index.values()):
+                total -= entry['size']
+                self._drop_blob(entry['hash'])
+            logger.info(f"Evicted {url} from page cache")
+
+    def flush(self):
+        """Persist access times recorded by get()"""
+        self._save_index()
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)